@@ -0,0 +1,253 @@
+"""
+Semantic answer cache for standalone questions.
+"""
+import os
+import json
+import threading
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+
+
+class SemanticAnswerCache:
+    """
+    Reuse answers for questions that mean the same thing.
+    
+    Questions are keyed by their (normalized) query embedding. A lookup
+    returns the cached answer of the most similar question if the cosine
+    similarity is at least `threshold` and the answer was generated against
+    the current corpus version. Only questions asked without conversation
+    history are cached, since history changes what a good answer is.
+    
+    The cache is bounded to `max_entries` with least-recently-used eviction
+    and persisted to `path` so it survives restarts.
+    """
+    
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        max_entries: int = None,
+        threshold: float = None,
+        save_every: int = 20
+    ):
+        """
+        Initialize cache.
+        
+        Args:
+            path: File the cache is persisted to (ANSWER_CACHE_PATH), or None
+                for a memory-only cache
+            max_entries: Maximum cached answers (ANSWER_CACHE_SIZE)
+            threshold: Minimum cosine similarity for a hit (ANSWER_CACHE_THRESHOLD)
+            save_every: Persist after this many new entries
+        """
+        self.path = path
+        self.max_entries = max_entries or int(os.getenv("ANSWER_CACHE_SIZE", "2000"))
+        self.threshold = threshold or float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.95"))
+        self.save_every = save_every
+        
+        self.corpus_version: Optional[str] = None
+        self._vectors: Optional[np.ndarray] = None  # max_entries x dimension, rows normalized
+        self._entries: List[Optional[Dict[str, Any]]] = [None] * self.max_entries
+        self._last_used = np.zeros(self.max_entries, dtype=np.int64)
+        self._clock = 0
+        self._unsaved = 0
+        self._lock = threading.Lock()
+        
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self.invalidations = 0
+        
+        if self.path and Path(self.path).exists():
+            try:
+                self._load()
+            except Exception as e:
+                print(f"⚠ Could not load answer cache from {self.path}: {str(e)}")
+    
+    def lookup(self, embedding: List[float], corpus_version: Optional[str]) -> Optional[Dict[str, Any]]:
+        """
+        Find a cached answer for a semantically equivalent question.
+        
+        Args:
+            embedding: Query embedding of the new question
+            corpus_version: Current corpus version of the vector store
+        
+        Returns:
+            Cached entry with question, answer, sources and similarity, or None
+        """
+        query = self._normalize(embedding)
+        
+        with self._lock:
+            self._check_version(corpus_version)
+            
+            if self._vectors is None or self._vectors.shape[1] != query.shape[0]:
+                self.misses += 1
+                return None
+            
+            scores = self._vectors @ query
+            best = int(np.argmax(scores))
+            
+            if self._entries[best] is None or scores[best] < self.threshold:
+                self.misses += 1
+                return None
+            
+            self._clock += 1
+            self._last_used[best] = self._clock
+            self.hits += 1
+            
+            return {**self._entries[best], 'similarity': round(float(scores[best]), 4)}
+    
+    def store(
+        self,
+        embedding: List[float],
+        corpus_version: Optional[str],
+        question: str,
+        answer: str,
+        sources: List[Dict[str, Any]]
+    ):
+        """
+        Cache the answer to a standalone question.
+        
+        Args:
+            embedding: Query embedding of the question
+            corpus_version: Corpus version the answer was generated against
+            question: The question
+            answer: Generated answer
+            sources: Source references returned with the answer
+        """
+        vector = self._normalize(embedding)
+        
+        with self._lock:
+            self._check_version(corpus_version)
+            
+            if self._vectors is None or self._vectors.shape[1] != vector.shape[0]:
+                self._reset(dimension=vector.shape[0])
+            
+            # Replace a near-identical entry instead of storing a second copy
+            scores = self._vectors @ vector
+            slot = int(np.argmax(scores))
+            if self._entries[slot] is None or scores[slot] < self.threshold:
+                slot = self._free_slot()
+            
+            self._vectors[slot] = vector
+            self._entries[slot] = {'question': question, 'answer': answer, 'sources': sources}
+            self._clock += 1
+            self._last_used[slot] = self._clock
+            self.stores += 1
+            self._unsaved += 1
+            
+            should_save = self.path is not None and self._unsaved >= self.save_every
+        
+        if should_save:
+            self.save()
+    
+    def clear(self):
+        """Drop all cached answers."""
+        with self._lock:
+            self._reset(dimension=None)
+    
+    def save(self):
+        """Persist the cache to disk."""
+        if not self.path:
+            return
+        
+        with self._lock:
+            if self._vectors is None:
+                return
+            
+            used = [i for i, entry in enumerate(self._entries) if entry is not None]
+            vectors = self._vectors[used].copy()
+            payload = json.dumps({
+                'corpus_version': self.corpus_version,
+                'entries': [self._entries[i] for i in used],
+                'last_used': [int(self._last_used[i]) for i in used]
+            }, ensure_ascii=False)
+            self._unsaved = 0
+        
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(f, vectors=vectors, payload=np.array(payload))
+        os.replace(tmp_path, self.path)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': sum(1 for entry in self._entries if entry is not None),
+                'max_entries': self.max_entries,
+                'threshold': self.threshold,
+                'corpus_version': self.corpus_version,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+                'stores': self.stores,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations
+            }
+    
+    def _load(self):
+        with np.load(self.path, allow_pickle=False) as data:
+            vectors = data['vectors']
+            payload = json.loads(str(data['payload']))
+        
+        entries = payload['entries'][-self.max_entries:]
+        last_used = payload['last_used'][-self.max_entries:]
+        vectors = vectors[-self.max_entries:]
+        
+        self._reset(dimension=vectors.shape[1] if len(entries) else None)
+        self.corpus_version = payload['corpus_version']
+        
+        for slot, (entry, used) in enumerate(zip(entries, last_used)):
+            self._vectors[slot] = vectors[slot]
+            self._entries[slot] = entry
+            self._last_used[slot] = used
+        
+        self._clock = max(last_used, default=0)
+        print(f"✓ Loaded {len(entries)} cached answers")
+    
+    def _check_version(self, corpus_version: Optional[str]):
+        """Invalidate everything when the corpus changes (lock held)."""
+        if corpus_version != self.corpus_version:
+            if any(entry is not None for entry in self._entries):
+                self.invalidations += 1
+            self._reset(dimension=self._vectors.shape[1] if self._vectors is not None else None)
+            self.corpus_version = corpus_version
+    
+    def _reset(self, dimension: Optional[int]):
+        """Empty the cache, sizing the vector matrix for `dimension` (lock held)."""
+        self._vectors = (
+            np.zeros((self.max_entries, dimension), dtype=np.float32)
+            if dimension else None
+        )
+        self._entries = [None] * self.max_entries
+        self._last_used[:] = 0
+        self._unsaved = 0
+    
+    def _free_slot(self) -> int:
+        """Find an empty slot, evicting the least recently used entry (lock held)."""
+        slot = int(np.argmin(self._last_used))
+        if self._entries[slot] is not None:
+            self.evictions += 1
+        return slot
+    
+    @staticmethod
+    def _normalize(embedding: List[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+
+def create_answer_cache() -> Optional[SemanticAnswerCache]:
+    """
+    Create the answer cache unless ANSWER_CACHE_ENABLED is false.
+    
+    Returns:
+        SemanticAnswerCache persisted to ANSWER_CACHE_PATH, or None
+    """
+    if os.getenv("ANSWER_CACHE_ENABLED", "true").lower() in ("0", "false", "no"):
+        return None
+    return SemanticAnswerCache(path=os.getenv("ANSWER_CACHE_PATH", "./cache/answer_cache.npz"))
@@ -0,0 +1,731 @@
+"""
+Batch question answering: many questions embedded and retrieved together,
+answered under a concurrency cap, with results written as NDJSON.
+
+Jobs submitted over the API run in the background and can be followed,
+cancelled and resumed. The same runner is available from the command line;
+re-running it with the same output file skips questions already answered
+and asks the failed ones again:
+
+    python -m app.agents.batch_qa questions.csv --output answers.ndjson --concurrency 4
+"""
+import os
+import csv
+import io
+import json
+import time
+import uuid
+import asyncio
+from datetime import datetime
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Tuple
+
+from app.config.database import get_db_context
+from app.models.database import BatchUsage
+from app.utils.admission import AdmissionRejected
+from app.utils.concurrency import run_in_pool
+
+DEFAULT_BATCH_JOBS_DIR = "./cache/batch_jobs"
+
+# Questions embedded and searched per vector store pass; answering starts
+# after the first pass instead of after the whole batch
+PREFETCH_CHUNK_SIZE = 64
+
+# Longest question accepted in a batch
+MAX_QUESTION_CHARS = 2000
+
+# Times a question waits out a full LLM queue before it is reported as failed
+MAX_ADMISSION_RETRIES = 10
+
+# Batch jobs queue for LLM slots under their own key, so a running job does
+# not use up its owner's share of the queue for interactive chat
+BATCH_ADMISSION_PREFIX = "batch:"
+
+# Token usage rows written to the database at a time
+USAGE_FLUSH_SIZE = 20
+
+# Job statuses after which no more results are written
+FINISHED_STATUSES = ('completed', 'failed', 'cancelled', 'interrupted')
+
+
+def parse_questions(
+    content: bytes,
+    content_type: str = "",
+    column: Optional[str] = None,
+    max_questions: Optional[int] = None
+) -> List[Dict[str, str]]:
+    """
+    Read the questions of a batch from a CSV file or a JSON array.
+    
+    A CSV file has the questions in `column`, a 'question' column or the
+    first column, and optional IDs in an 'id' column. A JSON array holds
+    question strings or objects with 'question' and optional 'id'. Rows
+    without an ID are numbered from 1.
+    
+    Args:
+        content: Raw file contents
+        content_type: Content type of the upload (JSON if it mentions json)
+        column: Name of the question column in a CSV header
+        max_questions: Most questions accepted
+    
+    Returns:
+        List of {'id', 'question'} dictionaries in file order
+    
+    Raises:
+        ValueError: If the file cannot be parsed, has no questions, too many
+            questions, an overlong question or duplicate IDs
+    """
+    text = content.decode("utf-8-sig", errors="replace")
+    
+    if "json" in content_type or text.lstrip().startswith("["):
+        try:
+            rows = json.loads(text)
+        except ValueError as e:
+            raise ValueError(f"Invalid JSON: {str(e)}")
+        if not isinstance(rows, list):
+            raise ValueError("JSON body must be an array of questions")
+        items = [
+            (row.get('id'), row.get('question')) if isinstance(row, dict) else (None, row)
+            for row in rows
+        ]
+    else:
+        items = _read_csv_questions(text, column)
+    
+    questions = []
+    seen = set()
+    for number, (question_id, question) in enumerate(items, start=1):
+        if not isinstance(question, str) or not question.strip():
+            continue
+        if len(question) > MAX_QUESTION_CHARS:
+            raise ValueError(f"Question {number} is longer than {MAX_QUESTION_CHARS} characters")
+        
+        question_id = str(question_id) if question_id not in (None, "") else str(number)
+        if question_id in seen:
+            raise ValueError(f"Duplicate question ID: {question_id}")
+        seen.add(question_id)
+        questions.append({'id': question_id, 'question': question.strip()})
+    
+    if not questions:
+        raise ValueError("No questions found")
+    if max_questions is not None and len(questions) > max_questions:
+        raise ValueError(f"At most {max_questions} questions per batch, got {len(questions)}")
+    
+    return questions
+
+
+def _read_csv_questions(text: str, column: Optional[str]) -> List[Tuple[Optional[str], str]]:
+    """(id, question) pairs from CSV text, with or without a header row."""
+    rows = [row for row in csv.reader(io.StringIO(text)) if row]
+    if not rows:
+        return []
+    
+    header = [cell.strip().lower() for cell in rows[0]]
+    wanted = (column or 'question').lower()
+    if wanted not in header:
+        if column:
+            raise ValueError(f"Column '{column}' not found in CSV header")
+        # No header: one question per row in the first column
+        return [(None, row[0]) for row in rows]
+    
+    question_index = header.index(wanted)
+    id_index = header.index('id') if 'id' in header else None
+    return [
+        (
+            row[id_index] if id_index is not None and id_index < len(row) else None,
+            row[question_index] if question_index < len(row) else ""
+        )
+        for row in rows[1:]
+    ]
+
+
+async def _answer_one(
+    agent,
+    item: Dict[str, Any],
+    prefetched: Optional[Dict[str, Any]],
+    user_id: Optional[str]
+) -> Dict[str, Any]:
+    """
+    Answer one batch question, waiting out a full LLM queue (up to
+    MAX_ADMISSION_RETRIES times) instead of failing.
+    
+    An answer made of retrieved excerpts because the model was unavailable
+    is reported as an error, so the question is asked again on resume.
+    """
+    started = time.perf_counter()
+    for attempt in range(MAX_ADMISSION_RETRIES + 1):
+        try:
+            result = await agent.aprocess_query(
+                item['question'],
+                user_id=user_id,
+                prefetched=prefetched,
+                deadline_seconds=agent.offline_deadline_seconds
+            )
+            break
+        except AdmissionRejected as e:
+            if attempt == MAX_ADMISSION_RETRIES:
+                print(f"✗ Batch question {item['id']} failed: LLM queue stayed full")
+                return {**item, 'answer': None, 'sources': [], 'error': "LLM queue is full"}
+            await asyncio.sleep(e.retry_after)
+        except Exception as e:
+            print(f"✗ Batch question {item['id']} failed: {str(e)}")
+            return {**item, 'answer': None, 'sources': [], 'error': str(e)}
+    
+    if result.get('fallback'):
+        print(f"✗ Batch question {item['id']} failed: model unavailable")
+        return {**item, 'answer': None, 'sources': [], 'error': "Model unavailable"}
+    
+    return {
+        **item,
+        'answer': result['answer'],
+        'sources': result['sources'],
+        'misconception_detected': result.get('misconception_detected', False),
+        'usage': result.get('usage'),
+        'latency_ms': round((time.perf_counter() - started) * 1000),
+        'error': None
+    }
+
+
+async def answer_batch(
+    agent,
+    questions: List[Dict[str, Any]],
+    semaphore: asyncio.Semaphore,
+    user_id: Optional[str] = None,
+    chunk_size: int = PREFETCH_CHUNK_SIZE
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Answer a batch of questions, yielding each result as it finishes.
+    
+    Questions are embedded and searched chunk_size at a time with
+    TaxReformAgent.aprefetch_batch. The next chunk is prefetched once every
+    question of the previous one has started answering, so retrieved
+    documents wait for at most one chunk. Answering goes through aprocess_query, so
+    the FAQ store, answer cache and identical-question coalescing all apply.
+    
+    Args:
+        agent: TaxReformAgent used to answer
+        questions: {'id', 'question'} dictionaries
+        semaphore: Bounds the questions being answered at once (shared by
+            every batch the caller runs)
+        user_id: Admission key the LLM calls are scheduled under
+        chunk_size: Questions per embedding and search pass
+    
+    Yields:
+        Result dictionaries (id, question, answer, sources, error, ...) in
+        completion order
+    """
+    results: asyncio.Queue = asyncio.Queue()
+    tasks: List[asyncio.Task] = []
+    started = 0
+    progress = asyncio.Event()
+    
+    async def answer(item: Dict[str, Any], prefetched: Optional[Dict[str, Any]]):
+        nonlocal started
+        async with semaphore:
+            started += 1
+            progress.set()
+            result = await _answer_one(agent, item, prefetched, user_id)
+        await results.put(result)
+    
+    async def prefetch_and_answer():
+        for start in range(0, len(questions), chunk_size):
+            while started < start:
+                progress.clear()
+                await progress.wait()
+            
+            chunk = questions[start:start + chunk_size]
+            try:
+                prefetched = await agent.aprefetch_batch([item['question'] for item in chunk])
+            except Exception as e:
+                # Each question then embeds and retrieves on its own
+                print(f"⚠ Batch prefetch failed: {str(e)}")
+                prefetched = [None] * len(chunk)
+            tasks.extend(asyncio.create_task(answer(item, p)) for item, p in zip(chunk, prefetched))
+    
+    producer = asyncio.create_task(prefetch_and_answer())
+    try:
+        for _ in range(len(questions)):
+            yield await results.get()
+    finally:
+        producer.cancel()
+        for task in tasks:
+            task.cancel()
+
+
+def scan_results(path: str) -> Tuple[Set[str], int]:
+    """
+    Read an NDJSON results file. A question asked again after failing has
+    several lines; the last one counts.
+    
+    Returns:
+        (IDs of the questions answered without error, number of questions
+        whose last result is an error)
+    """
+    errors: Dict[str, bool] = {}
+    if not Path(path).exists():
+        return set(), 0
+    
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                result = json.loads(line)
+                errors[str(result['id'])] = bool(result.get('error'))
+            except (ValueError, KeyError):
+                # A line cut short by a crash; that question is asked again
+                continue
+    
+    answered = {question_id for question_id, error in errors.items() if not error}
+    return answered, len(errors) - len(answered)
+
+
+def open_results(path: str):
+    """Open a results file for appending, dropping a last line cut short by a crash."""
+    if Path(path).exists():
+        with open(path, 'rb+') as f:
+            data = f.read()
+            if data and not data.endswith(b"\n"):
+                f.truncate(data.rfind(b"\n") + 1)
+    return open(path, 'a', encoding='utf-8')
+
+
+class BatchJobManager:
+    """
+    Run batch question-answering jobs in the background.
+    
+    Each job's questions, status and NDJSON results live under jobs_dir, so
+    results can be re-read from any line and a job interrupted by a restart
+    or cancelled can be resumed without answering its questions twice. All
+    jobs share one concurrency cap, leaving the rest of the LLM capacity to
+    interactive chat. Tokens spent are recorded per question in the
+    batch_usage table, which /api/usage adds to chat usage.
+    """
+    
+    def __init__(
+        self,
+        agent,
+        jobs_dir: Optional[str] = None,
+        concurrency: int = None,
+        max_questions: int = None,
+        max_active_per_user: int = None,
+        max_kept_per_user: int = None
+    ):
+        """
+        Initialize manager and reload jobs from earlier runs.
+        
+        Args:
+            agent: TaxReformAgent used to answer
+            jobs_dir: Directory for job files (BATCH_JOBS_DIR, default
+                ./cache/batch_jobs)
+            concurrency: Questions answered at once across all jobs
+                (BATCH_CONCURRENCY, default 4)
+            max_questions: Most questions per job (BATCH_MAX_QUESTIONS,
+                default 1000)
+            max_active_per_user: Jobs a user may have queued or running
+                (BATCH_MAX_ACTIVE_PER_USER, default 2)
+            max_kept_per_user: Finished jobs kept per user; older ones and
+                their files are deleted on submit (BATCH_MAX_KEPT_PER_USER,
+                default 20)
+        """
+        self.agent = agent
+        self.jobs_dir = Path(jobs_dir or os.getenv("BATCH_JOBS_DIR", DEFAULT_BATCH_JOBS_DIR))
+        self.concurrency = concurrency or int(os.getenv("BATCH_CONCURRENCY", "4"))
+        self.max_questions = max_questions or int(os.getenv("BATCH_MAX_QUESTIONS", "1000"))
+        self.max_active_per_user = max_active_per_user or int(os.getenv("BATCH_MAX_ACTIVE_PER_USER", "2"))
+        self.max_kept_per_user = max_kept_per_user or int(os.getenv("BATCH_MAX_KEPT_PER_USER", "20"))
+        self.jobs_dir.mkdir(parents=True, exist_ok=True)
+        
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        # Held while a result is appended; notified on every result and status change
+        self._changed: Dict[str, asyncio.Condition] = {}
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        
+        self._load_jobs()
+    
+    def _questions_path(self, job_id: str) -> Path:
+        return self.jobs_dir / f"{job_id}.questions.json"
+    
+    def _status_path(self, job_id: str) -> Path:
+        return self.jobs_dir / f"{job_id}.json"
+    
+    def results_path(self, job_id: str) -> Path:
+        """Path of a job's NDJSON results file."""
+        return self.jobs_dir / f"{job_id}.ndjson"
+    
+    def _load_jobs(self):
+        """Reload job statuses; jobs that were running when the server stopped become 'interrupted'."""
+        for path in self.jobs_dir.glob("*.json"):
+            if path.name.endswith(".questions.json"):
+                continue
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    job = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"⚠ Could not load batch job {path.name}: {str(e)}")
+                continue
+            
+            answered, failed = scan_results(str(self.results_path(job['job_id'])))
+            job.update(completed=len(answered) + failed, failed=failed)
+            if job['status'] not in FINISHED_STATUSES:
+                job['status'] = 'interrupted'
+            self._jobs[job['job_id']] = job
+        
+        if self._jobs:
+            print(f"✓ Loaded {len(self._jobs)} batch jobs")
+    
+    def _save_status(self, job: Dict[str, Any]):
+        with open(self._status_path(job['job_id']), 'w', encoding='utf-8') as f:
+            json.dump(job, f)
+    
+    async def _set_status(self, job_id: str, status: str, **fields):
+        job = self._jobs[job_id]
+        job.update(fields, status=status, updated_at=datetime.utcnow().isoformat())
+        await run_in_pool(self._save_status, dict(job))
+        async with self._condition(job_id):
+            self._condition(job_id).notify_all()
+    
+    def _condition(self, job_id: str) -> asyncio.Condition:
+        if job_id not in self._changed:
+            self._changed[job_id] = asyncio.Condition()
+        return self._changed[job_id]
+    
+    async def submit(self, questions: List[Dict[str, str]], user_id: str) -> Dict[str, Any]:
+        """
+        Store a batch of questions and start answering it.
+        
+        Args:
+            questions: Output of parse_questions
+            user_id: User submitting the job
+        
+        Returns:
+            Job status dictionary
+        
+        Raises:
+            ValueError: If the batch has too many questions or the user
+                already has max_active_per_user jobs queued or running
+        """
+        if len(questions) > self.max_questions:
+            raise ValueError(f"At most {self.max_questions} questions per batch, got {len(questions)}")
+        await self._prune_finished(user_id)
+        self._check_active_limit(user_id)
+        
+        job_id = str(uuid.uuid4())
+        now = datetime.utcnow().isoformat()
+        job = {
+            'job_id': job_id,
+            'user_id': user_id,
+            'status': 'queued',
+            'total': len(questions),
+            'completed': 0,
+            'failed': 0,
+            'error': None,
+            'created_at': now,
+            'updated_at': now
+        }
+        
+        def write():
+            with open(self._questions_path(job_id), 'w', encoding='utf-8') as f:
+                json.dump(questions, f)
+            self._save_status(job)
+        
+        # Registered before the write so concurrent submits see it in the limit
+        self._jobs[job_id] = job
+        try:
+            await run_in_pool(write)
+        except Exception:
+            del self._jobs[job_id]
+            raise
+        self._start(job_id)
+        return dict(job)
+    
+    def get_job(self, job_id: str, user_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Get status of a job (None if it does not exist or belongs to someone else)."""
+        job = self._jobs.get(job_id)
+        if job is None or (user_id is not None and job['user_id'] != user_id):
+            return None
+        return dict(job)
+    
+    def list_jobs(self, user_id: str) -> List[Dict[str, Any]]:
+        """Get a user's jobs, newest first."""
+        jobs = [dict(job) for job in self._jobs.values() if job['user_id'] == user_id]
+        return sorted(jobs, key=lambda job: job['created_at'], reverse=True)
+    
+    async def resume(self, job_id: str) -> Dict[str, Any]:
+        """
+        Restart a cancelled or interrupted job, or a completed one with failed
+        questions; answered questions are skipped, failed ones asked again.
+        
+        Raises:
+            ValueError: If the job is still running or completed without
+                failures, or its user already has max_active_per_user jobs
+                queued or running
+        """
+        job = self._jobs[job_id]
+        resumable = job['status'] in ('cancelled', 'interrupted', 'failed') or (
+            job['status'] == 'completed' and job['failed']
+        )
+        if not resumable:
+            raise ValueError(
+                f"Job is {job['status']}, only cancelled, interrupted or failed jobs "
+                f"and completed jobs with failed questions can be resumed"
+            )
+        self._check_active_limit(job['user_id'])
+        
+        await self._set_status(job_id, 'queued', error=None)
+        self._start(job_id)
+        return dict(job)
+    
+    def _check_active_limit(self, user_id: str):
+        active = sum(
+            1 for job in self._jobs.values()
+            if job['user_id'] == user_id and job['status'] not in FINISHED_STATUSES
+        )
+        if active >= self.max_active_per_user:
+            raise ValueError(
+                f"You already have {active} batch jobs running; wait for one to finish or cancel it"
+            )
+    
+    async def _prune_finished(self, user_id: str):
+        """Delete a user's oldest finished jobs beyond max_kept_per_user, files included."""
+        finished = sorted(
+            (job for job in self._jobs.values()
+             if job['user_id'] == user_id and job['status'] in FINISHED_STATUSES),
+            key=lambda job: job['created_at'],
+            reverse=True
+        )
+        expired = [job['job_id'] for job in finished[self.max_kept_per_user:]]
+        if not expired:
+            return
+        
+        for job_id in expired:
+            self._jobs.pop(job_id, None)
+            self._tasks.pop(job_id, None)
+            self._changed.pop(job_id, None)
+        
+        def delete():
+            for job_id in expired:
+                for path in (self._status_path(job_id), self._questions_path(job_id), self.results_path(job_id)):
+                    path.unlink(missing_ok=True)
+        
+        await run_in_pool(delete)
+    
+    async def cancel(self, job_id: str) -> Dict[str, Any]:
+        """Stop a job; results written so far are kept."""
+        task = self._tasks.get(job_id)
+        if task is not None and not task.done():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+            await self._set_status(job_id, 'cancelled')
+        return dict(self._jobs[job_id])
+    
+    async def shutdown(self):
+        """Stop running jobs; they can be resumed after the restart."""
+        for job_id, task in list(self._tasks.items()):
+            if not task.done():
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+                await self._set_status(job_id, 'interrupted')
+    
+    def _start(self, job_id: str):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        self._tasks[job_id] = asyncio.create_task(self._run(job_id))
+    
+    async def _run(self, job_id: str):
+        """Answer a job's remaining questions, appending each result to its file."""
+        job = self._jobs[job_id]
+        results_path = self.results_path(job_id)
+        
+        def load() -> List[Dict[str, Any]]:
+            with open(self._questions_path(job_id), 'r', encoding='utf-8') as f:
+                questions = json.load(f)
+            answered, _ = scan_results(str(results_path))
+            return [
+                {**item, 'index': index} for index, item in enumerate(questions)
+                if item['id'] not in answered
+            ]
+        
+        usage_rows: List[Dict[str, Any]] = []
+        try:
+            pending = await run_in_pool(load)
+            # Questions that failed before are in pending and counted again
+            await self._set_status(job_id, 'running', completed=job['total'] - len(pending), failed=0)
+            
+            admission_key = f"{BATCH_ADMISSION_PREFIX}{job['user_id']}"
+            with open_results(str(results_path)) as f:
+                async for result in answer_batch(self.agent, pending, self._semaphore, admission_key):
+                    job['completed'] += 1
+                    if result['error'] is not None:
+                        job['failed'] += 1
+                    if result.get('usage'):
+                        usage_rows.append(result['usage'])
+                        if len(usage_rows) >= USAGE_FLUSH_SIZE:
+                            await self._flush_usage(job, usage_rows)
+                    line = json.dumps({**result, 'completed': job['completed'], 'total': job['total']})
+                    
+                    async with self._condition(job_id):
+                        f.write(line + "\n")
+                        f.flush()
+                        self._condition(job_id).notify_all()
+            
+            await self._set_status(job_id, 'completed')
+            print(f"✓ Batch job {job_id}: {job['completed']} answered, {job['failed']} failed")
+        
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"✗ Batch job {job_id} failed: {str(e)}")
+            await self._set_status(job_id, 'failed', error=str(e))
+        finally:
+            await self._flush_usage(job, usage_rows)
+    
+    async def _flush_usage(self, job: Dict[str, Any], usage_rows: List[Dict[str, Any]]):
+        """Write buffered token usage to the database and empty the buffer."""
+        if not usage_rows:
+            return
+        rows = list(usage_rows)
+        usage_rows.clear()
+        
+        def write():
+            with get_db_context() as db:
+                db.add_all(
+                    BatchUsage(job_id=job['job_id'], user_id=job['user_id'], **usage) for usage in rows
+                )
+                db.commit()
+        
+        try:
+            await run_in_pool(write)
+        except Exception as e:
+            # Answers matter more than their accounting; keep the job going
+            print(f"⚠ Could not record batch usage for job {job['job_id']}: {str(e)}")
+    
+    async def follow(self, job_id: str, offset: int = 0, wait: bool = True) -> AsyncIterator[str]:
+        """
+        Stream a job's NDJSON result lines.
+        
+        Args:
+            job_id: Job to read
+            offset: Result lines to skip (those a client already received)
+            wait: Keep streaming new results until the job stops, instead of
+                returning what has been written so far
+        
+        Yields:
+            Result lines, newline-terminated
+        """
+        path = self.results_path(job_id)
+        position = 0
+        line_number = 0
+        
+        while True:
+            condition = self._condition(job_id)
+            async with condition:
+                lines, position = _read_new_lines(path, position)
+                if not lines:
+                    job = self._jobs.get(job_id)
+                    if not wait or job is None or job['status'] in FINISHED_STATUSES:
+                        return
+                    await condition.wait()
+                    continue
+            
+            for line in lines:
+                line_number += 1
+                if line_number > offset:
+                    yield line
+
+
+def _read_new_lines(path: Path, position: int) -> Tuple[List[str], int]:
+    """Complete lines appended to a file since a byte position, and the new position."""
+    if not path.exists():
+        return [], position
+    
+    with open(path, 'rb') as f:
+        f.seek(position)
+        data = f.read()
+    
+    end = data.rfind(b"\n") + 1
+    if end == 0:
+        return [], position
+    return [line.decode('utf-8') + "\n" for line in data[:end].splitlines()], position + end
+
+
+async def run_batch_file(agent, questions: List[Dict[str, str]], output: str, concurrency: int) -> Dict[str, int]:
+    """
+    Answer questions into an NDJSON file, skipping those already in it.
+    
+    Args:
+        agent: TaxReformAgent used to answer
+        questions: Output of parse_questions
+        output: NDJSON results file (appended to)
+        concurrency: Questions answered at once
+    
+    Returns:
+        Counts of answered, failed and skipped questions
+    """
+    answered, _ = scan_results(output)
+    pending = [
+        {**item, 'index': index} for index, item in enumerate(questions)
+        if item['id'] not in answered
+    ]
+    counts = {'answered': 0, 'failed': 0, 'skipped': len(questions) - len(pending)}
+    done = counts['skipped']
+    
+    with open_results(output) as f:
+        async for result in answer_batch(agent, pending, asyncio.Semaphore(concurrency)):
+            done += 1
+            counts['failed' if result['error'] else 'answered'] += 1
+            # Written as we go so an interrupted run resumes where it stopped
+            f.write(json.dumps({**result, 'completed': done, 'total': len(questions)}) + "\n")
+            f.flush()
+            print(f"{'✗' if result['error'] else '✓'} [{done}/{len(questions)}] {result['id']}")
+    
+    return counts
+
+
+if __name__ == "__main__":
+    import argparse
+    from dotenv import load_dotenv
+    
+    load_dotenv()
+    
+    parser = argparse.ArgumentParser(description="Answer a file of questions into an NDJSON results file")
+    parser.add_argument("questions", help="CSV file (question and optional id columns) or JSON array")
+    parser.add_argument("--output", required=True, help="NDJSON results file; existing answers are kept")
+    parser.add_argument("--column", default=None, help="Question column in the CSV header")
+    parser.add_argument("--concurrency", type=int, default=4, help="Maximum LLM calls in flight")
+    args = parser.parse_args()
+    
+    from app.rag.vectorstore import TaxBillVectorStore
+    from app.agents.tax_agent import TaxReformAgent
+    from app.utils.admission import LLMAdmissionController
+    
+    with open(args.questions, 'rb') as f:
+        content = f.read()
+    questions = parse_questions(
+        content,
+        "application/json" if args.questions.lower().endswith(".json") else "text/csv",
+        args.column
+    )
+    
+    vectorstore = TaxBillVectorStore(
+        persist_directory=os.getenv("CHROMA_PERSIST_DIRECTORY", "./chroma_db")
+    )
+    artifact_path = os.getenv("INDEX_ARTIFACT_PATH", "./index/tax_bills.idx")
+    if Path(artifact_path).exists():
+        vectorstore.load_artifact(artifact_path)
+    vectorstore.initialize_vectorstore()
+    
+    # The semaphore already bounds LLM calls, so never queue behind the cap
+    admission = LLMAdmissionController(max_concurrency=args.concurrency)
+    agent = TaxReformAgent(vectorstore, admission=admission)
+    
+    started = time.perf_counter()
+    print(f"Answering {len(questions)} questions into {args.output}...")
+    counts = asyncio.run(run_batch_file(agent, questions, args.output, args.concurrency))
+    
+    print(f"\n✓ Answered {counts['answered']}, failed {counts['failed']}, skipped {counts['skipped']} "
+          f"in {time.perf_counter() - started:.1f}s")
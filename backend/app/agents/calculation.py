@@ -0,0 +1,285 @@
+"""
+Deterministic fast path for income tax calculation questions.
+"""
+import os
+import re
+import json
+from typing import List, Dict, Any, Optional
+
+from langchain_core.messages import HumanMessage, SystemMessage
+
+from app.agents.tools import TaxCalculatorTool
+from app.agents.tax_engine import CURRENT_TABLE, REFORM_TABLE
+
+# An amount with optional naira prefix and magnitude suffix:
+# "₦2.4 million", "N250,000", "NGN 500k", "2.4m naira"
+AMOUNT_PATTERN = re.compile(
+    r"(?P<currency>₦|\bngn\s?|\bn(?=\d))?"
+    r"(?P<number>\d{1,3}(?:,\d{3})+(?:\.\d+)?|\d+(?:\.\d+)?)(?![.,]?\d)"
+    r"\s?(?P<suffix>k|m|mn|bn|b|thousand|million|billion)?\b"
+    r"(?!\s?%)"
+)
+
+MULTIPLIERS = {
+    'k': 1e3, 'thousand': 1e3,
+    'm': 1e6, 'mn': 1e6, 'million': 1e6,
+    'b': 1e9, 'bn': 1e9, 'billion': 1e9
+}
+
+MONTHLY_PATTERN = re.compile(r"\b(monthly|per month|a month|every month|each month|/\s?month|p\.?m\.?)\b|/month")
+WEEKLY_PATTERN = re.compile(r"\b(weekly|per week|a week|every week|each week|p\.?w\.?)\b|/\s?week")
+
+# Daily and hourly pay only give a yearly income with the days and hours
+# worked, so these questions are answered from the bills instead
+UNSUPPORTED_PERIOD_PATTERN = re.compile(
+    r"\b(daily|per day|a day|every day|each day|hourly|per hour|an hour|every hour|each hour)\b|/\s?(day|hour|hr)\b"
+)
+
+# A number followed by one of these is a count ("12 months"), not an amount
+TIME_UNIT_AFTER = re.compile(r"\s?(months?|years?|yrs?|weeks?|days?|hours?|hrs?)\b")
+
+# Asking for a figure, as opposed to asking about rules
+CALCULATION_INTENT = re.compile(
+    r"\b(how much|calculate|compute|work out|estimate|what will i pay|what would i pay|"
+    r"what is my tax|what's my tax|tax on|tax for|my tax|i go pay|i pay)\b"
+)
+
+# The amount is personal income: one of these words within a few words of it
+INCOME_CONTEXT = re.compile(
+    r"\b(salary|salaries|earn|earns|earning|earnings|income|paye|paid|wage|wages|make|makes|take home)\b"
+)
+INCOME_CONTEXT_WORDS = 4
+
+# Company, turnover and other non-PAYE taxes are answered from the bills
+NOT_PERSONAL_INCOME = re.compile(
+    r"\b(compan(y|ies)|business(es)?|firms?|corporate|corporations?|cit|turnover|profits?|"
+    r"vat|capital gains?|withholding|levy)\b"
+)
+
+# An amount after these is a band threshold in a question about the rules
+# ("will tax on income above ₦25 million be 25%?"), not the asker's income
+THRESHOLD_BEFORE_AMOUNT = re.compile(
+    r"\b(above|over|below|under|exceeding|beyond|more than|less than|up to|threshold|band|bracket)\s*$"
+)
+
+# Readable names of the bracket tables
+TABLE_NAMES = {
+    'pita-2011': 'current law (PITA 2011)',
+    'ntb-2024': 'Nigeria Tax Bill 2024'
+}
+
+CALCULATION_PROMPT = """You explain income tax estimates to everyday Nigerians in simple, friendly words.
+The figures below were computed exactly; use them as given and do not redo the arithmetic.
+The figures use the Nigeria Tax Bill 2024 bands; current_law holds the tax under today's law for comparison.
+Explain what the person would pay under the reform, the effective rate, how it compares with today, and that the estimate ignores reliefs and allowances. Keep it under 150 words."""
+
+
+def parse_amount(text: str) -> Optional[float]:
+    """
+    Extract a naira amount from text.
+    
+    Args:
+        text: Question text
+    
+    Returns:
+        Amount in naira, or None if no amount is found
+    """
+    found = _find_amount(text.lower())
+    return found[0] if found else None
+
+
+def _find_amount(text: str) -> Optional[tuple]:
+    """First naira amount in lowercased text, as (amount, start, end)."""
+    for match in AMOUNT_PATTERN.finditer(text):
+        number = float(match.group('number').replace(',', ''))
+        suffix = match.group('suffix')
+        currency = match.group('currency')
+        
+        # A bare four-digit number like 2024 or 2026 is a year, not an amount
+        if not suffix and not currency and 1900 <= number <= 2100 and '.' not in match.group('number'):
+            continue
+        if not suffix and not currency and TIME_UNIT_AFTER.match(text, match.end()):
+            continue
+        
+        amount = number * MULTIPLIERS.get(suffix, 1)
+        if amount > 0:
+            return amount, match.start(), match.end()
+    
+    return None
+
+
+def detect_calculation(question: str) -> Optional[Dict[str, Any]]:
+    """
+    Detect an income tax calculation request.
+    
+    The question must ask for a figure, name an amount with a personal
+    income word next to it (salary, earn, income, ...) and not be about
+    company taxes or a band threshold. Amounts per day or hour, or over a
+    stated number of months or years, have no clear annual income and are
+    not treated as calculations.
+    
+    Args:
+        question: User's question
+    
+    Returns:
+        Dictionary with amount, period ('monthly', 'weekly' or 'annual')
+        and annual_income, or None if this is not a calculation request
+    """
+    text = question.lower()
+    if 'tax' not in text and 'paye' not in text:
+        return None
+    if not CALCULATION_INTENT.search(text) or NOT_PERSONAL_INCOME.search(text):
+        return None
+    
+    found = _find_amount(text)
+    if found is None:
+        return None
+    amount, start, end = found
+    
+    before = text[:start]
+    if THRESHOLD_BEFORE_AMOUNT.search(before.replace('₦', '').rstrip()):
+        return None
+    nearby = before.split()[-INCOME_CONTEXT_WORDS:] + text[end:].split()[:INCOME_CONTEXT_WORDS]
+    if not INCOME_CONTEXT.search(" ".join(nearby)):
+        return None
+    
+    if UNSUPPORTED_PERIOD_PATTERN.search(text):
+        return None
+    # "12 months of salary of 200k": per month or in total is unclear
+    if any(TIME_UNIT_AFTER.match(text, count.end()) for count in re.finditer(r"\d+(?:\.\d+)?", text)):
+        return None
+    
+    if MONTHLY_PATTERN.search(text):
+        period, per_year = 'monthly', 12
+    elif WEEKLY_PATTERN.search(text):
+        period, per_year = 'weekly', 52
+    else:
+        period, per_year = 'annual', 1
+    
+    return {
+        'kind': 'income_tax',
+        'amount': amount,
+        'period': period,
+        'annual_income': amount * per_year
+    }
+
+
+def format_naira(amount: float) -> str:
+    """Format an amount as naira, e.g. ₦2,400,000."""
+    return f"₦{amount:,.0f}" if amount == int(amount) else f"₦{amount:,.2f}"
+
+
+class CalculationResponder:
+    """
+    Answer income tax calculation questions from locally computed figures.
+    
+    Figures use the reform's bands (REFORM_TABLE), with the tax under the
+    current law alongside for comparison. In 'template' mode the answer is
+    rendered without calling the LLM. In 'llm' mode a short prompt with the
+    precomputed figures replaces the retrieval prompt, so the model only has
+    to explain them.
+    """
+    
+    def __init__(self, mode: str = None):
+        """
+        Initialize responder.
+        
+        Args:
+            mode: 'template' or 'llm' (CALCULATION_ANSWER_MODE, default 'template')
+        """
+        self.mode = mode or os.getenv("CALCULATION_ANSWER_MODE", "template")
+        self.calculator = TaxCalculatorTool()
+    
+    def calculate(self, calculation: Dict[str, Any]) -> Dict[str, Any]:
+        """Run the income tax estimate for a detected calculation under the reform and the current law."""
+        result = self.calculator.estimate_income_tax(calculation['annual_income'], REFORM_TABLE)
+        result['monthly_tax'] = round(result['estimated_tax'] / 12, 2)
+        
+        current = self.calculator.estimate_income_tax(calculation['annual_income'], CURRENT_TABLE)
+        result['current_law'] = {
+            'table_version': CURRENT_TABLE,
+            'estimated_tax': current['estimated_tax'],
+            'effective_rate': current['effective_rate']
+        }
+        return result
+    
+    def render(self, calculation: Dict[str, Any], result: Dict[str, Any]) -> str:
+        """
+        Render a templated answer.
+        
+        Args:
+            calculation: Detected calculation (see detect_calculation)
+            result: Output of calculate
+        
+        Returns:
+            Answer text
+        """
+        regime = TABLE_NAMES.get(result['table_version'], result['table_version'])
+        lines = []
+        if calculation['period'] != 'annual':
+            lines.append(
+                f"On a {calculation['period']} income of {format_naira(calculation['amount'])} "
+                f"({format_naira(result['annual_income'])} a year), your estimated income tax under the "
+                f"{regime} is **{format_naira(result['estimated_tax'])} a year**, about "
+                f"**{format_naira(result['monthly_tax'])} a month**."
+            )
+        else:
+            lines.append(
+                f"On an annual income of {format_naira(result['annual_income'])}, your estimated "
+                f"income tax under the {regime} is **{format_naira(result['estimated_tax'])} a year**, about "
+                f"**{format_naira(result['monthly_tax'])} a month**."
+            )
+        
+        lines.append(f"\nThat is an effective rate of {result['effective_rate']}% of your income.")
+        lines.append("\nHow it adds up:")
+        
+        lower = 0.0
+        for band in result['breakdown']:
+            upper = lower + band['taxable']
+            lines.append(
+                f"- {format_naira(lower)} to {format_naira(upper)} at {band['rate'] * 100:g}%: "
+                f"{format_naira(band['tax'])}"
+            )
+            lower = upper
+        
+        current = result.get('current_law')
+        if current is not None:
+            change = result['estimated_tax'] - current['estimated_tax']
+            if abs(change) < 1:
+                comparison = "the same as"
+            elif change < 0:
+                comparison = f"{format_naira(-change)} a year less than"
+            else:
+                comparison = f"{format_naira(change)} a year more than"
+            lines.append(
+                f"\nThat is {comparison} under the "
+                f"{TABLE_NAMES.get(current['table_version'], current['table_version'])}, "
+                f"where the same income is taxed {format_naira(current['estimated_tax'])} a year "
+                f"({current['effective_rate']}%)."
+            )
+        
+        lines.append(f"\nNote: {result['note']}")
+        
+        return "\n".join(lines)
+    
+    def build_messages(self, question: str, calculation: Dict[str, Any], result: Dict[str, Any]) -> List[Any]:
+        """
+        Build the short LLM prompt that explains precomputed figures.
+        
+        Args:
+            question: User's question
+            calculation: Detected calculation (see detect_calculation)
+            result: Output of calculate
+        
+        Returns:
+            Prompt messages
+        """
+        figures = {
+            'income_stated': calculation['amount'],
+            'income_period': calculation['period'],
+            **result
+        }
+        return [
+            SystemMessage(content=CALCULATION_PROMPT),
+            HumanMessage(content=f"Question: {question}\n\nFigures:\n{json.dumps(figures, indent=2)}")
+        ]
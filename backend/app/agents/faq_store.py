@@ -0,0 +1,313 @@
+"""
+Pre-generated answers for suggested questions and curated FAQs.
+
+Related-question suggestions are fixed strings that users click all the
+time. Their answers are generated offline, once per corpus version, and the
+chat path serves exact matches from this store instead of calling the LLM:
+
+    python -m app.agents.faq_store --concurrency 4
+"""
+import os
+import re
+import json
+import time
+import asyncio
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+
+# Follow-up suggestions shown after an answer, by topic of the question
+RELATED_QUESTIONS: Dict[str, List[str]] = {
+    'casual': [
+        "What are the Nigerian Tax Reform Bills about?",
+        "When do the new tax laws take effect?",
+        "How will the reforms affect me?"
+    ],
+    'vat': [
+        "How does the new VAT derivation formula work?",
+        "Which states benefit most from VAT reforms?",
+        "What is the current VAT rate?"
+    ],
+    'income': [
+        "What are the new income tax brackets?",
+        "How do I calculate my income tax?",
+        "Are there any tax reliefs available?"
+    ],
+    'business': [
+        "What exemptions exist for small businesses?",
+        "How will this affect my small business?",
+        "What is the turnover threshold for exemptions?"
+    ],
+    'general': [
+        "What are the main changes in the tax reform?",
+        "When does implementation begin?",
+        "How can I prepare for the changes?"
+    ]
+}
+
+# Frequently asked questions answered ahead of time alongside the suggestions
+CURATED_FAQS: List[str] = [
+    "Will the tax reform increase VAT to 10%?",
+    "Do I need to pay tax if I earn minimum wage?",
+    "What is the Nigeria Revenue Service?",
+    "What does the Joint Revenue Board do?",
+    "Will the reforms abolish any existing taxes?",
+    "What is the Tax Ombud?"
+]
+
+DEFAULT_FAQ_STORE_PATH = "./cache/faq_answers.json"
+
+
+def normalize_question(question: str) -> str:
+    """Normalize a question for exact matching (case, spacing, end punctuation)."""
+    return re.sub(r"\s+", " ", question.lower()).strip().rstrip("?.! ")
+
+
+def get_canned_questions() -> List[str]:
+    """Get every suggested question and curated FAQ, without duplicates."""
+    questions = []
+    for group in RELATED_QUESTIONS.values():
+        questions.extend(group)
+    questions.extend(CURATED_FAQS)
+    return list(dict.fromkeys(questions))
+
+
+class FAQStore:
+    """
+    JSON file of pre-generated answers for one corpus version.
+    
+    Answers are only served while the vector store is at the corpus version
+    they were generated for. The file is re-read when it changes on disk, so
+    a running server picks up a new batch without a restart.
+    """
+    
+    def __init__(self, path: str = DEFAULT_FAQ_STORE_PATH, reload_interval: float = 30.0):
+        """
+        Initialize store.
+        
+        Args:
+            path: JSON file holding the answers
+            reload_interval: Minimum seconds between checks for a newer file
+        """
+        self.path = Path(path)
+        self.reload_interval = reload_interval
+        
+        self.corpus_version: Optional[str] = None
+        self._answers: Dict[str, Dict[str, Any]] = {}
+        self._mtime: Optional[float] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        
+        self.hits = 0
+        self.misses = 0
+        
+        self._reload_if_changed(force=True)
+    
+    def get(self, question: str, corpus_version: Optional[str]) -> Optional[Dict[str, Any]]:
+        """
+        Get the pre-generated answer for a question.
+        
+        Args:
+            question: User's question
+            corpus_version: Current corpus version of the vector store
+        
+        Returns:
+            Entry with question, answer and sources, or None
+        """
+        self._reload_if_changed()
+        
+        with self._lock:
+            entry = None
+            if corpus_version == self.corpus_version:
+                entry = self._answers.get(normalize_question(question))
+            
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return entry
+    
+    def put(self, corpus_version: str, question: str, answer: str, sources: List[Dict[str, Any]]):
+        """
+        Add an answer, dropping answers from other corpus versions.
+        
+        Args:
+            corpus_version: Corpus version the answer was generated against
+            question: The question
+            answer: Generated answer
+            sources: Source references returned with the answer
+        """
+        with self._lock:
+            if corpus_version != self.corpus_version:
+                self._answers = {}
+                self.corpus_version = corpus_version
+            
+            self._answers[normalize_question(question)] = {
+                'question': question,
+                'answer': answer,
+                'sources': sources,
+                'generated_at': datetime.utcnow().isoformat()
+            }
+    
+    def has(self, question: str, corpus_version: str) -> bool:
+        """Check whether a question is already answered for a corpus version."""
+        with self._lock:
+            return corpus_version == self.corpus_version and normalize_question(question) in self._answers
+    
+    def save(self):
+        """Write the store to disk."""
+        with self._lock:
+            payload = json.dumps(
+                {'corpus_version': self.corpus_version, 'answers': self._answers},
+                ensure_ascii=False,
+                indent=2
+            )
+        
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(payload)
+        os.replace(tmp_path, self.path)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get store statistics."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'answers': len(self._answers),
+                'corpus_version': self.corpus_version,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0
+            }
+    
+    def _reload_if_changed(self, force: bool = False):
+        now = time.monotonic()
+        if not force and now - self._checked_at < self.reload_interval:
+            return
+        self._checked_at = now
+        
+        try:
+            mtime = self.path.stat().st_mtime
+        except FileNotFoundError:
+            return
+        
+        if mtime == self._mtime:
+            return
+        
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠ Could not load FAQ answers from {self.path}: {str(e)}")
+            return
+        
+        with self._lock:
+            self.corpus_version = data.get('corpus_version')
+            self._answers = data.get('answers', {})
+            self._mtime = mtime
+        
+        print(f"✓ Loaded {len(self._answers)} pre-generated FAQ answers")
+
+
+def create_faq_store() -> FAQStore:
+    """Create the FAQ store at FAQ_STORE_PATH."""
+    return FAQStore(os.getenv("FAQ_STORE_PATH", DEFAULT_FAQ_STORE_PATH))
+
+
+async def pregenerate_answers(
+    agent,
+    store: FAQStore,
+    questions: List[str],
+    concurrency: int = 4,
+    force: bool = False
+) -> Dict[str, int]:
+    """
+    Generate and store answers for a list of questions.
+    
+    Args:
+        agent: TaxReformAgent used to answer
+        store: Store to write answers to
+        questions: Questions to answer
+        concurrency: Maximum LLM calls in flight
+        force: Regenerate answers that already exist for this corpus version
+    
+    Returns:
+        Counts of generated, skipped and failed questions
+    """
+    corpus_version = agent.vectorstore.corpus_version
+    semaphore = asyncio.Semaphore(concurrency)
+    counts = {'generated': 0, 'skipped': 0, 'failed': 0}
+    
+    async def answer(question: str):
+        if not force and store.has(question, corpus_version):
+            counts['skipped'] += 1
+            return
+        
+        async with semaphore:
+            try:
+                result = await agent.aprocess_query(
+                    question, deadline_seconds=agent.offline_deadline_seconds
+                )
+            except Exception as e:
+                print(f"✗ {question}: {str(e)}")
+                counts['failed'] += 1
+                return
+        
+        # The excerpts stand in for a model answer; storing them would serve
+        # them to every later user, so leave the question for the next run
+        if result.get('fallback'):
+            print(f"✗ {question}: model unavailable, not stored")
+            counts['failed'] += 1
+            return
+        
+        store.put(corpus_version, question, result['answer'], result['sources'])
+        # Save as we go so an interrupted run resumes where it stopped
+        store.save()
+        counts['generated'] += 1
+        print(f"✓ {question}")
+    
+    await asyncio.gather(*(answer(question) for question in questions))
+    return counts
+
+
+if __name__ == "__main__":
+    import argparse
+    from dotenv import load_dotenv
+    
+    load_dotenv()
+    
+    parser = argparse.ArgumentParser(description="Pre-generate answers for suggested questions and FAQs")
+    parser.add_argument("--output", default=os.getenv("FAQ_STORE_PATH", DEFAULT_FAQ_STORE_PATH))
+    parser.add_argument("--concurrency", type=int, default=4, help="Maximum LLM calls in flight")
+    parser.add_argument("--force", action="store_true", help="Regenerate existing answers")
+    args = parser.parse_args()
+    
+    from app.rag.vectorstore import TaxBillVectorStore
+    from app.agents.tax_agent import TaxReformAgent
+    from app.utils.admission import LLMAdmissionController
+    
+    vectorstore = TaxBillVectorStore(
+        persist_directory=os.getenv("CHROMA_PERSIST_DIRECTORY", "./chroma_db")
+    )
+    artifact_path = os.getenv("INDEX_ARTIFACT_PATH", "./index/tax_bills.idx")
+    if Path(artifact_path).exists():
+        vectorstore.load_artifact(artifact_path)
+    vectorstore.initialize_vectorstore()
+    
+    faq_store = FAQStore(args.output)
+    # The semaphore already bounds LLM calls, so never queue behind the cap
+    admission = LLMAdmissionController(max_concurrency=args.concurrency)
+    agent = TaxReformAgent(vectorstore, faq_store=faq_store, admission=admission)
+    # Answer from retrieval and the LLM, not from the stores being rebuilt
+    agent.faq_store = None
+    agent.answer_cache = None
+    
+    questions = get_canned_questions()
+    print(f"Pre-generating {len(questions)} answers for corpus version {vectorstore.corpus_version}...")
+    counts = asyncio.run(pregenerate_answers(agent, faq_store, questions, args.concurrency, args.force))
+    faq_store.save()
+    
+    print(f"\n✓ Generated {counts['generated']}, skipped {counts['skipped']}, failed {counts['failed']}")
+    print(f"  Saved to {args.output}")
@@ -0,0 +1,250 @@
+"""
+Conversation memory stores for the tax reform agent.
+"""
+import os
+import time
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+from langchain_core.messages import HumanMessage, AIMessage
+
+from app.config.database import get_db_context
+from app.models.database import Conversation, Message
+
+
+def load_conversation_memory(
+    conversation_id: str,
+    limit: int,
+    message_count: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Load the running summary and last messages of a conversation from the database.
+    
+    Args:
+        conversation_id: Conversation ID
+        limit: Maximum number of messages to load
+        message_count: Only consider the first message_count messages, so a
+            question saved before it is answered is not part of its own history
+    
+    Returns:
+        Dictionary with 'messages' (LangChain messages, oldest first) and
+        'summary' ({'text', 'summarized_count'} for older turns, or None)
+    """
+    with get_db_context() as db:
+        conversation = db.query(Conversation).filter(
+            Conversation.id == conversation_id
+        ).first()
+        summary = None
+        if conversation is not None and conversation.summary:
+            summary = {
+                'text': conversation.summary,
+                'summarized_count': conversation.summarized_count or 0
+            }
+        
+        query = db.query(Message).filter(
+            Message.conversation_id == conversation_id
+        )
+        
+        if message_count is None:
+            rows = list(reversed(query.order_by(Message.created_at.desc()).limit(limit).all()))
+        else:
+            rows = query.order_by(Message.created_at).offset(
+                max(0, message_count - limit)
+            ).limit(min(limit, message_count)).all()
+    
+    messages = []
+    for row in rows:
+        if row.role == "user":
+            messages.append(HumanMessage(content=row.content))
+        else:
+            messages.append(AIMessage(content=row.content))
+    
+    return {'messages': messages, 'summary': summary}
+
+
+class ConversationMemoryStore(ABC):
+    """
+    Interface for conversation memory.
+    
+    Implementations must define every abstract method (an incomplete store
+    cannot be created) and be thread safe: history is read from the worker pool
+    and written from request handlers.
+    """
+    
+    @abstractmethod
+    def get_history(self, conversation_id: str, message_count: Optional[int] = None) -> List[Any]:
+        """
+        Get recent history for a conversation.
+        
+        Args:
+            conversation_id: Conversation ID
+            message_count: Number of messages the database holds for the
+                conversation, if known. A cached entry that disagrees is stale
+                (another worker answered in between) and is reloaded.
+        
+        Returns:
+            LangChain messages, oldest first
+        """
+    
+    @abstractmethod
+    def get_summary(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the running summary of older turns.
+        
+        Returns:
+            Dictionary with 'text' and 'summarized_count' (number of leading
+            messages folded into the summary), or None
+        """
+    
+    @abstractmethod
+    def set_summary(self, conversation_id: str, text: str, summarized_count: int):
+        """Replace the running summary of a conversation."""
+    
+    @abstractmethod
+    def append(self, conversation_id: str, question: str, answer: str):
+        """Record a question/answer turn."""
+    
+    @abstractmethod
+    def clear(self, conversation_id: str):
+        """Forget a conversation."""
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get store statistics."""
+        return {}
+
+
+class LRUConversationMemory(ConversationMemoryStore):
+    """
+    In-process memory with LRU and TTL eviction, hydrated from the database.
+    
+    Memory is bounded by max_conversations x max_messages. On a cache miss the
+    last max_messages are loaded through the loader, so any worker can serve
+    any conversation and nothing is lost when entries are evicted.
+    """
+    
+    def __init__(
+        self,
+        max_conversations: int = None,
+        max_messages: int = None,
+        ttl_seconds: float = None,
+        loader: Optional[Callable[..., Dict[str, Any]]] = load_conversation_memory
+    ):
+        """
+        Initialize memory store.
+        
+        Args:
+            max_conversations: Maximum conversations kept in memory
+            max_messages: Maximum messages kept per conversation
+            ttl_seconds: Seconds an idle conversation stays cached
+            loader: Function (conversation_id, limit, message_count) ->
+                {'messages', 'summary'} used on a cache miss, or None to
+                disable hydration
+        """
+        self.max_conversations = max_conversations or int(os.getenv("MEMORY_MAX_CONVERSATIONS", "1000"))
+        self.max_messages = max_messages or int(os.getenv("MEMORY_MAX_MESSAGES", "20"))
+        self.ttl_seconds = ttl_seconds or float(os.getenv("MEMORY_TTL_SECONDS", "1800"))
+        self.loader = loader
+        
+        # conversation_id -> {'messages', 'summary', 'message_count', 'touched_at'}
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def get_history(self, conversation_id: str, message_count: Optional[int] = None) -> List[Any]:
+        if not conversation_id:
+            return []
+        
+        now = time.monotonic()
+        
+        with self._lock:
+            entry = self._entries.get(conversation_id)
+            
+            if entry is not None and now - entry['touched_at'] > self.ttl_seconds:
+                del self._entries[conversation_id]
+                self.evictions += 1
+                entry = None
+            
+            if entry is not None and (message_count is None or entry['message_count'] == message_count):
+                entry['touched_at'] = now
+                self._entries.move_to_end(conversation_id)
+                self.hits += 1
+                return list(entry['messages'])
+            
+            self.misses += 1
+        
+        # Load outside the lock so a slow query doesn't stall other conversations
+        if self.loader is not None:
+            loaded = self.loader(conversation_id, self.max_messages, message_count)
+        else:
+            loaded = {'messages': [], 'summary': None}
+        messages = loaded['messages']
+        
+        with self._lock:
+            self._store(conversation_id, {
+                'messages': messages[-self.max_messages:],
+                'summary': loaded['summary'],
+                'message_count': message_count if message_count is not None else len(messages),
+                'touched_at': now
+            })
+        
+        return list(messages)
+    
+    def append(self, conversation_id: str, question: str, answer: str):
+        if not conversation_id:
+            return
+        
+        with self._lock:
+            entry = self._entries.get(conversation_id)
+            if entry is None:
+                # Evicted mid-request; the next lookup hydrates from the database
+                return
+            
+            messages = entry['messages'] + [HumanMessage(content=question), AIMessage(content=answer)]
+            
+            self._store(conversation_id, {
+                'messages': messages[-self.max_messages:],
+                'summary': entry['summary'],
+                'message_count': entry['message_count'] + 2,
+                'touched_at': time.monotonic()
+            })
+    
+    def get_summary(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(conversation_id)
+            return dict(entry['summary']) if entry and entry['summary'] else None
+    
+    def set_summary(self, conversation_id: str, text: str, summarized_count: int):
+        with self._lock:
+            entry = self._entries.get(conversation_id)
+            if entry is not None:
+                entry['summary'] = {'text': text, 'summarized_count': summarized_count}
+    
+    def clear(self, conversation_id: str):
+        with self._lock:
+            self._entries.pop(conversation_id, None)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'conversations': len(self._entries),
+                'max_conversations': self.max_conversations,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+                'evictions': self.evictions
+            }
+    
+    def _store(self, conversation_id: str, entry: Dict[str, Any]):
+        """Insert an entry and evict the least recently used ones (lock held)."""
+        self._entries[conversation_id] = entry
+        self._entries.move_to_end(conversation_id)
+        
+        while len(self._entries) > self.max_conversations:
+            self._entries.popitem(last=False)
+            self.evictions += 1
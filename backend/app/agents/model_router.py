@@ -0,0 +1,366 @@
+"""
+Model-tier routing: simple questions go to a small fast model, the rest to
+the main chat model.
+
+Every decision is logged as a JSONL line of its signals (buffered, written
+from the worker pool and rotated by size), so a new tier configuration can
+be replayed against real traffic before it is deployed:
+
+    python -m app.agents.model_router --log ./cache/model_routing.jsonl --tiers tiers.json
+"""
+import os
+import json
+import time
+import threading
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from langchain_openai import ChatOpenAI
+
+from app.utils.concurrency import get_executor
+from app.utils.tokens import get_chat_model_name
+
+DEFAULT_ROUTING_LOG_PATH = "./cache/model_routing.jsonl"
+
+# Decisions buffered in memory before they are written out
+ROUTING_LOG_FLUSH_SIZE = 64
+
+# Rotated logs kept next to the current one (model_routing.jsonl.1 is the newest)
+ROUTING_LOG_BACKUPS = 3
+
+
+def default_tiers() -> List[Dict[str, Any]]:
+    """
+    Default tier configuration, cheapest first.
+    
+    A tier is chosen when every condition in its 'when' block holds; the
+    last tier has no conditions and catches everything else. Conditions:
+    max_question_words, max_history_messages, max_bills (distinct bills in
+    the excerpts), min_top_score and max_score_spread (retrieval
+    similarities), topics (classifier topics, null for none) and
+    misconception (allowed or not).
+    """
+    return [
+        {
+            'name': 'fast',
+            'model': os.getenv("FAST_MODEL", "gpt-4o-mini"),
+            'input_cost_per_1k': 0.00015,
+            'output_cost_per_1k': 0.0006,
+            'when': {
+                'max_question_words': 20,
+                'max_history_messages': 4,
+                'max_bills': 1,
+                # The retriever's relevance floor (AdvancedRetriever.min_score)
+                'min_top_score': 0.5,
+                'max_score_spread': 0.2,
+                'misconception': False
+            }
+        },
+        {
+            'name': 'strong',
+            'model': get_chat_model_name(),
+            'input_cost_per_1k': 0.01,
+            'output_cost_per_1k': 0.03,
+            'when': {}
+        }
+    ]
+
+
+def load_tiers(path: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Load the tier configuration from a JSON file, or the defaults.
+    
+    Args:
+        path: JSON list of tiers (MODEL_TIERS_PATH); None or missing uses
+            default_tiers()
+    
+    Raises:
+        ValueError: If the configuration is empty or a tier lacks a name or model
+    """
+    path = path or os.getenv("MODEL_TIERS_PATH")
+    if not path or not Path(path).exists():
+        return default_tiers()
+    
+    with open(path, 'r', encoding='utf-8') as f:
+        tiers = json.load(f)
+    
+    if not tiers or any('name' not in tier or 'model' not in tier for tier in tiers):
+        raise ValueError(f"{path}: every tier needs a 'name' and a 'model'")
+    return tiers
+
+
+def extract_signals(
+    question: str,
+    classification: Dict[str, Any],
+    retrieval_result: Dict[str, Any],
+    history_messages: int,
+    misconception: Optional[bool] = None
+) -> Dict[str, Any]:
+    """
+    Cheap local signals describing how hard a question is.
+    
+    Args:
+        question: User's question
+        classification: Result of QueryClassifier.classify
+        retrieval_result: Result of retrieve_and_rank (may lack sources)
+        history_messages: Messages of conversation history in the prompt
+        misconception: Whether a misconception was detected by keyword or
+            by the query embedding (defaults to the classification's
+            keyword match)
+    
+    Returns:
+        Dictionary of signals (JSON-serializable)
+    """
+    if misconception is None:
+        misconception = bool(classification.get('misconception'))
+    scores = [source['similarity_score'] for source in retrieval_result.get('sources') or []]
+    bills = {doc.metadata.get('bill_name') for doc in retrieval_result.get('documents') or []}
+    
+    return {
+        'question_words': len(question.split()),
+        'topic': classification.get('topic'),
+        'misconception': misconception,
+        'history_messages': history_messages,
+        'bills': len(bills),
+        'top_score': max(scores) if scores else None,
+        'score_spread': round(max(scores) - min(scores), 3) if scores else None
+    }
+
+
+def matches(conditions: Dict[str, Any], signals: Dict[str, Any]) -> bool:
+    """Whether signals satisfy every condition of a tier (score conditions only apply after retrieval)."""
+    if signals['question_words'] > conditions.get('max_question_words', float('inf')):
+        return False
+    if signals['history_messages'] > conditions.get('max_history_messages', float('inf')):
+        return False
+    if signals['bills'] > conditions.get('max_bills', float('inf')):
+        return False
+    if 'topics' in conditions and signals['topic'] not in conditions['topics']:
+        return False
+    if conditions.get('misconception', True) is False and signals['misconception']:
+        return False
+    if signals['top_score'] is not None:
+        if signals['top_score'] < conditions.get('min_top_score', 0):
+            return False
+        if signals['score_spread'] > conditions.get('max_score_spread', float('inf')):
+            return False
+    return True
+
+
+def choose_tier(tiers: List[Dict[str, Any]], signals: Dict[str, Any]) -> str:
+    """Name of the first tier whose conditions hold (the last tier otherwise)."""
+    for tier in tiers:
+        if matches(tier.get('when', {}), signals):
+            return tier['name']
+    return tiers[-1]['name']
+
+
+class ModelRouter:
+    """
+    Pick a chat model per question and account for what each tier costs.
+    """
+    
+    def __init__(
+        self,
+        tiers: Optional[List[Dict[str, Any]]] = None,
+        default_llm: Optional[Any] = None,
+        log_path: Optional[str] = None,
+        log_max_bytes: Optional[int] = None
+    ):
+        """
+        Initialize router.
+        
+        Args:
+            tiers: Tier configuration (defaults to load_tiers())
+            default_llm: Chat model to use for every tier instead of
+                creating one per tier (stubs, single-model deployments)
+            log_path: JSONL decision log (MODEL_ROUTING_LOG, default
+                ./cache/model_routing.jsonl; empty disables it)
+            log_max_bytes: Size at which the log is rotated
+                (MODEL_ROUTING_LOG_MAX_BYTES, default 10 MB)
+        """
+        self.tiers = tiers or load_tiers()
+        self.default_llm = default_llm
+        self.log_path = log_path if log_path is not None else os.getenv("MODEL_ROUTING_LOG", DEFAULT_ROUTING_LOG_PATH)
+        self.log_max_bytes = log_max_bytes or int(os.getenv("MODEL_ROUTING_LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+        
+        self._tiers_by_name = {tier['name']: tier for tier in self.tiers}
+        self._llms: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        # Held while the log file is written or rotated
+        self._log_lock = threading.Lock()
+        self._pending_log: List[str] = []
+        self._flush_scheduled = False
+        self._stats = {
+            tier['name']: {'calls': 0, 'latency_seconds': 0.0, 'input_tokens': 0, 'output_tokens': 0, 'cost': 0.0}
+            for tier in self.tiers
+        }
+        
+        if self.log_path:
+            Path(self.log_path).parent.mkdir(parents=True, exist_ok=True)
+    
+    def route(self, signals: Dict[str, Any]) -> str:
+        """
+        Choose a tier and log the decision.
+        
+        Called on the event loop, so the decision is only buffered; every
+        ROUTING_LOG_FLUSH_SIZE decisions are written out from the worker pool.
+        
+        Args:
+            signals: Output of extract_signals
+        
+        Returns:
+            Tier name
+        """
+        tier = choose_tier(self.tiers, signals)
+        
+        if self.log_path:
+            line = json.dumps({'at': datetime.utcnow().isoformat(), 'signals': signals, 'tier': tier})
+            with self._lock:
+                self._pending_log.append(line)
+                flush = len(self._pending_log) >= ROUTING_LOG_FLUSH_SIZE and not self._flush_scheduled
+                if flush:
+                    self._flush_scheduled = True
+            if flush:
+                get_executor().submit(self.flush_log)
+        
+        return tier
+    
+    def flush_log(self):
+        """Write buffered decisions to the log, rotating it first if it is too big (blocking; also called on shutdown)."""
+        with self._lock:
+            lines, self._pending_log = self._pending_log, []
+            self._flush_scheduled = False
+        if not lines:
+            return
+        
+        try:
+            with self._log_lock:
+                self._rotate_log()
+                with open(self.log_path, 'a', encoding='utf-8') as f:
+                    f.write("\n".join(lines) + "\n")
+        except OSError as e:
+            print(f"⚠ Could not log {len(lines)} routing decisions: {str(e)}")
+    
+    def _rotate_log(self):
+        """Move a log over log_max_bytes to .1, shifting older ones up to ROUTING_LOG_BACKUPS."""
+        path = Path(self.log_path)
+        if not path.exists() or path.stat().st_size < self.log_max_bytes:
+            return
+        
+        for index in range(ROUTING_LOG_BACKUPS - 1, 0, -1):
+            older = Path(f"{self.log_path}.{index}")
+            if older.exists():
+                os.replace(older, f"{self.log_path}.{index + 1}")
+        os.replace(path, f"{self.log_path}.1")
+    
+    def get_model(self, tier: str) -> str:
+        """Get the model ID of a tier."""
+        return self._tiers_by_name[tier]['model']
+    
+    def get_llm(self, tier: str) -> Any:
+        """Get (creating on first use) the chat model for a tier."""
+        if self.default_llm is not None:
+            return self.default_llm
+        
+        with self._lock:
+            if tier not in self._llms:
+                self._llms[tier] = ChatOpenAI(
+                    model=self._tiers_by_name[tier]['model'],
+                    temperature=0.3,
+                    api_key=os.getenv("OPENAI_API_KEY")
+                )
+            return self._llms[tier]
+    
+    def record(self, tier: str, latency: float, usage: Optional[Dict[str, int]]):
+        """
+        Record a finished call.
+        
+        Args:
+            tier: Tier the call went to
+            latency: Seconds the call took
+            usage: Token usage ('input_tokens', 'output_tokens'), if reported
+        """
+        config = self._tiers_by_name[tier]
+        input_tokens = (usage or {}).get('input_tokens', 0)
+        output_tokens = (usage or {}).get('output_tokens', 0)
+        
+        with self._lock:
+            stats = self._stats[tier]
+            stats['calls'] += 1
+            stats['latency_seconds'] += latency
+            stats['input_tokens'] += input_tokens
+            stats['output_tokens'] += output_tokens
+            stats['cost'] += (
+                input_tokens / 1000 * config.get('input_cost_per_1k', 0)
+                + output_tokens / 1000 * config.get('output_cost_per_1k', 0)
+            )
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get per-tier call, latency, token and cost counters."""
+        with self._lock:
+            return {
+                name: {
+                    'model': self._tiers_by_name[name]['model'],
+                    'calls': stats['calls'],
+                    'avg_latency_ms': round(stats['latency_seconds'] / stats['calls'] * 1000, 1) if stats['calls'] else 0.0,
+                    'input_tokens': stats['input_tokens'],
+                    'output_tokens': stats['output_tokens'],
+                    'cost_usd': round(stats['cost'], 4)
+                }
+                for name, stats in self._stats.items()
+            }
+
+
+def replay(log_path: str, tiers: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Re-route logged decisions with a tier configuration.
+    
+    Args:
+        log_path: JSONL decision log (its rotated copies are read too,
+            oldest first)
+        tiers: Tier configuration to evaluate
+    
+    Returns:
+        Dictionary with decision counts under the logged and the new
+        configuration, and how many decisions changed
+    """
+    logged, replayed, changed = Counter(), Counter(), Counter()
+    paths = [f"{log_path}.{index}" for index in range(ROUTING_LOG_BACKUPS, 0, -1)] + [log_path]
+    
+    for path in paths:
+        if not Path(path).exists():
+            continue
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                decision = json.loads(line)
+                tier = choose_tier(tiers, decision['signals'])
+                logged[decision['tier']] += 1
+                replayed[tier] += 1
+                if tier != decision['tier']:
+                    changed[f"{decision['tier']} -> {tier}"] += 1
+    
+    return {'logged': dict(logged), 'replayed': dict(replayed), 'changed': dict(changed)}
+
+
+if __name__ == "__main__":
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Replay logged routing decisions with a tier configuration")
+    parser.add_argument("--log", default=os.getenv("MODEL_ROUTING_LOG", DEFAULT_ROUTING_LOG_PATH))
+    parser.add_argument("--tiers", default=None, help="JSON tier configuration (defaults to the current one)")
+    args = parser.parse_args()
+    
+    started = time.perf_counter()
+    result = replay(args.log, load_tiers(args.tiers))
+    total = sum(result['logged'].values())
+    
+    print(f"Replayed {total} decisions in {time.perf_counter() - started:.2f}s")
+    for name in sorted(set(result['logged']) | set(result['replayed'])):
+        print(f"  {name:10s} logged {result['logged'].get(name, 0):6d}   replayed {result['replayed'].get(name, 0):6d}")
+    for change, count in sorted(result['changed'].items(), key=lambda item: -item[1]):
+        print(f"  {change}: {count}")
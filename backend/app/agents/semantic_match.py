@@ -0,0 +1,185 @@
+"""
+Embedding banks matched against the query embedding: misconceptions and
+related questions.
+"""
+import os
+import threading
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.agents.faq_store import normalize_question
+
+
+class EmbeddingBank:
+    """
+    Fixed set of texts with precomputed, normalized embeddings.
+    
+    The texts are embedded in one batched call the first time the bank is
+    searched, so building the agent does not load the embedding model.
+    """
+    
+    def __init__(self, texts: Sequence[str], labels: Sequence[Any], embed_texts: Callable[[List[str]], List[List[float]]]):
+        """
+        Initialize bank.
+        
+        Args:
+            texts: Texts to embed
+            labels: Label returned for each text
+            embed_texts: Batched embedding function (same model as queries)
+        """
+        self.texts = list(texts)
+        self.labels = list(labels)
+        self.embed_texts = embed_texts
+        
+        self._matrix: Optional[np.ndarray] = None
+        self._lock = threading.Lock()
+    
+    def search(self, embedding: List[float], k: int = 1) -> List[Tuple[Any, str, float]]:
+        """
+        Find the texts closest to an embedding.
+        
+        Args:
+            embedding: Query embedding
+            k: Number of results
+        
+        Returns:
+            (label, text, cosine similarity) tuples, most similar first
+        """
+        matrix = self._get_matrix()
+        if matrix is None:
+            return []
+        
+        query = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm == 0 or query.shape[0] != matrix.shape[1]:
+            return []
+        
+        scores = matrix @ (query / norm)
+        top = np.argsort(-scores)[:k]
+        return [(self.labels[i], self.texts[i], float(scores[i])) for i in top]
+    
+    def _get_matrix(self) -> Optional[np.ndarray]:
+        if self._matrix is None and self.texts:
+            with self._lock:
+                if self._matrix is None:
+                    matrix = np.asarray(self.embed_texts(self.texts), dtype=np.float32)
+                    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+                    self._matrix = matrix / np.where(norms == 0, 1, norms)
+        return self._matrix
+
+
+class SemanticMatcher:
+    """
+    Misconception detection and related-question selection from the query
+    embedding computed for retrieval.
+    
+    Each misconception has a few example phrasings and a few neutral questions
+    on the same topic. A question is flagged when it is close enough to an
+    example and closer to it, by a margin, than to any neutral question or
+    bank question, so plain questions that share the example's wording are
+    not. Related questions are the nearest neighbours of the question among
+    the suggested questions and curated FAQs.
+    
+    benchmarks/misconception_match.py measures precision and recall of the
+    threshold and margin on labelled questions.
+    """
+    
+    def __init__(
+        self,
+        embed_texts: Callable[[List[str]], List[List[float]]],
+        misconceptions: Dict[str, Dict[str, Any]],
+        questions: Sequence[str],
+        misconception_threshold: float = None,
+        misconception_margin: float = None,
+        related_count: int = 3
+    ):
+        """
+        Initialize matcher.
+        
+        Args:
+            embed_texts: Batched embedding function (same model as queries)
+            misconceptions: Misconceptions by key, each with 'examples' and
+                'neutral' questions
+            questions: Question bank for related-question suggestions (also
+                neutral)
+            misconception_threshold: Minimum cosine similarity to flag a
+                misconception (MISCONCEPTION_SIMILARITY_THRESHOLD, default 0.7)
+            misconception_margin: How much closer the nearest example must be
+                than the nearest neutral question (MISCONCEPTION_MARGIN,
+                default 0.05)
+            related_count: Related questions to suggest
+        """
+        self.misconception_threshold = misconception_threshold or float(
+            os.getenv("MISCONCEPTION_SIMILARITY_THRESHOLD", "0.7")
+        )
+        self.misconception_margin = (
+            misconception_margin if misconception_margin is not None
+            else float(os.getenv("MISCONCEPTION_MARGIN", "0.05"))
+        )
+        self.related_count = related_count
+        
+        examples = [(key, example) for key, info in misconceptions.items() for example in info.get('examples', [])]
+        self.misconception_bank = EmbeddingBank(
+            [example for _, example in examples],
+            [key for key, _ in examples],
+            embed_texts
+        )
+        neutral = [question for info in misconceptions.values() for question in info.get('neutral', [])]
+        self.neutral_bank = EmbeddingBank(neutral, neutral, embed_texts)
+        self.question_bank = EmbeddingBank(questions, questions, embed_texts)
+        
+        self.misconceptions_detected = 0
+        self.misconceptions_outscored = 0
+    
+    def match(self, embedding: List[float], question: str) -> Dict[str, Any]:
+        """
+        Match a query embedding against both banks.
+        
+        Args:
+            embedding: Query embedding
+            question: The question (excluded from its own suggestions)
+        
+        Returns:
+            Dictionary with 'misconception' (key or None) and
+            'related_questions'
+        """
+        return {
+            'misconception': self.detect_misconception(embedding),
+            'related_questions': self.related_questions(embedding, question)
+        }
+    
+    def detect_misconception(self, embedding: List[float]) -> Optional[str]:
+        """Get the misconception a query embedding is closest to, if close enough and clearly closer than any neutral question."""
+        results = self.misconception_bank.search(embedding, k=1)
+        if not results or results[0][2] < self.misconception_threshold:
+            return None
+        misconception, _, score = results[0]
+        
+        neutral = self.neutral_bank.search(embedding, k=1) + self.question_bank.search(embedding, k=1)
+        nearest_neutral = max((similarity for _, _, similarity in neutral), default=-1.0)
+        if score - nearest_neutral < self.misconception_margin:
+            self.misconceptions_outscored += 1
+            return None
+        
+        self.misconceptions_detected += 1
+        return misconception
+    
+    def related_questions(self, embedding: List[float], question: str) -> List[str]:
+        """Get the bank questions nearest to a query embedding, excluding the question itself."""
+        asked = normalize_question(question)
+        results = self.question_bank.search(embedding, k=self.related_count + 1)
+        related = [text for _, text, _ in results if normalize_question(text) != asked]
+        return related[:self.related_count]
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get matcher statistics."""
+        return {
+            'misconception_examples': len(self.misconception_bank.texts),
+            'neutral_questions': len(self.neutral_bank.texts),
+            'question_bank': len(self.question_bank.texts),
+            'misconception_threshold': self.misconception_threshold,
+            'misconception_margin': self.misconception_margin,
+            'misconceptions_detected': self.misconceptions_detected,
+            'misconceptions_outscored': self.misconceptions_outscored
+        }
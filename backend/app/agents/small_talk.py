@@ -0,0 +1,183 @@
+"""
+Templated replies for greetings and small talk (English and Nigerian Pidgin).
+"""
+import os
+import re
+import random
+from typing import List, Dict, Optional, Tuple
+
+# Phrases that mark a message as Pidgin rather than English
+PIDGIN_MARKERS = re.compile(
+    r"\b(how far|how you dey|how una dey|wetin|abeg|dey|una|oga|wahala|sabi|"
+    r"tank you|well done o|na so|no wahala|ehen|e don)\b"
+)
+
+# Intent patterns, matched against the lowercased message from the start
+INTENT_PATTERNS: List[Tuple[str, re.Pattern]] = [
+    ('greeting', re.compile(
+        r"^(hi|hello|hey|hiya|good (morning|afternoon|evening|day)|greetings|"
+        r"how far|howdy|wetin dey happen|how body)\b"
+    )),
+    ('wellbeing', re.compile(
+        r"^(how are you|how('?s| is) it going|what'?s up|sup|how you dey|how una dey|"
+        r"you dey alright)\b"
+    )),
+    ('thanks', re.compile(
+        r"^(thanks|thank you|thank u|thx|appreciate|tank you|i thank you|well done)\b"
+    )),
+    ('goodbye', re.compile(
+        r"^(bye|goodbye|good night|see you|later|take care|i dey go|make i dey go)\b"
+    )),
+    ('acknowledgement', re.compile(
+        r"^(ok|okay|alright|cool|nice|great|got it|i see|na so|no wahala|ehen|yes|no|maybe)\b"
+    )),
+]
+
+# Words allowed after the matched phrase ("thanks a lot", "hello there")
+MAX_TRAILING_WORDS = 3
+
+# Replies to a previous answer ("yes", "no", "ok") depend on what was asked
+CONTEXT_DEPENDENT_INTENTS = {'acknowledgement'}
+
+SMALL_TALK_TEMPLATES: Dict[str, Dict[str, List[str]]] = {
+    'greeting': {
+        'en': [
+            "Hello! 👋 I'm here to help you understand the 2024 Nigerian Tax Reform Bills. "
+            "Ask me about income tax, VAT, small business exemptions or anything else in the bills.",
+            "Hi there! I can explain the new tax reform bills in simple terms. What would you like to know?"
+        ],
+        'pcm': [
+            "How far! 👋 I dey here to help you understand the 2024 tax reform bills. "
+            "Ask me anything about income tax, VAT or small business matter.",
+            "Hello o! Wetin you wan know about the new tax law? I go explain am well well."
+        ]
+    },
+    'wellbeing': {
+        'en': [
+            "I'm doing well, thank you for asking! How can I help you with the tax reform bills today?"
+        ],
+        'pcm': [
+            "I dey kampe, thank you! Wetin you wan know about the new tax law today?"
+        ]
+    },
+    'thanks': {
+        'en': [
+            "You're welcome! Feel free to ask if anything else about the tax reforms is unclear.",
+            "Glad I could help! Is there anything else you'd like to know about the tax bills?"
+        ],
+        'pcm': [
+            "No wahala at all! If any other thing no clear about the tax reform, just ask.",
+            "You welcome o! Anything else you wan know, I dey here."
+        ]
+    },
+    'goodbye': {
+        'en': [
+            "Goodbye! Come back any time you have questions about the tax reforms."
+        ],
+        'pcm': [
+            "Bye bye o! Anytime you get question about the tax reform, come back."
+        ]
+    },
+    'acknowledgement': {
+        'en': [
+            "Great! Let me know if you have any other questions about the tax reform bills."
+        ],
+        'pcm': [
+            "Correct! If you get any other question about the tax reform, just ask."
+        ]
+    },
+    'fallback': {
+        'en': [
+            "I'm here to help with questions about the 2024 Nigerian Tax Reform Bills. "
+            "Could you tell me a bit more about what you'd like to know?"
+        ],
+        'pcm': [
+            "I dey here to answer question about the 2024 tax reform bills. "
+            "Abeg tell me small more about wetin you wan know."
+        ]
+    }
+}
+
+
+def detect_language(message: str) -> str:
+    """Detect whether a message is in Nigerian Pidgin ('pcm') or English ('en')."""
+    return 'pcm' if PIDGIN_MARKERS.search(message.lower()) else 'en'
+
+
+def detect_intent(message: str) -> Optional[str]:
+    """
+    Detect the small-talk intent of a message.
+    
+    Args:
+        message: User message
+    
+    Returns:
+        Intent name, or None if the message is not just small talk
+        ("hi, what is the new VAT rate?" is a question, not a greeting)
+    """
+    text = message.lower().strip()
+    for intent, pattern in INTENT_PATTERNS:
+        match = pattern.match(text)
+        if match:
+            trailing = re.findall(r"[\w']+", text[match.end():])
+            return intent if len(trailing) <= MAX_TRAILING_WORDS else None
+    return None
+
+
+class SmallTalkResponder:
+    """
+    Answer greetings, thanks and other small talk from local templates.
+    
+    Messages whose meaning depends on the conversation ("yes", "ok" after a
+    question) or that match no known intent are ambiguous: they go to the
+    LLM if `llm_fallback` is enabled, otherwise they get a generic template.
+    """
+    
+    def __init__(self, llm_fallback: bool = None):
+        """
+        Initialize responder.
+        
+        Args:
+            llm_fallback: Send ambiguous messages to the LLM
+                (SMALL_TALK_LLM_FALLBACK, default true)
+        """
+        if llm_fallback is None:
+            llm_fallback = os.getenv("SMALL_TALK_LLM_FALLBACK", "true").lower() not in ("0", "false", "no")
+        self.llm_fallback = llm_fallback
+        
+        self.template_replies = 0
+        self.llm_replies = 0
+    
+    def respond(self, message: str, has_history: bool = False) -> Optional[str]:
+        """
+        Pick a templated reply.
+        
+        Args:
+            message: User message that needs no retrieval
+            has_history: Whether the conversation has earlier turns
+        
+        Returns:
+            Reply text, or None if the LLM should answer
+        """
+        intent = detect_intent(message)
+        
+        ambiguous = intent is None or (intent in CONTEXT_DEPENDENT_INTENTS and has_history)
+        if ambiguous:
+            if self.llm_fallback:
+                self.llm_replies += 1
+                return None
+            intent = 'fallback'
+        
+        self.template_replies += 1
+        return random.choice(SMALL_TALK_TEMPLATES[intent][detect_language(message)])
+    
+    def fallback(self, message: str) -> str:
+        """Generic templated reply, for when the LLM cannot answer."""
+        return random.choice(SMALL_TALK_TEMPLATES['fallback'][detect_language(message)])
+    
+    def get_stats(self) -> Dict[str, int]:
+        """Get counts of templated and LLM-answered small talk."""
+        return {
+            'template_replies': self.template_replies,
+            'llm_replies': self.llm_replies
+        }
@@ -0,0 +1,225 @@
+"""
+Typeahead question suggestions from an in-memory prefix index.
+"""
+import os
+import re
+import time
+import heapq
+import asyncio
+from bisect import bisect_left
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import func
+
+from app.agents.faq_store import get_canned_questions
+from app.config.database import get_db_context
+from app.models.database import Conversation, Message
+
+# Suggestions kept per prefix
+MAX_SUGGESTIONS = 10
+
+# Suggestions for prefixes up to this long (which match the most suffixes)
+# are computed when the index is built
+PRECOMPUTED_PREFIX_CHARS = 2
+
+# Only the first characters after each word start are indexed
+MAX_PREFIX_CHARS = 40
+
+# Questions are also found from their first few words onwards ("vat rate"
+# finds "What is the current VAT rate?")
+MAX_INDEXED_WORDS = 8
+
+# Curated questions rank as if this many users had asked them
+CURATED_POPULARITY = 5
+
+# Questions that may identify someone are never suggested
+PERSONAL_DATA_PATTERN = re.compile(r"@|\d{6,}|https?://")
+
+
+def normalize_prefix(text: str) -> str:
+    """Normalize text for prefix matching (case, punctuation, spacing)."""
+    return re.sub(r"\s+", " ", re.sub(r"[^\w\s%₦]", " ", text.lower())).strip()
+
+
+class PrefixIndex:
+    """
+    Sorted array of question suffixes. A lookup bisects to the block of
+    suffixes starting with the typed prefix and takes its most popular
+    questions; the largest blocks (the shortest prefixes) are precomputed.
+    """
+    
+    def __init__(self, questions: Sequence[Tuple[str, int]], max_suggestions: int = MAX_SUGGESTIONS):
+        """
+        Build the index.
+        
+        Args:
+            questions: (question, popularity) pairs
+            max_suggestions: Suggestions returned per prefix at most
+        """
+        self.max_suggestions = max_suggestions
+        self.questions: List[str] = []
+        self._short: Dict[str, List[int]] = {}
+        entries: List[Tuple[str, int]] = []
+        
+        # Most popular first, so a lower question id means more popular
+        ranked = sorted(questions, key=lambda item: (-item[1], len(item[0]), item[0]))
+        for question_id, (question, _) in enumerate(ranked):
+            self.questions.append(question)
+            words = normalize_prefix(question).split(" ")
+            
+            for start in range(min(len(words), MAX_INDEXED_WORDS)):
+                suffix = " ".join(words[start:])[:MAX_PREFIX_CHARS]
+                entries.append((suffix, question_id))
+                for length in range(min(len(suffix), PRECOMPUTED_PREFIX_CHARS) + 1):
+                    top = self._short.setdefault(suffix[:length], [])
+                    if len(top) < max_suggestions and question_id not in top:
+                        top.append(question_id)
+        
+        entries.sort()
+        self._suffixes = [suffix for suffix, _ in entries]
+        self._question_ids = [question_id for _, question_id in entries]
+    
+    def lookup(self, prefix: str, limit: int = 5) -> List[str]:
+        """
+        Get the most popular questions matching a typed prefix.
+        
+        Args:
+            prefix: Text typed so far
+            limit: Maximum suggestions
+        
+        Returns:
+            Matching questions, most popular first
+        """
+        prefix = normalize_prefix(prefix)[:MAX_PREFIX_CHARS]
+        limit = min(limit, self.max_suggestions)
+        
+        if len(prefix) <= PRECOMPUTED_PREFIX_CHARS:
+            question_ids = self._short.get(prefix, [])[:limit]
+        else:
+            start = bisect_left(self._suffixes, prefix)
+            end = bisect_left(self._suffixes, prefix + "\U0010ffff", start)
+            question_ids = heapq.nsmallest(limit, set(self._question_ids[start:end]))
+        
+        return [self.questions[question_id] for question_id in question_ids]
+    
+    @property
+    def entry_count(self) -> int:
+        """Number of indexed suffixes."""
+        return len(self._suffixes)
+
+
+class SuggestionIndex:
+    """
+    Question bank for typeahead, rebuilt periodically in the background.
+    
+    The bank is the curated suggestions and FAQs plus past user questions,
+    ranked by how many distinct users asked them. A past question is only
+    included once at least `min_users` different users have asked it (and
+    it does not look like it contains personal data), so no individual's
+    question is ever suggested to someone else.
+    """
+    
+    def __init__(
+        self,
+        min_users: int = None,
+        max_questions: int = None,
+        history_days: int = None,
+        rebuild_interval: float = None
+    ):
+        """
+        Initialize index with the curated questions only.
+        
+        Args:
+            min_users: Distinct users needed before a past question is
+                suggested (SUGGEST_MIN_USERS, default 3)
+            max_questions: Most past questions indexed (SUGGEST_MAX_QUESTIONS)
+            history_days: Only questions from this many recent days count
+                (SUGGEST_HISTORY_DAYS)
+            rebuild_interval: Seconds between rebuilds (SUGGEST_REBUILD_INTERVAL)
+        """
+        self.min_users = min_users or int(os.getenv("SUGGEST_MIN_USERS", "3"))
+        self.max_questions = max_questions or int(os.getenv("SUGGEST_MAX_QUESTIONS", "2000"))
+        self.history_days = history_days or int(os.getenv("SUGGEST_HISTORY_DAYS", "90"))
+        self.rebuild_interval = rebuild_interval or float(os.getenv("SUGGEST_REBUILD_INTERVAL", "600"))
+        
+        self._index = PrefixIndex([(question, CURATED_POPULARITY) for question in get_canned_questions()])
+        self.built_at: Optional[datetime] = None
+        self.build_seconds = 0.0
+        self.past_questions = 0
+        self.lookups = 0
+    
+    def suggest(self, prefix: str, limit: int = 5) -> List[str]:
+        """Get suggestions for a typed prefix."""
+        self.lookups += 1
+        return self._index.lookup(prefix, limit)
+    
+    def rebuild(self):
+        """Rebuild the index from curated and past questions, then swap it in."""
+        started = time.perf_counter()
+        
+        popularity: Dict[str, Tuple[str, int]] = {}
+        for question in get_canned_questions():
+            popularity[normalize_prefix(question)] = (question, CURATED_POPULARITY)
+        
+        past = self._load_past_questions()
+        for question, users in past:
+            key = normalize_prefix(question)
+            text, count = popularity.get(key, (question, 0))
+            popularity[key] = (text, count + users)
+        
+        # Readers keep using the old index until this single assignment
+        self._index = PrefixIndex(list(popularity.values()))
+        self.past_questions = len(past)
+        self.built_at = datetime.utcnow()
+        self.build_seconds = time.perf_counter() - started
+    
+    def _load_past_questions(self) -> List[Tuple[str, int]]:
+        """Past user questions asked by at least min_users distinct users."""
+        key = func.lower(func.trim(Message.content))
+        users = func.count(func.distinct(Conversation.user_id))
+        since = datetime.utcnow() - timedelta(days=self.history_days)
+        
+        with get_db_context() as db:
+            rows = (
+                db.query(func.min(Message.content), users)
+                .join(Conversation, Message.conversation_id == Conversation.id)
+                .filter(Message.role == 'user', Message.created_at >= since, func.length(Message.content) <= 150)
+                .group_by(key)
+                .having(users >= self.min_users)
+                .order_by(users.desc())
+                .limit(self.max_questions)
+                .all()
+            )
+        
+        return [
+            (question.strip(), count) for question, count in rows
+            if not PERSONAL_DATA_PATTERN.search(question)
+        ]
+    
+    async def run_periodic_rebuild(self):
+        """
+        Rebuild now and then every rebuild_interval seconds, until cancelled.
+        
+        Rebuilds run in their own thread rather than the shared worker pool,
+        so they never hold up embedding and retrieval for requests.
+        """
+        while True:
+            try:
+                await asyncio.to_thread(self.rebuild)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"⚠ Could not rebuild question suggestions: {str(e)}")
+            await asyncio.sleep(self.rebuild_interval)
+    
+    def get_stats(self) -> Dict[str, object]:
+        """Get index statistics."""
+        return {
+            'questions': len(self._index.questions),
+            'past_questions': self.past_questions,
+            'suffixes': self._index.entry_count,
+            'built_at': self.built_at.isoformat() if self.built_at else None,
+            'build_seconds': round(self.build_seconds, 3),
+            'lookups': self.lookups
+        }
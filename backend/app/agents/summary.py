@@ -0,0 +1,142 @@
+"""
+Rolling conversation summaries that keep prompt size flat.
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Optional
+
+from langchain_core.messages import SystemMessage, HumanMessage
+
+from app.config.database import get_db_context
+from app.models.database import Conversation, Message
+
+
+SUMMARY_PROMPT = """You maintain a running summary of a conversation between a Nigerian taxpayer and an assistant that explains the 2024 Tax Reform Bills.
+
+Update the existing summary with the new messages. Keep:
+- Facts about the user's situation (income, business type, state, concerns)
+- Questions already asked and the key answers, figures and bill citations given
+- Any misconceptions that were corrected
+
+Write plain sentences, no more than 150 words. Reply with the updated summary only."""
+
+
+class ConversationSummarizer:
+    """
+    Fold turns older than a recent window into a persisted running summary.
+    
+    The prompt then carries the summary plus the last `window` raw messages,
+    however long the conversation gets. Summaries are refreshed in a
+    background thread after a turn completes, never on the request path.
+    """
+    
+    def __init__(self, memory, llm: Optional[Any] = None, window: int = None, batch: int = None):
+        """
+        Initialize summarizer.
+        
+        Args:
+            memory: ConversationMemoryStore to update with new summaries
+            llm: Chat model used for summarizing (defaults to SUMMARY_MODEL)
+            window: Number of recent messages always sent verbatim
+            batch: Unsummarized messages beyond the window that trigger a refresh
+        """
+        self.memory = memory
+        self._llm = llm
+        self.window = window or int(os.getenv("SUMMARY_WINDOW", "6"))
+        self.batch = batch or int(os.getenv("SUMMARY_BATCH", "4"))
+        
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="summarizer")
+        self._pending = set()
+        self._lock = threading.Lock()
+    
+    @property
+    def llm(self):
+        if self._llm is None:
+            from langchain_openai import ChatOpenAI
+            
+            self._llm = ChatOpenAI(
+                model=os.getenv("SUMMARY_MODEL", "gpt-4o-mini"),
+                temperature=0,
+                api_key=os.getenv("OPENAI_API_KEY")
+            )
+        return self._llm
+    
+    def schedule(self, conversation_id: Optional[str], message_count: Optional[int]):
+        """
+        Queue a summary refresh if enough turns have left the window.
+        
+        Args:
+            conversation_id: Conversation ID
+            message_count: Messages in the conversation including the turn
+                just answered
+        """
+        if not conversation_id or message_count is None:
+            return
+        
+        if message_count <= self.window + self.batch:
+            return
+        
+        with self._lock:
+            if conversation_id in self._pending:
+                return
+            self._pending.add(conversation_id)
+        
+        self._executor.submit(self._refresh, conversation_id, message_count)
+    
+    def shutdown(self):
+        """Wait for queued refreshes to finish."""
+        self._executor.shutdown(wait=True)
+    
+    def _refresh(self, conversation_id: str, message_count: int):
+        """Summarize messages that fell out of the window (runs in a worker thread)."""
+        try:
+            with get_db_context() as db:
+                conversation = db.query(Conversation).filter(
+                    Conversation.id == conversation_id
+                ).first()
+                if conversation is None:
+                    return
+                
+                start = conversation.summarized_count or 0
+                end = message_count - self.window
+                if end - start < self.batch:
+                    return
+                
+                rows = db.query(Message).filter(
+                    Message.conversation_id == conversation_id
+                ).order_by(Message.created_at).offset(start).limit(end - start).all()
+                
+                transcript = "\n".join(
+                    f"{'User' if row.role == 'user' else 'Assistant'}: {row.content}"
+                    for row in rows
+                )
+                
+                response = self.llm.invoke([
+                    SystemMessage(content=SUMMARY_PROMPT),
+                    HumanMessage(content=(
+                        f"Existing summary:\n{conversation.summary or '(none)'}\n\n"
+                        f"New messages:\n{transcript}"
+                    ))
+                ])
+                summary = response.content.strip()
+                
+                # Only advance if no other worker summarized this range meanwhile
+                updated = db.query(Conversation).filter(
+                    Conversation.id == conversation_id,
+                    Conversation.summarized_count == start
+                ).update({
+                    Conversation.summary: summary,
+                    Conversation.summarized_count: start + len(rows)
+                }, synchronize_session=False)
+                db.commit()
+            
+            if updated:
+                self.memory.set_summary(conversation_id, summary, start + len(rows))
+        
+        except Exception as e:
+            print(f"⚠ Conversation summary failed for {conversation_id}: {str(e)}")
+        
+        finally:
+            with self._lock:
+                self._pending.discard(conversation_id)
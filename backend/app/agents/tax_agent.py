@@ -2,18 +2,39 @@
 Agentic RAG system for Nigerian Tax Reform Bills Q&A.
 This is the core AI engine that handles all queries.
 """
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, AsyncIterator, Tuple
 import os
+import time
+import asyncio
 
 
 from langchain_openai import ChatOpenAI
-from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
-from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
+from langchain_core.messages import HumanMessage, SystemMessage
 
 
 from app.rag.vectorstore import TaxBillVectorStore
 from app.rag.retrieval import AdvancedRetriever
 from app.agents.tools import MisconceptionDetector, SourceFormatter
+from app.agents.memory import ConversationMemoryStore, LRUConversationMemory
+from app.agents.summary import ConversationSummarizer
+from app.agents.answer_cache import SemanticAnswerCache, create_answer_cache
+from app.agents.faq_store import FAQStore, RELATED_QUESTIONS, create_faq_store, get_canned_questions, normalize_question
+from app.agents.semantic_match import SemanticMatcher
+from app.agents.small_talk import SmallTalkResponder
+from app.agents.calculation import CalculationResponder, detect_calculation
+from app.agents.model_router import ModelRouter, extract_signals
+from app.utils.concurrency import SingleFlight, run_in_pool
+from app.utils.admission import LLMAdmissionController
+from app.utils.resilience import CircuitBreaker, hedged_call, is_rate_limited
+from app.utils.tokens import (
+    PROMPT_COMPONENTS,
+    REPLY_PRIMING_TOKENS,
+    TOKENS_PER_MESSAGE,
+    count_message_tokens,
+    count_static_tokens,
+    count_tokens,
+    get_chat_model_name
+)
 
 
 class TaxReformAgent:
@@ -22,21 +43,59 @@ class TaxReformAgent:
     Implements conditional retrieval, conversation memory, and source citation.
     """
     
-    def __init__(self, vectorstore: TaxBillVectorStore):
+    def __init__(
+        self,
+        vectorstore: TaxBillVectorStore,
+        llm: Optional[Any] = None,
+        memory: Optional[ConversationMemoryStore] = None,
+        summarizer: Optional[ConversationSummarizer] = None,
+        answer_cache: Optional[SemanticAnswerCache] = None,
+        faq_store: Optional[FAQStore] = None,
+        small_talk: Optional[SmallTalkResponder] = None,
+        calculator: Optional[CalculationResponder] = None,
+        semantic_matcher: Optional[SemanticMatcher] = None,
+        single_flight: Optional[SingleFlight] = None,
+        admission: Optional[LLMAdmissionController] = None,
+        llm_breaker: Optional[CircuitBreaker] = None,
+        model_router: Optional[ModelRouter] = None
+    ):
         """
         Initialize the tax reform agent.
         
         Args:
             vectorstore: Initialized vector store with tax bill documents
+            llm: Chat model to use (defaults to ChatOpenAI)
+            memory: Conversation memory store (defaults to a bounded LRU
+                store hydrated from the messages table)
+            summarizer: Rolling summarizer for turns older than the prompt
+                window (defaults to one writing into memory)
+            answer_cache: Semantic cache for standalone questions (defaults
+                to one persisted to ANSWER_CACHE_PATH unless disabled)
+            faq_store: Pre-generated answers for suggested questions
+                (defaults to FAQ_STORE_PATH)
+            small_talk: Templated responder for greetings and small talk
+            calculator: Local responder for income tax calculation questions
+            semantic_matcher: Misconception and related-question matching on
+                the query embedding (defaults to banks embedded with the
+                vector store's model)
+            single_flight: Coalescing of identical in-flight questions that
+                have no conversation history
+            admission: Concurrency cap and fair queue for chat model calls
+            llm_breaker: Circuit breaker for chat model calls; while open,
+                answers are built from the retrieved excerpts
+            model_router: Picks the chat model tier per question (defaults
+                to the configured tiers, or to llm for every tier if given)
         """
         self.vectorstore = vectorstore
-        self.retriever = AdvancedRetriever(vectorstore)
+        # One classifier makes the retrieval, misconception and topic calls
+        self.query_classifier = MisconceptionDetector.create_classifier()
+        self.retriever = AdvancedRetriever(vectorstore, classifier=self.query_classifier)
         self.misconception_detector = MisconceptionDetector()
         self.source_formatter = SourceFormatter()
         
         # Initialize LLM
-        self.llm = ChatOpenAI(
-            model="gpt-4-turbo-preview",
+        self.llm = llm or ChatOpenAI(
+            model=get_chat_model_name(),
             temperature=0.3,
             api_key=os.getenv("OPENAI_API_KEY")
         )
@@ -146,12 +205,36 @@ REMEMBER:
 Goal: Every Nigerian, regardless of education level, should be able to understand your explanation and make an informed decision."""
 
         # Conversation memory storage
-        self.conversations: Dict[str, List[Any]] = {}
+        self.memory = memory or LRUConversationMemory()
+        self.summarizer = summarizer or ConversationSummarizer(self.memory)
+        self.answer_cache = answer_cache or create_answer_cache()
+        self.faq_store = faq_store or create_faq_store()
+        self.small_talk = small_talk or SmallTalkResponder()
+        self.calculator = calculator or CalculationResponder()
+        self.semantic_matcher = semantic_matcher or SemanticMatcher(
+            vectorstore.embed_texts,
+            MisconceptionDetector.MISCONCEPTIONS,
+            get_canned_questions()
+        )
+        self.single_flight = single_flight or SingleFlight()
+        self.admission = admission or LLMAdmissionController()
+        self.llm_breaker = llm_breaker or CircuitBreaker()
+        self.model_router = model_router or ModelRouter(default_llm=llm)
+        
+        # Latency budget per request (retrieval and generation); the LLM call
+        # is hedged when it is slower than hedge_after. Offline callers (FAQ
+        # pregeneration, batch jobs) have nobody waiting and get a longer one
+        self.deadline_seconds = float(os.getenv("CHAT_DEADLINE_SECONDS", "20"))
+        self.offline_deadline_seconds = float(os.getenv("OFFLINE_DEADLINE_SECONDS", "120"))
+        self.hedge_after = float(os.getenv("LLM_HEDGE_AFTER_SECONDS", "8"))
+        self.fallback_answers = 0
+        self.truncated_answers = 0
     
     def process_query(
         self, 
         question: str, 
-        conversation_id: Optional[str] = None
+        conversation_id: Optional[str] = None,
+        message_count: Optional[int] = None
     ) -> Dict[str, Any]:
         """
         Process a user query with conditional retrieval and memory.
@@ -159,18 +242,38 @@ Goal: Every Nigerian, regardless of education level, should be able to understan
         Args:
             question: User's question
             conversation_id: Unique conversation identifier for memory
+            message_count: Messages already stored for the conversation, used
+                to detect stale cached memory
             
         Returns:
             Dictionary with answer, sources, and metadata
         """
+        classification = self.query_classifier.classify(question)
+        
+        # Calculation questions are answered from locally computed figures
+        calculation_turn = self._calculation_turn(question, classification)
+        if calculation_turn is not None:
+            answer = calculation_turn['prepared_answer']
+            if answer is None:
+                answer = self.llm.invoke(calculation_turn['messages']).content
+            return self._build_response(
+                question, conversation_id, answer, [], calculation_turn['retrieval_result'],
+                calculation_turn['misconception'], message_count
+            )
+        
         # Step 1: Retrieve conversation history
-        history = self._get_conversation_history(conversation_id)
+        history = self._get_conversation_history(conversation_id, message_count)
         
         # Step 2: Conditional Retrieval (KEY RUBRIC REQUIREMENT)
-        retrieval_result = self.retriever.retrieve_and_rank(question, k=5)
+        retrieval_result = self.retriever.retrieve_and_rank(question, k=5, classification=classification)
         
-        # Step 3: Check for misconceptions
-        misconception = self.misconception_detector.detect_misconception(question)
+        # Step 3: Check for misconceptions (keywords, then the query embedding)
+        misconception_type = classification['misconception']
+        if retrieval_result['query_embedding'] is not None:
+            semantic = self.semantic_matcher.match(retrieval_result['query_embedding'], question)
+            misconception_type = misconception_type or semantic['misconception']
+            retrieval_result['related_questions'] = semantic['related_questions']
+        misconception = self.misconception_detector.describe(misconception_type)
         
         # Step 4: Generate response
         if not retrieval_result['needs_retrieval']:
@@ -180,22 +283,650 @@ Goal: Every Nigerian, regardless of education level, should be able to understan
             sources = []
         else:
             # Generate answer with retrieved context
-            context = self.retriever.get_context_string(retrieval_result['documents'])
+            packed = self.retriever.pack_context(
+                retrieval_result['documents'], retrieval_result['query_embedding']
+            )
             answer = self._generate_answer_with_context(
                 question, 
-                context, 
+                packed['context'], 
                 history,
                 misconception
             )
             sources = self.source_formatter.create_source_references(
-                retrieval_result['documents']
+                packed['documents']
+            )
+        
+        return self._build_response(
+            question, conversation_id, answer, sources, retrieval_result, misconception,
+            message_count
+        )
+    
+    async def aprocess_query(
+        self, 
+        question: str, 
+        conversation_id: Optional[str] = None,
+        message_count: Optional[int] = None,
+        user_id: Optional[str] = None,
+        prefetched: Optional[Dict[str, Any]] = None,
+        deadline_seconds: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """
+        Async version of process_query.
+        
+        The LLM is called with ainvoke and retrieval runs in the shared worker
+        pool, so a slow model call never blocks other requests on the worker.
+        
+        A question with no conversation history is answered the same way for
+        everyone, so concurrent identical ones (same normalized text and
+        corpus version) share a single retrieval and LLM call. Each caller
+        still updates its own conversation memory.
+        
+        Retrieval and generation share a latency budget of
+        CHAT_DEADLINE_SECONDS. If the model has not answered by then, or the
+        circuit breaker is open, the answer quotes the retrieved excerpts and
+        the response has 'fallback' set.
+        
+        Args:
+            question: User's question
+            conversation_id: Unique conversation identifier for memory
+            message_count: Messages already stored for the conversation, used
+                to detect stale cached memory
+            user_id: User asking, for fair scheduling of LLM calls
+            prefetched: Query embedding and retrieval result from
+                aprefetch_batch, if the question was part of a batch
+            deadline_seconds: Latency budget instead of deadline_seconds
+                (offline callers pass offline_deadline_seconds)
+            
+        Returns:
+            Dictionary with answer, sources, and metadata
+            
+        Raises:
+            AdmissionRejected: If the LLM wait queue is full
+        """
+        deadline = time.monotonic() + (deadline_seconds or self.deadline_seconds)
+        
+        if not conversation_id or message_count == 0:
+            key = (normalize_question(question), self.vectorstore.corpus_version)
+            (turn, answer, usage, fallback), shared = await self.single_flight.do(
+                key, self._agenerate, question, None, 0, user_id, deadline, prefetched
+            )
+            if shared:
+                # Only the caller that made the LLM call is charged for it
+                usage = None
+        else:
+            turn, answer, usage, fallback = await self._agenerate(
+                question, conversation_id, message_count, user_id, deadline, prefetched
+            )
+        
+        return self._build_response(
+            question,
+            conversation_id,
+            answer,
+            turn['sources'],
+            turn['retrieval_result'],
+            turn['misconception'],
+            message_count,
+            usage,
+            fallback
+        )
+    
+    async def _agenerate(
+        self,
+        question: str,
+        conversation_id: Optional[str],
+        message_count: Optional[int],
+        user_id: Optional[str],
+        deadline: float,
+        prefetched: Optional[Dict[str, Any]] = None
+    ) -> Tuple[Dict[str, Any], str, Optional[Dict[str, Any]], bool]:
+        """
+        Prepare a turn and produce its answer.
+        
+        Returns:
+            (turn, answer, token usage, fallback) tuple; usage is None unless
+            the LLM answered, fallback is True if the LLM should have answered
+            but the excerpts stand in for it
+        """
+        turn = await self._aprepare_turn(question, conversation_id, message_count, prefetched, deadline)
+        
+        if turn['prepared_answer'] is not None:
+            if turn.get('fallback'):
+                self.fallback_answers += 1
+            return turn, turn['prepared_answer'], None, turn.get('fallback', False)
+        
+        answer = await self._ainvoke_llm(turn['messages'], user_id, deadline, turn['tier'])
+        if answer is None:
+            self.fallback_answers += 1
+            return turn, turn['fallback_answer'], None, True
+        
+        await self._acache_answer(question, turn, answer)
+        return turn, answer, self._token_usage(turn, answer), False
+    
+    async def aprefetch_batch(self, questions: List[str]) -> List[Optional[Dict[str, Any]]]:
+        """
+        Embed and retrieve for many questions at once.
+        
+        The questions that need retrieval are embedded in one batched call
+        and searched with one vector store query, instead of one embedding
+        and one search per question.
+        
+        Args:
+            questions: Standalone questions (no conversation history)
+        
+        Returns:
+            One entry per question to pass to aprocess_query as prefetched,
+            None for questions that need no retrieval
+        """
+        classifications = [self.query_classifier.classify(question) for question in questions]
+        searched = [i for i, classification in enumerate(classifications) if classification['needs_retrieval']]
+        
+        vectors = await run_in_pool(self.vectorstore.embed_texts, [questions[i] for i in searched])
+        query_embeddings: List[Optional[List[float]]] = [None] * len(questions)
+        for i, vector in zip(searched, vectors):
+            query_embeddings[i] = vector
+        
+        results = await self.retriever.aretrieve_and_rank_many(query_embeddings, classifications, k=5)
+        
+        return [
+            {'query_embedding': query_embedding, 'retrieval_result': result} if query_embedding is not None else None
+            for query_embedding, result in zip(query_embeddings, results)
+        ]
+    
+    async def _ainvoke_llm(
+        self,
+        messages: List[Any],
+        user_id: Optional[str],
+        deadline: float,
+        tier: str
+    ) -> Optional[str]:
+        """
+        Call the tier's chat model within the deadline, hedging a slow call.
+        
+        The hedge needs a second admission slot that is free right away, so
+        hedging never exceeds the concurrency cap or jumps the queue; a call
+        refused for rate limits is not re-sent.
+        
+        Returns:
+            The model's answer, or None if the breaker is open, no slot freed
+            up in time, or the model failed or ran out of time
+            
+        Raises:
+            AdmissionRejected: If the LLM wait queue is full
+        """
+        if deadline <= time.monotonic() or not self.llm_breaker.allow():
+            return None
+        
+        llm = self.model_router.get_llm(tier)
+        
+        def hedge() -> Optional[asyncio.Future]:
+            if not self.admission.try_acquire():
+                return None
+            attempt = asyncio.ensure_future(llm.ainvoke(messages))
+            attempt.add_done_callback(lambda _: self.admission.release())
+            return attempt
+        
+        try:
+            async with self.admission.slot(user_id, timeout=deadline - time.monotonic()):
+                started = time.monotonic()
+                try:
+                    response = await hedged_call(
+                        lambda: llm.ainvoke(messages),
+                        deadline - time.monotonic(),
+                        self.hedge_after,
+                        hedge_call=hedge,
+                        retryable=lambda error: not is_rate_limited(error)
+                    )
+                except Exception as e:
+                    self.llm_breaker.record_failure()
+                    print(f"⚠ LLM call failed ({type(e).__name__}), answering from the excerpts")
+                    return None
+        except asyncio.TimeoutError:
+            # Queued for the whole budget; the provider is not at fault
+            return None
+        
+        self.llm_breaker.record_success()
+        self.model_router.record(tier, time.monotonic() - started, getattr(response, 'usage_metadata', None))
+        return response.content
+    
+    async def astream_query(
+        self, 
+        question: str, 
+        conversation_id: Optional[str] = None,
+        message_count: Optional[int] = None,
+        user_id: Optional[str] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream an answer token by token.
+        
+        Yields a 'metadata' event with sources, misconception flag and related
+        questions before the first token, then one 'token' event per chunk
+        from the model, and a 'usage' event with token counts if the model
+        answered. If the deadline or a provider error cut the answer off, a
+        'truncated' event comes before 'usage' and the answer is not cached.
+        Conversation memory is updated with whatever was generated, even if
+        the consumer stops early.
+        
+        Args:
+            question: User's question
+            conversation_id: Unique conversation identifier for memory
+            message_count: Messages already stored for the conversation
+            user_id: User asking, for fair scheduling of LLM calls
+            
+        Yields:
+            Event dictionaries with 'event' and 'data' keys
+            
+        Raises:
+            AdmissionRejected: If the LLM wait queue is full
+        """
+        deadline = time.monotonic() + self.deadline_seconds
+        turn = await self._aprepare_turn(question, conversation_id, message_count, deadline=deadline)
+        needs_retrieval = turn['retrieval_result']['needs_retrieval']
+        
+        yield {
+            'event': 'metadata',
+            'data': {
+                'sources': turn['sources'],
+                'needs_retrieval': needs_retrieval,
+                'misconception_detected': turn['misconception']['misconception_detected'],
+                'related_questions': self._generate_related_questions(turn['retrieval_result']),
+                'conversation_id': conversation_id
+            }
+        }
+        
+        answer_parts = []
+        try:
+            if turn['prepared_answer'] is not None:
+                if turn.get('fallback'):
+                    self.fallback_answers += 1
+                answer_parts.append(turn['prepared_answer'])
+                yield {'event': 'token', 'data': {'content': turn['prepared_answer']}}
+            else:
+                stream_state = {'complete': False, 'cut_off_by': None}
+                async for content in self._astream_llm(turn['messages'], user_id, deadline, turn['tier'], stream_state):
+                    answer_parts.append(content)
+                    yield {'event': 'token', 'data': {'content': content}}
+                
+                if answer_parts:
+                    if stream_state['complete']:
+                        await self._acache_answer(question, turn, ''.join(answer_parts))
+                    else:
+                        self.truncated_answers += 1
+                        yield {'event': 'truncated', 'data': {'reason': stream_state['cut_off_by']}}
+                    yield {'event': 'usage', 'data': self._token_usage(turn, ''.join(answer_parts))}
+                else:
+                    self.fallback_answers += 1
+                    answer_parts.append(turn['fallback_answer'])
+                    yield {'event': 'token', 'data': {'content': turn['fallback_answer']}}
+        finally:
+            if answer_parts:
+                self._update_conversation_history(conversation_id, question, ''.join(answer_parts))
+                if message_count is not None:
+                    self.summarizer.schedule(conversation_id, message_count + 2)
+    
+    async def _astream_llm(
+        self,
+        messages: List[Any],
+        user_id: Optional[str],
+        deadline: float,
+        tier: str,
+        state: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[str]:
+        """
+        Stream the tier's chat model answer until the deadline.
+        
+        Streams are not hedged. Nothing is yielded if the breaker is open, no
+        slot freed up in time, or the model failed before its first token;
+        a stream cut short by the deadline ends with what was generated.
+        
+        Args:
+            messages: Prompt messages
+            user_id: User asking, for fair scheduling
+            deadline: time.monotonic() by which the answer must be done
+            tier: Model tier to answer with
+            state: Dictionary updated with 'complete' (the model finished
+                its answer) and 'cut_off_by' ('deadline' or 'error')
+        
+        Raises:
+            AdmissionRejected: If the LLM wait queue is full
+        """
+        state = state if state is not None else {}
+        state['complete'] = False
+        if deadline <= time.monotonic() or not self.llm_breaker.allow():
+            return
+        
+        try:
+            async with self.admission.slot(user_id, timeout=deadline - time.monotonic()):
+                started = time.monotonic()
+                usage = None
+                stream = self.model_router.get_llm(tier).astream(messages).__aiter__()
+                try:
+                    while True:
+                        chunk = await asyncio.wait_for(stream.__anext__(), deadline - time.monotonic())
+                        # Providers that report usage send it on the last chunk
+                        usage = getattr(chunk, 'usage_metadata', None) or usage
+                        if chunk.content:
+                            yield chunk.content
+                except StopAsyncIteration:
+                    state['complete'] = True
+                except asyncio.TimeoutError:
+                    # Cut by our own deadline: keep what was generated and
+                    # leave the breaker alone, the provider did not fail
+                    state['cut_off_by'] = 'deadline'
+                    return
+                except Exception as e:
+                    self.llm_breaker.record_failure()
+                    state['cut_off_by'] = 'error'
+                    print(f"⚠ LLM stream failed ({type(e).__name__})")
+                    return
+                finally:
+                    await stream.aclose()
+        except asyncio.TimeoutError:
+            return
+        
+        self.llm_breaker.record_success()
+        self.model_router.record(tier, time.monotonic() - started, usage)
+    
+    async def _aprepare_turn(
+        self,
+        question: str,
+        conversation_id: Optional[str],
+        message_count: Optional[int] = None,
+        prefetched: Optional[Dict[str, Any]] = None,
+        deadline: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """
+        Run retrieval and misconception checks and build the prompt.
+        
+        Suggested questions are answered from the pre-generated FAQ store,
+        income tax calculations from locally computed figures, and
+        standalone questions are looked up in the semantic answer cache; on
+        a hit, retrieval and prompt building are skipped. Questions from a
+        batch arrive with their embedding and retrieval result already
+        computed (see aprefetch_batch). If retrieval is not done by the
+        deadline, the turn carries a holding answer and 'fallback' set.
+        
+        Returns:
+            Dictionary with prompt messages, sources, retrieval result,
+            misconception info, an answer that needs no LLM call (None
+            if the LLM must answer) and, when the LLM must answer, a
+            fallback answer for when it cannot
+        """
+        classification = self.query_classifier.classify(question)
+        misconception = self.misconception_detector.describe(classification['misconception'])
+        corpus_version = self.vectorstore.corpus_version
+        
+        # Suggestions are clicked mid-conversation, so serve them regardless of history
+        faq = self.faq_store.get(question, corpus_version) if self.faq_store else None
+        if faq is not None:
+            return {
+                'messages': None,
+                'sources': faq['sources'],
+                'retrieval_result': {
+                    'needs_retrieval': True,
+                    'query_embedding': None,
+                    'topic': classification['topic']
+                },
+                'misconception': misconception,
+                'prepared_answer': faq['answer'],
+                'cacheable': False,
+                'corpus_version': corpus_version
+            }
+        
+        calculation_turn = self._calculation_turn(question, classification)
+        if calculation_turn is not None:
+            return {**calculation_turn, 'corpus_version': corpus_version}
+        
+        # A cache miss hydrates from the database, so keep it off the event loop
+        history = await run_in_pool(self._get_conversation_history, conversation_id, message_count)
+        
+        # Retrieval shares the request's latency budget; past it the turn
+        # answers that it cannot help right now instead of waiting on a
+        # saturated pool
+        try:
+            retrieved = await asyncio.wait_for(
+                self._aretrieve_context(
+                    question, classification, misconception, history, prefetched or {}, corpus_version
+                ),
+                timeout=max(deadline - time.monotonic(), 0) if deadline is not None else None
+            )
+        except asyncio.TimeoutError:
+            print("⚠ Retrieval passed the deadline, answering without it")
+            return {
+                'messages': None,
+                'sources': [],
+                'retrieval_result': {
+                    'needs_retrieval': True,
+                    'query_embedding': None,
+                    'topic': classification['topic']
+                },
+                'misconception': misconception,
+                'prepared_answer': self.source_formatter.create_extractive_answer([]),
+                'fallback': True,
+                'cacheable': False,
+                'corpus_version': corpus_version
+            }
+        
+        if retrieved['cached_turn'] is not None:
+            return retrieved['cached_turn']
+        
+        retrieval_result = retrieved['retrieval_result']
+        misconception = retrieved['misconception']
+        packed = retrieved['packed']
+        cacheable = retrieved['cacheable']
+        
+        prepared_answer = None
+        if not retrieval_result['needs_retrieval']:
+            # Greetings and thanks get a template; only ambiguous ones reach the LLM
+            prepared_answer = self.small_talk.respond(question, has_history=bool(history))
+            components = self._prompt_components(question, history)
+            sources = []
+            fallback_answer = self.small_talk.fallback(question)
+        else:
+            components = self._prompt_components(question, history, packed['context'], misconception)
+            sources = self.source_formatter.create_source_references(
+                packed['documents']
             )
+            fallback_answer = self.source_formatter.create_extractive_answer(packed['documents'])
         
+        tier = prompt_tokens = None
+        if prepared_answer is None:
+            signals = extract_signals(
+                question, classification, retrieval_result, len(history),
+                misconception=misconception['misconception_detected']
+            )
+            tier = self.model_router.route(signals)
+            prompt_tokens = self._count_prompt_tokens(components, tier)
+        
+        return {
+            'messages': self._flatten_prompt(components),
+            'sources': sources,
+            'retrieval_result': retrieval_result,
+            'misconception': misconception,
+            'prepared_answer': prepared_answer,
+            'fallback_answer': fallback_answer,
+            'tier': tier,
+            'prompt_tokens': prompt_tokens,
+            'cacheable': cacheable and retrieval_result['needs_retrieval'],
+            'corpus_version': corpus_version
+        }
+    
+    async def _aretrieve_context(
+        self,
+        question: str,
+        classification: Dict[str, Any],
+        misconception: Dict[str, Any],
+        history: List[Any],
+        prefetched: Dict[str, Any],
+        corpus_version: str
+    ) -> Dict[str, Any]:
+        """
+        Embed, look up the answer cache, retrieve and pack the context for a turn.
+        
+        Returns:
+            Dictionary with the turn to return on an answer cache hit (None
+            on a miss), the retrieval result, the packed context (None if
+            no retrieval is needed), the misconception info updated from
+            the semantic bank and whether the answer can be cached
+        """
+        # Embed once; the answer cache, retrieval, compression and the
+        # misconception and related-question banks all reuse the embedding
+        query_embedding = None
+        related_questions = None
+        if classification['needs_retrieval']:
+            query_embedding, semantic = await run_in_pool(
+                self._embed_question, question, prefetched.get('query_embedding')
+            )
+            related_questions = semantic['related_questions']
+            misconception = self.misconception_detector.describe(
+                classification['misconception'] or semantic['misconception']
+            )
+        
+        # Answers only depend on the question when there is no history
+        cacheable = (
+            self.answer_cache is not None
+            and not history
+            and classification['needs_retrieval']
+        )
+        
+        if cacheable:
+            cached = self.answer_cache.lookup(query_embedding, corpus_version)
+            if cached is not None:
+                return {
+                    'cached_turn': {
+                        'messages': None,
+                        'sources': cached['sources'],
+                        'retrieval_result': {
+                            'needs_retrieval': True,
+                            'query_embedding': query_embedding,
+                            'topic': classification['topic'],
+                            'related_questions': related_questions
+                        },
+                        'misconception': misconception,
+                        'prepared_answer': cached['answer'],
+                        'cacheable': False,
+                        'corpus_version': corpus_version
+                    }
+                }
+        
+        if prefetched.get('retrieval_result') is not None:
+            retrieval_result = dict(prefetched['retrieval_result'])
+        else:
+            retrieval_result = await self.retriever.aretrieve_and_rank(
+                question, k=5, query_embedding=query_embedding, classification=classification
+            )
+        retrieval_result['related_questions'] = related_questions
+        
+        packed = None
+        if retrieval_result['needs_retrieval']:
+            # Sentence compression embeds text, so keep it off the event loop
+            packed = await run_in_pool(
+                self.retriever.pack_context,
+                retrieval_result['documents'],
+                retrieval_result['query_embedding']
+            )
+        
+        return {
+            'cached_turn': None,
+            'retrieval_result': retrieval_result,
+            'packed': packed,
+            'misconception': misconception,
+            'cacheable': cacheable
+        }
+    
+    def _embed_question(self, question: str, query_embedding: Optional[List[float]] = None) -> tuple:
+        """Embed a question (unless given) and match it against the semantic banks, returning (embedding, matches)."""
+        if query_embedding is None:
+            query_embedding = self.vectorstore.embed_query(question)
+        return query_embedding, self.semantic_matcher.match(query_embedding, question)
+    
+    def _calculation_turn(self, question: str, classification: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Answer an income tax calculation without retrieval.
+        
+        Args:
+            question: User's question
+            classification: Result of QueryClassifier.classify for the question
+        
+        Returns:
+            Turn dictionary with either a templated answer or a short prompt
+            carrying the precomputed figures, or None if the question is not
+            a calculation
+        """
+        # A known misconception needs the bills to correct it, not just figures
+        if classification['misconception']:
+            return None
+        
+        calculation = detect_calculation(question)
+        if calculation is None:
+            return None
+        
+        result = self.calculator.calculate(calculation)
+        rendered = self.calculator.render(calculation, result)
+        
+        if self.calculator.mode == 'llm':
+            messages = self.calculator.build_messages(question, calculation, result)
+            prepared_answer = None
+            tier = self.model_router.route(extract_signals(question, classification, {}, 0))
+            # The figures travel with the question in the final message
+            prompt_tokens = self._count_prompt_tokens({'system': messages[:-1], 'question': messages[-1:]}, tier)
+        else:
+            messages = None
+            prepared_answer = rendered
+            tier = prompt_tokens = None
+        
+        return {
+            'messages': messages,
+            'sources': [],
+            # Calculations are about income tax even without a topic keyword
+            'retrieval_result': {
+                'needs_retrieval': False,
+                'query_embedding': None,
+                'topic': classification['topic'] or 'income'
+            },
+            'misconception': self.misconception_detector.describe(classification['misconception']),
+            'prepared_answer': prepared_answer,
+            # The templated answer stands in if the LLM cannot explain the figures
+            'fallback_answer': rendered,
+            'tier': tier,
+            'prompt_tokens': prompt_tokens,
+            'cacheable': False,
+            'calculation': result
+        }
+    
+    async def _acache_answer(self, question: str, turn: Dict[str, Any], answer: str):
+        """Store a freshly generated answer to a standalone question."""
+        if not turn['cacheable'] or not answer:
+            return
+        
+        await run_in_pool(
+            self.answer_cache.store,
+            turn['retrieval_result']['query_embedding'],
+            turn['corpus_version'],
+            question,
+            answer,
+            turn['sources']
+        )
+    
+    def _build_response(
+        self,
+        question: str,
+        conversation_id: Optional[str],
+        answer: str,
+        sources: List[Dict[str, str]],
+        retrieval_result: Dict[str, Any],
+        misconception: Dict[str, Any],
+        message_count: Optional[int] = None,
+        usage: Optional[Dict[str, Any]] = None,
+        fallback: bool = False
+    ) -> Dict[str, Any]:
+        """Update memory and assemble the response dictionary."""
         # Step 5: Update conversation memory (KEY RUBRIC REQUIREMENT)
         self._update_conversation_history(conversation_id, question, answer)
+        if message_count is not None:
+            self.summarizer.schedule(conversation_id, message_count + 2)
         
         # Step 6: Generate related questions
-        related_questions = self._generate_related_questions(question, retrieval_result['needs_retrieval'])
+        related_questions = self._generate_related_questions(retrieval_result)
         
         return {
             'answer': answer,
@@ -203,19 +934,25 @@ Goal: Every Nigerian, regardless of education level, should be able to understan
             'needs_retrieval': retrieval_result['needs_retrieval'],
             'misconception_detected': misconception['misconception_detected'],
             'related_questions': related_questions,
-            'conversation_id': conversation_id
+            'conversation_id': conversation_id,
+            'usage': usage,
+            'fallback': fallback
         }
     
     def _handle_casual_conversation(self, question: str, history: List[Any]) -> Dict[str, str]:
         """Handle greetings and casual conversation without retrieval."""
-        messages = [SystemMessage(content=self.system_prompt)]
-        messages.extend(history[-6:])  # Last 3 turns
-        messages.append(HumanMessage(content=question))
+        reply = self.small_talk.respond(question, has_history=bool(history))
+        if reply is not None:
+            return {'answer': reply}
         
-        response = self.llm.invoke(messages)
+        response = self.llm.invoke(self._build_casual_messages(question, history))
         
         return {'answer': response.content}
     
+    def _build_casual_messages(self, question: str, history: List[Any]) -> List[Any]:
+        """Build the prompt for casual conversation."""
+        return self._flatten_prompt(self._prompt_components(question, history))
+    
     def _generate_answer_with_context(
         self, 
         question: str, 
@@ -224,49 +961,141 @@ Goal: Every Nigerian, regardless of education level, should be able to understan
         misconception: Dict[str, Any]
     ) -> str:
         """Generate answer using retrieved context."""
-        # Build prompt with context
-        prompt_parts = [SystemMessage(content=self.system_prompt)]
+        response = self.llm.invoke(
+            self._build_context_messages(question, context, history, misconception)
+        )
+        
+        return response.content
+    
+    def _build_context_messages(
+        self, 
+        question: str, 
+        context: str, 
+        history: List[Any],
+        misconception: Dict[str, Any]
+    ) -> List[Any]:
+        """Build the prompt for answering with retrieved context."""
+        return self._flatten_prompt(self._prompt_components(question, history, context, misconception))
+    
+    def _prompt_components(
+        self,
+        question: str,
+        history: List[Any],
+        context: Optional[str] = None,
+        misconception: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, List[Any]]:
+        """
+        Build the prompt messages by component (see PROMPT_COMPONENTS).
         
-        # Add recent conversation history
-        if history:
-            prompt_parts.extend(history[-6:])  # Last 3 turns
+        The static system prompt comes first and the conversation follows,
+        so consecutive turns share a growing prefix; the per-question parts
+        (excerpts, misconception alert and the question) come last.
         
-        # Add misconception alert if detected
-        if misconception['misconception_detected']:
-            misconception_note = f"""
-ALERT: This query may contain a common misconception.
-Misconception: {misconception['misconception_type']}
-Truth: {misconception['truth']}
-Context: {misconception['context']}
-
-Please address this misconception in your response.
-"""
-            prompt_parts.append(SystemMessage(content=misconception_note))
+        Args:
+            question: User's question
+            history: Conversation summary and recent messages
+            context: Retrieved excerpts, or None for casual conversation
+            misconception: Result of MisconceptionDetector.describe
+            
+        Returns:
+            Messages per component, in prompt order
+        """
+        components = {
+            'system': [SystemMessage(content=self.system_prompt)],
+            'history': list(history),
+            'context': [],
+            'misconception': [],
+            'question': [HumanMessage(content=question)]
+        }
         
-        # Add retrieved context
-        context_message = f"""
+        if context is not None:
+            context_message = f"""
 Here are relevant excerpts from the Nigerian Tax Reform Bills to help answer the question:
 
 {context}
 
 Please use this information to provide an accurate answer. Always cite the specific bill, section, and page when referencing information.
 """
-        prompt_parts.append(SystemMessage(content=context_message))
+            components['context'].append(SystemMessage(content=context_message))
         
-        # Add user question
-        prompt_parts.append(HumanMessage(content=question))
+        if misconception and misconception['misconception_detected']:
+            misconception_note = f"""
+ALERT: This query may contain a common misconception.
+Misconception: {misconception['misconception_type']}
+Truth: {misconception['truth']}
+Context: {misconception['context']}
+
+Please address this misconception in your response.
+"""
+            components['misconception'].append(SystemMessage(content=misconception_note))
         
-        # Generate response
-        response = self.llm.invoke(prompt_parts)
+        return components
+    
+    @staticmethod
+    def _flatten_prompt(components: Dict[str, List[Any]]) -> List[Any]:
+        """Join prompt components into the message list, in prompt order."""
+        return [message for name in PROMPT_COMPONENTS for message in components.get(name, [])]
+    
+    def _count_prompt_tokens(self, components: Dict[str, List[Any]], tier: str) -> Dict[str, int]:
+        """Count each prompt component's tokens with the tier model's tokenizer."""
+        model = self.model_router.get_model(tier)
+        counts = {
+            name: count_message_tokens(components.get(name, []), model)
+            for name in PROMPT_COMPONENTS if name != 'system'
+        }
+        # System prompts are fixed strings, so their counts are memoized
+        counts['system'] = sum(
+            count_static_tokens(message.content, model) + TOKENS_PER_MESSAGE
+            for message in components.get('system', [])
+        )
+        return counts
+    
+    def _token_usage(self, turn: Dict[str, Any], answer: str) -> Dict[str, Any]:
+        """
+        Token usage of an LLM-answered turn, as stored on the assistant message.
         
-        return response.content
+        Returns:
+            Dictionary with 'model', 'prompt_tokens', 'completion_tokens' and
+            '<component>_tokens' for each prompt component
+        """
+        model = self.model_router.get_model(turn['tier'])
+        components = turn['prompt_tokens']
+        return {
+            'model': model,
+            'prompt_tokens': sum(components.values()) + REPLY_PRIMING_TOKENS,
+            'completion_tokens': count_tokens(answer, model),
+            **{f"{name}_tokens": components.get(name, 0) for name in PROMPT_COMPONENTS}
+        }
     
-    def _get_conversation_history(self, conversation_id: Optional[str]) -> List[Any]:
-        """Retrieve conversation history for memory."""
-        if not conversation_id or conversation_id not in self.conversations:
+    def _get_conversation_history(
+        self,
+        conversation_id: Optional[str],
+        message_count: Optional[int] = None
+    ) -> List[Any]:
+        """
+        Retrieve prompt-ready conversation history.
+        
+        Returns the running summary of older turns (if any) as a system
+        message, followed by the messages not yet folded into it, so prompt
+        size stays flat however long the conversation gets.
+        """
+        if not conversation_id:
             return []
         
-        return self.conversations[conversation_id]
+        history = self.memory.get_history(conversation_id, message_count)
+        summary = self.memory.get_summary(conversation_id)
+        window = self.summarizer.window
+        
+        if not summary:
+            return history[-window:]
+        
+        unsummarized = window
+        if message_count is not None:
+            unsummarized = max(window, message_count - summary['summarized_count'])
+        
+        return [
+            SystemMessage(content=f"Summary of the earlier conversation:\n{summary['text']}")
+        ] + history[-unsummarized:]
     
     def _update_conversation_history(
         self, 
@@ -275,69 +1104,34 @@ Please use this information to provide an accurate answer. Always cite the speci
         answer: str
     ):
         """Update conversation memory."""
-        if not conversation_id:
-            return
-        
-        if conversation_id not in self.conversations:
-            self.conversations[conversation_id] = []
-        
-        # Add to history
-        self.conversations[conversation_id].append(HumanMessage(content=question))
-        self.conversations[conversation_id].append(AIMessage(content=answer))
-        
-        # Keep only last 20 messages (10 turns)
-        if len(self.conversations[conversation_id]) > 20:
-            self.conversations[conversation_id] = self.conversations[conversation_id][-20:]
+        self.memory.append(conversation_id, question, answer)
     
-    def _generate_related_questions(self, question: str, used_retrieval: bool) -> List[str]:
+    def _generate_related_questions(self, retrieval_result: Dict[str, Any]) -> List[str]:
         """Generate related follow-up questions."""
-        if not used_retrieval:
-            return [
-                "What are the Nigerian Tax Reform Bills about?",
-                "When do the new tax laws take effect?",
-                "How will the reforms affect me?"
-            ]
-        
-        # Context-aware suggestions
-        question_lower = question.lower()
-        
-        if 'vat' in question_lower:
-            return [
-                "How does the new VAT derivation formula work?",
-                "Which states benefit most from VAT reforms?",
-                "What is the current VAT rate?"
-            ]
-        elif 'income' in question_lower or 'paye' in question_lower:
-            return [
-                "What are the new income tax brackets?",
-                "How do I calculate my income tax?",
-                "Are there any tax reliefs available?"
-            ]
-        elif 'business' in question_lower or 'small business' in question_lower:
-            return [
-                "What exemptions exist for small businesses?",
-                "How will this affect my small business?",
-                "What is the turnover threshold for exemptions?"
-            ]
+        # Nearest neighbours of the query embedding, when the question was embedded
+        if retrieval_result.get('related_questions'):
+            return list(retrieval_result['related_questions'])
+        
+        # Otherwise by classified topic (calculations skip retrieval but have a topic)
+        topic = retrieval_result.get('topic')
+        
+        if topic is not None:
+            return list(RELATED_QUESTIONS[topic])
+        elif not retrieval_result['needs_retrieval']:
+            return list(RELATED_QUESTIONS['casual'])
         else:
-            return [
-                "What are the main changes in the tax reform?",
-                "When does implementation begin?",
-                "How can I prepare for the changes?"
-            ]
+            return list(RELATED_QUESTIONS['general'])
     
     def clear_conversation(self, conversation_id: str):
         """Clear conversation history for a specific conversation."""
-        if conversation_id in self.conversations:
-            del self.conversations[conversation_id]
+        self.memory.clear(conversation_id)
     
     def get_conversation_summary(self, conversation_id: str) -> Dict[str, Any]:
         """Get summary of a conversation."""
-        if conversation_id not in self.conversations:
+        history = self.memory.get_history(conversation_id)
+        if not history:
             return {'exists': False}
         
-        history = self.conversations[conversation_id]
-        
         return {
             'exists': True,
             'message_count': len(history),
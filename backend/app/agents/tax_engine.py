@@ -0,0 +1,386 @@
+"""
+Vectorized income tax calculations for many incomes at once.
+"""
+import os
+import re
+import csv
+import json
+from functools import lru_cache
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Personal income tax bands as (band width, rate); the last band is unbounded
+PITA_BRACKETS: List[Tuple[float, float]] = [
+    (300000, 0.07),    # First 300k at 7%
+    (300000, 0.11),    # Next 300k at 11%
+    (500000, 0.15),    # Next 500k at 15%
+    (500000, 0.19),    # Next 500k at 19%
+    (1600000, 0.21),   # Next 1.6M at 21%
+    (float('inf'), 0.24)  # Above 3.2M at 24%
+]
+
+# Nigeria Tax Bill 2024 personal income tax bands
+NTB_2024_BRACKETS: List[Tuple[float, float]] = [
+    (800000, 0.0),      # First 800k exempt
+    (2200000, 0.15),    # Next 2.2M at 15%
+    (9000000, 0.18),    # Next 9M at 18%
+    (13000000, 0.21),   # Next 13M at 21%
+    (25000000, 0.23),   # Next 25M at 23%
+    (float('inf'), 0.25)  # Above 50M at 25%
+]
+
+# Bracket tables by version; the old regime and the reform are compared by default
+BRACKET_TABLES: Dict[str, List[Tuple[float, float]]] = {
+    'pita-2011': PITA_BRACKETS,
+    'ntb-2024': NTB_2024_BRACKETS
+}
+CURRENT_TABLE = 'pita-2011'
+REFORM_TABLE = 'ntb-2024'
+
+# Largest income grid a scenario may request
+MAX_GRID_POINTS = 2000
+
+# Rows handed to NumPy at a time when streaming a payroll file
+BATCH_CHUNK_ROWS = 50000
+
+NUMBER_PATTERN = re.compile(r"-?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?")
+
+# CSV incomes may group thousands with commas ("1,200,000" when quoted)
+GROUPED_NUMBER_PATTERN = re.compile(r"-?\d{1,3}(?:,\d{3})+(?:\.\d+)?")
+
+JSON_NUMBER_PATTERN = re.compile(rb"-?(?:0|[1-9]\d*)(?:\.\d+)?(?:[eE][-+]?\d+)?")
+
+JSON_WHITESPACE = b" \t\r\n"
+
+
+def _band_arrays(brackets: List[Tuple[float, float]]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Convert (width, rate) bands to lower bounds, widths and rates."""
+    widths = np.array([width for width, _ in brackets], dtype=np.float64)
+    rates = np.array([rate for _, rate in brackets], dtype=np.float64)
+    lower = np.concatenate(([0.0], np.cumsum(widths[:-1])))
+    return lower, widths, rates
+
+
+def compute_income_tax_batch(
+    incomes: np.ndarray,
+    brackets: List[Tuple[float, float]] = PITA_BRACKETS
+) -> Dict[str, np.ndarray]:
+    """
+    Compute progressive income tax for many annual incomes in one pass.
+    
+    Args:
+        incomes: 1-D array of annual incomes in Naira
+        brackets: Tax bands as (band width, rate)
+    
+    Returns:
+        Dictionary of arrays: 'tax', 'effective_rate' (percent) and
+        'breakdown' (rows x bands matrix of tax paid in each band)
+    """
+    incomes = np.asarray(incomes, dtype=np.float64)
+    lower, widths, rates = _band_arrays(brackets)
+    
+    # Income falling in each band: rows x bands
+    taxable = np.clip(incomes[:, None] - lower[None, :], 0.0, widths[None, :])
+    breakdown = taxable * rates[None, :]
+    tax = breakdown.sum(axis=1)
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        effective_rate = np.where(incomes > 0, tax / incomes * 100, 0.0)
+    
+    return {
+        'tax': tax,
+        'effective_rate': effective_rate,
+        'breakdown': breakdown
+    }
+
+
+def get_brackets(version: str) -> List[Tuple[float, float]]:
+    """
+    Get a bracket table by version.
+    
+    Raises:
+        ValueError: If the version is unknown
+    """
+    if version not in BRACKET_TABLES:
+        raise ValueError(f"Unknown bracket table '{version}' (available: {', '.join(BRACKET_TABLES)})")
+    return BRACKET_TABLES[version]
+
+
+@lru_cache(maxsize=int(os.getenv("TAX_SCENARIO_CACHE_SIZE", "256")))
+def compare_regimes(
+    old_version: str,
+    new_version: str,
+    start: float,
+    stop: float,
+    points: int
+) -> Dict[str, Any]:
+    """
+    Compare two bracket tables over an evenly spaced income grid.
+    
+    Results are memoized by (table versions, grid spec), so repeated chart
+    loads are served without recomputing. Callers must not mutate them.
+    
+    Args:
+        old_version: Bracket table of the current regime
+        new_version: Bracket table of the proposed regime
+        start: Lowest annual income on the grid
+        stop: Highest annual income on the grid
+        points: Number of grid points
+    
+    Returns:
+        Dictionary with the grid, per-point tax and effective rate under
+        each regime, and the change in tax (new minus old)
+    
+    Raises:
+        ValueError: If a version is unknown or the grid is invalid
+    """
+    if not 2 <= points <= MAX_GRID_POINTS:
+        raise ValueError(f"points must be between 2 and {MAX_GRID_POINTS}")
+    if start < 0 or stop <= start:
+        raise ValueError("Grid must satisfy 0 <= start < stop")
+    
+    incomes = np.linspace(start, stop, points)
+    old = compute_income_tax_batch(incomes, get_brackets(old_version))
+    new = compute_income_tax_batch(incomes, get_brackets(new_version))
+    
+    return {
+        'old_version': old_version,
+        'new_version': new_version,
+        'income': np.round(incomes, 2).tolist(),
+        'old_tax': np.round(old['tax'], 2).tolist(),
+        'new_tax': np.round(new['tax'], 2).tolist(),
+        'old_effective_rate': np.round(old['effective_rate'], 2).tolist(),
+        'new_effective_rate': np.round(new['effective_rate'], 2).tolist(),
+        'delta': np.round(new['tax'] - old['tax'], 2).tolist()
+    }
+
+
+def summarize_batch(results: Dict[str, np.ndarray], incomes: np.ndarray) -> Dict[str, float]:
+    """
+    Aggregate a computed batch into running totals.
+    
+    Args:
+        results: Output of compute_income_tax_batch
+        incomes: The incomes the batch was computed for
+    
+    Returns:
+        Totals that can be added across chunks
+    """
+    return {
+        'rows': int(incomes.shape[0]),
+        'total_income': float(incomes.sum()),
+        'total_tax': float(results['tax'].sum()),
+        'band_totals': results['breakdown'].sum(axis=0).tolist()
+    }
+
+
+def merge_summaries(total: Optional[Dict], part: Dict) -> Dict:
+    """Add one chunk's summary into a running total."""
+    if total is None:
+        return dict(part)
+    return {
+        'rows': total['rows'] + part['rows'],
+        'total_income': total['total_income'] + part['total_income'],
+        'total_tax': total['total_tax'] + part['total_tax'],
+        'band_totals': [a + b for a, b in zip(total['band_totals'], part['band_totals'])]
+    }
+
+
+async def iter_json_incomes(
+    body: AsyncIterator[bytes],
+    chunk_rows: int = BATCH_CHUNK_ROWS
+) -> AsyncIterator[np.ndarray]:
+    """
+    Parse a streamed JSON array of numbers into chunks of incomes.
+    
+    Args:
+        body: Request body chunks
+        chunk_rows: Incomes per yielded array
+    
+    Yields:
+        Arrays of at most chunk_rows incomes
+    
+    Raises:
+        ValueError: If the body is not a JSON array of numbers
+    """
+    pending = b""
+    values: List[float] = []
+    started = False
+    closed = False
+    elements_read = 0
+    
+    async for data in body:
+        pending += data
+        if not started:
+            stripped = pending.lstrip(JSON_WHITESPACE)
+            if not stripped:
+                continue
+            if not stripped.startswith(b"["):
+                raise ValueError("JSON body must be an array of annual incomes")
+            pending = stripped[1:]
+            started = True
+        
+        if closed:
+            if pending.strip(JSON_WHITESPACE):
+                raise ValueError("Unexpected data after the JSON array")
+            pending = b""
+            continue
+        
+        end = pending.find(b"]")
+        if end >= 0:
+            elements = pending[:end].split(b",")
+            trailing = pending[end + 1:]
+            # An empty array has no elements rather than one blank one
+            if elements_read == 0 and elements == [elements[0]] and not elements[0].strip(JSON_WHITESPACE):
+                elements = []
+        else:
+            # Keep a trailing partial number for the next chunk
+            elements = pending.split(b",")
+            pending = elements.pop()
+        
+        # Elements are checked first, so a nested array is reported as such
+        values.extend(_parse_json_numbers(elements))
+        elements_read += len(elements)
+        
+        if end >= 0:
+            if trailing.strip(JSON_WHITESPACE):
+                raise ValueError("Unexpected data after the JSON array")
+            pending = b""
+            closed = True
+        
+        while len(values) >= chunk_rows:
+            yield np.array(values[:chunk_rows], dtype=np.float64)
+            values = values[chunk_rows:]
+    
+    if not started:
+        raise ValueError("JSON body must be an array of annual incomes")
+    if not closed:
+        raise ValueError("JSON array is not closed")
+    if values:
+        yield np.array(values, dtype=np.float64)
+
+
+def _parse_json_numbers(elements: List[bytes]) -> List[float]:
+    """Parse comma-separated elements of a JSON array, each of which must be one number."""
+    numbers = []
+    for element in elements:
+        element = element.strip(JSON_WHITESPACE)
+        if not JSON_NUMBER_PATTERN.fullmatch(element):
+            raise ValueError("JSON array may only contain numbers")
+        numbers.append(float(element))
+    return numbers
+
+
+async def iter_csv_incomes(
+    body: AsyncIterator[bytes],
+    column: Optional[str] = None,
+    chunk_rows: int = BATCH_CHUNK_ROWS
+) -> AsyncIterator[np.ndarray]:
+    """
+    Parse a streamed CSV file into chunks of incomes.
+    
+    The income column is chosen by name from the header row, defaulting to
+    'annual_income' or the first column. A file without a header is read
+    from its first column. Incomes may be quoted and group thousands with
+    commas ("1,200,000").
+    
+    Args:
+        body: Request body chunks
+        column: Name of the income column
+        chunk_rows: Incomes per yielded array
+    
+    Yields:
+        Arrays of at most chunk_rows incomes
+    
+    Raises:
+        ValueError: If a row has no valid income
+    """
+    pending = b""
+    index: Optional[int] = None
+    values: List[float] = []
+    line_number = 0
+    
+    async for data in body:
+        pending += data
+        cut = pending.rfind(b"\n")
+        if cut < 0:
+            continue
+        complete, pending = pending[:cut], pending[cut + 1:]
+        
+        # A newline never falls inside a UTF-8 sequence, so complete lines decode on their own
+        for fields in csv.reader(complete.decode("utf-8", "replace").split("\n")):
+            line_number += 1
+            index = _read_csv_row(fields, line_number, index, column, values)
+        
+        while len(values) >= chunk_rows:
+            yield np.array(values[:chunk_rows], dtype=np.float64)
+            values = values[chunk_rows:]
+    
+    if pending.strip():
+        for fields in csv.reader([pending.decode("utf-8", "replace")]):
+            _read_csv_row(fields, line_number + 1, index, column, values)
+    if values:
+        yield np.array(values, dtype=np.float64)
+
+
+def _read_csv_row(fields: List[str], line_number: int, index: Optional[int], column: Optional[str], values: List[float]) -> int:
+    """Append the income in one parsed CSV row to values; returns the column index."""
+    if not fields or (len(fields) == 1 and not fields[0].strip()):
+        return index
+    
+    if index is None:
+        header = [field.strip().lower() for field in fields]
+        wanted = (column or "annual_income").lower()
+        if wanted in header:
+            return header.index(wanted)
+        if column:
+            raise ValueError(f"Column '{column}' not found in CSV header")
+        index = 0
+        # No recognizable header: the first line is data if it is a number
+        if _parse_csv_number(fields[0].strip()) is None:
+            return index
+    
+    income = _parse_csv_number(fields[index].strip()) if index < len(fields) else None
+    if income is None:
+        raise ValueError(f"Line {line_number}: no valid income in column {index + 1}")
+    values.append(income)
+    return index
+
+
+def _parse_csv_number(field: str) -> Optional[float]:
+    """Parse a CSV income, allowing thousands separators; None if it is not a number."""
+    if GROUPED_NUMBER_PATTERN.fullmatch(field):
+        field = field.replace(",", "")
+    if not NUMBER_PATTERN.fullmatch(field):
+        return None
+    return float(field)
+
+
+def format_csv_rows(incomes: np.ndarray, results: Dict[str, np.ndarray]) -> str:
+    """Format a computed batch as CSV lines (no header)."""
+    columns = np.column_stack((incomes, results['tax'], results['effective_rate'], results['breakdown']))
+    row_format = ",".join(["%.2f"] * columns.shape[1])
+    return "\n".join([row_format % tuple(row) for row in columns.tolist()]) + "\n"
+
+
+def format_json_rows(incomes: np.ndarray, results: Dict[str, np.ndarray]) -> List[str]:
+    """Format a computed batch as JSON objects, one string per row."""
+    tax = np.round(results['tax'], 2).tolist()
+    rate = np.round(results['effective_rate'], 2).tolist()
+    breakdown = np.round(results['breakdown'], 2).tolist()
+    return [
+        json.dumps({
+            'annual_income': income,
+            'tax': row_tax,
+            'effective_rate': row_rate,
+            'breakdown': row_breakdown
+        })
+        for income, row_tax, row_rate, row_breakdown in zip(incomes.tolist(), tax, rate, breakdown)
+    ]
+
+
+def csv_header(brackets: List[Tuple[float, float]] = PITA_BRACKETS) -> str:
+    """CSV header matching format_csv_rows."""
+    bands = [f"band_{i + 1}_{rate * 100:g}pct" for i, (_, rate) in enumerate(brackets)]
+    return ",".join(['annual_income', 'tax', 'effective_rate'] + bands) + "\n"
@@ -1,10 +1,15 @@
 """
 Agent tools for enhanced capabilities.
 """
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from langchain_core.tools import Tool, tool
 from langchain_core.documents import Document
 
+from app.agents.tax_engine import CURRENT_TABLE, REFORM_TABLE, get_brackets, compare_regimes
+from app.agents.vat_engine import allocate_vat_scenarios, build_scenario_inputs
+from app.rag.query_classifier import QueryClassifier
+
+
 class TaxCalculatorTool:
     """Tool for tax-related calculations."""
     
@@ -33,69 +38,158 @@ class TaxCalculatorTool:
         }
     
     @staticmethod
-    def estimate_income_tax(annual_income: float) -> Dict[str, Any]:
+    def allocate_vat_all_states(
+        states: List[Dict[str, Any]],
+        scenarios: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Allocate the states' VAT pool across all 36 states and the FCT.
+        
+        Args:
+            states: One dict per state with 'state', 'population' and 'consumption'
+            scenarios: Scenario specs (formula or weights, optional pool and
+                per-state overrides; see build_scenario_inputs)
+            
+        Returns:
+            Per-scenario allocations for every state (see allocate_vat_scenarios)
+        """
+        return allocate_vat_scenarios(*build_scenario_inputs(states, scenarios))
+    
+    @staticmethod
+    def estimate_income_tax(annual_income: float, table_version: str = CURRENT_TABLE) -> Dict[str, Any]:
         """
         Estimate income tax based on progressive rates.
         Note: This is a simplified calculation for demonstration.
         
         Args:
             annual_income: Annual income in Naira
+            table_version: Bracket table to apply ('pita-2011' or 'ntb-2024')
             
         Returns:
             Dictionary with tax calculation
         """
-        # Simplified progressive tax brackets (example rates)
-        brackets = [
-            (300000, 0.07),    # First 300k at 7%
-            (300000, 0.11),    # Next 300k at 11%
-            (500000, 0.15),    # Next 500k at 15%
-            (500000, 0.19),    # Next 500k at 19%
-            (1600000, 0.21),   # Next 1.6M at 21%
-            (float('inf'), 0.24)  # Above 3.2M at 24%
-        ]
-        
         tax = 0
         remaining = annual_income
+        breakdown = []
         
-        for bracket_limit, rate in brackets:
+        for bracket_limit, rate in get_brackets(table_version):
             if remaining <= 0:
                 break
             
             taxable = min(remaining, bracket_limit)
             tax += taxable * rate
             remaining -= taxable
+            breakdown.append({
+                'taxable': round(taxable, 2),
+                'rate': rate,
+                'tax': round(taxable * rate, 2)
+            })
         
         return {
             'annual_income': annual_income,
+            'table_version': table_version,
             'estimated_tax': round(tax, 2),
+            'breakdown': breakdown,
             'effective_rate': round((tax / annual_income * 100) if annual_income > 0 else 0, 2),
             'note': 'This is a simplified calculation. Actual tax may vary based on reliefs and allowances.'
         }
+    
+    @staticmethod
+    def compare_income_tax_regimes(
+        start: float,
+        stop: float,
+        points: int,
+        old_version: str = CURRENT_TABLE,
+        new_version: str = REFORM_TABLE
+    ) -> Dict[str, Any]:
+        """
+        Compare income tax under two bracket tables over an income grid.
+        
+        Args:
+            start: Lowest annual income in Naira
+            stop: Highest annual income in Naira
+            points: Number of evenly spaced incomes
+            old_version: Bracket table of the current regime
+            new_version: Bracket table of the reform
+            
+        Returns:
+            Per-point tax, effective rate and change in tax (see compare_regimes)
+        """
+        return compare_regimes(old_version, new_version, float(start), float(stop), int(points))
 
 
 class MisconceptionDetector:
     """Detect and clarify common misconceptions."""
     
-    # Common misconceptions about the tax reforms
+    # Common misconceptions about the tax reforms; the examples are phrasings
+    # matched by query embedding (see SemanticMatcher)
     MISCONCEPTIONS = {
         '50% tax': {
             'truth': 'The highest income tax rate remains 24%, not 50%. This is a misconception.',
-            'context': 'Progressive tax rates apply to different income brackets, not your entire income.'
+            'context': 'Progressive tax rates apply to different income brackets, not your entire income.',
+            'examples': [
+                "Will the new law tax my income at 50%?",
+                "Is the government going to take half of my salary as tax?",
+                "Is the top income tax rate now fifty percent?"
+            ],
+            'neutral': [
+                "What is the top income tax rate?",
+                "What are the income tax rates under the reform?",
+                "How much of my salary will go to tax?"
+            ]
         },
         'north destruction': {
             'truth': 'The VAT derivation formula includes consumption, headquarters location, and equality components to ensure fairness.',
-            'context': 'All states receive base allocation plus derivation based on economic activity.'
+            'context': 'All states receive base allocation plus derivation based on economic activity.',
+            'examples': [
+                "Will the VAT reform destroy the northern states?",
+                "Is the new VAT sharing formula designed to impoverish the north?",
+                "Will northern states lose their VAT revenue to Lagos?"
+            ],
+            'neutral': [
+                "How is VAT revenue shared between the states?",
+                "How much VAT revenue do northern states receive?",
+                "What does the derivation formula mean for my state?"
+            ]
         },
         'small business collapse': {
             'truth': 'Small businesses with turnover below ₦50 million are exempt from many new requirements.',
-            'context': 'The reforms include specific protections for small and medium enterprises.'
+            'context': 'The reforms include specific protections for small and medium enterprises.',
+            'examples': [
+                "Will the new taxes kill small businesses?",
+                "Are small businesses going to collapse because of the reform?",
+                "Will my small shop be forced to close by the new taxes?"
+            ],
+            'neutral': [
+                "Do small businesses pay company income tax?",
+                "What taxes will my small shop pay?",
+                "What do the new taxes mean for small businesses?"
+            ]
         },
         'immediate effect': {
             'truth': 'The reforms take effect on January 1, 2026, giving businesses and individuals time to prepare.',
-            'context': 'There is a transition period for implementation.'
+            'context': 'There is a transition period for implementation.',
+            'examples': [
+                "Do the new tax laws start immediately?",
+                "Will I start paying the new taxes from tomorrow?",
+                "Do the reforms take effect right away?"
+            ],
+            'neutral': [
+                "When will the new tax laws start?",
+                "Is there a transition period for the reforms?",
+                "When do I start paying the new taxes?"
+            ]
         }
     }
     
+    # Shared classifier for detect_misconception, built on first use
+    _classifier: Optional[QueryClassifier] = None
+    
+    @classmethod
+    def create_classifier(cls) -> QueryClassifier:
+        """Create a query classifier that also matches these misconceptions."""
+        return QueryClassifier(misconception_keys=list(cls.MISCONCEPTIONS))
+    
     @staticmethod
     def detect_misconception(query: str) -> Dict[str, Any]:
         """
@@ -107,18 +201,34 @@ class MisconceptionDetector:
         Returns:
             Dictionary with misconception info if detected
         """
-        query_lower = query.lower()
+        if MisconceptionDetector._classifier is None:
+            MisconceptionDetector._classifier = MisconceptionDetector.create_classifier()
         
-        for key, info in MisconceptionDetector.MISCONCEPTIONS.items():
-            if key.replace(' ', '') in query_lower.replace(' ', ''):
-                return {
-                    'misconception_detected': True,
-                    'misconception_type': key,
-                    'truth': info['truth'],
-                    'context': info['context']
-                }
+        return MisconceptionDetector.describe(
+            MisconceptionDetector._classifier.classify(query)['misconception']
+        )
+    
+    @staticmethod
+    def describe(misconception_type: Optional[str]) -> Dict[str, Any]:
+        """
+        Build the misconception info for a classified query.
         
-        return {'misconception_detected': False}
+        Args:
+            misconception_type: Misconception key from QueryClassifier, or None
+            
+        Returns:
+            Dictionary with misconception info if detected
+        """
+        if misconception_type is None:
+            return {'misconception_detected': False}
+        
+        info = MisconceptionDetector.MISCONCEPTIONS[misconception_type]
+        return {
+            'misconception_detected': True,
+            'misconception_type': misconception_type,
+            'truth': info['truth'],
+            'context': info['context']
+        }
 
 
 class SourceFormatter:
@@ -196,6 +306,42 @@ class SourceFormatter:
                 seen.add(key)
         
         return references
+    
+    @staticmethod
+    def create_extractive_answer(
+        documents: List[Document],
+        max_excerpts: int = 3,
+        max_chars: int = 400
+    ) -> str:
+        """
+        Build an answer from the top retrieved excerpts, for when the LLM
+        cannot answer in time.
+        
+        Args:
+            documents: Retrieved documents, most relevant first
+            max_excerpts: Excerpts to quote
+            max_chars: Longest excerpt, cut at a sentence end where possible
+            
+        Returns:
+            Answer quoting the excerpts with their citations
+        """
+        if not documents:
+            return "I can't answer that fully right now. Please try again in a moment."
+        
+        lines = ["I can't put together a full explanation right now, so here is what the tax bills say:"]
+        for idx, doc in enumerate(documents[:max_excerpts], 1):
+            excerpt = " ".join(doc.page_content.split())
+            if len(excerpt) > max_chars:
+                cut = excerpt[:max_chars]
+                sentence_end = cut.rfind(". ")
+                excerpt = cut[:sentence_end + 1] if sentence_end > max_chars // 2 else cut.rstrip() + "..."
+            
+            source = SourceFormatter.create_source_references([doc])[0]
+            citation = f"{source['bill_name']}, Section: {source['section']}, Page: {source['page']}"
+            lines.append(f"{idx}. \"{excerpt}\" ({citation})")
+        
+        lines.append("Please ask again shortly for a simpler explanation.")
+        return "\n\n".join(lines)
 
 
 def create_agent_tools(vectorstore=None) -> List[Tool]:
@@ -0,0 +1,215 @@
+"""
+Vectorized VAT allocation across all states for many scenarios at once.
+"""
+import os
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# The 36 states and the Federal Capital Territory
+NIGERIAN_STATES: List[str] = [
+    "Abia", "Adamawa", "Akwa Ibom", "Anambra", "Bauchi", "Bayelsa", "Benue", "Borno",
+    "Cross River", "Delta", "Ebonyi", "Edo", "Ekiti", "Enugu", "Gombe", "Imo",
+    "Jigawa", "Kaduna", "Kano", "Katsina", "Kebbi", "Kogi", "Kwara", "Lagos",
+    "Nasarawa", "Niger", "Ogun", "Ondo", "Osun", "Oyo", "Plateau", "Rivers",
+    "Sokoto", "Taraba", "Yobe", "Zamfara", "FCT"
+]
+
+# Allocation components, in the order weights are given
+VAT_COMPONENTS = ('equality', 'population', 'consumption')
+
+# Weights of the states' VAT pool by formula
+VAT_FORMULAS: Dict[str, Tuple[float, float, float]] = {
+    'current': (0.50, 0.30, 0.20),   # 50% equality, 30% population, 20% derivation
+    'ntb-2024': (0.50, 0.20, 0.30)   # Reform: derivation (consumption) raised to 30%
+}
+
+# Most scenarios one request may batch
+MAX_VAT_SCENARIOS = 50
+
+
+def normalize_state(name: str) -> str:
+    """Map a state name to its entry in NIGERIAN_STATES, e.g. 'akwa-ibom' -> 'Akwa Ibom'."""
+    key = name.lower().replace("-", " ").replace(" state", "").strip()
+    if key in ("fct", "abuja", "federal capital territory", "fct abuja"):
+        return "FCT"
+    for state in NIGERIAN_STATES:
+        if state.lower() == key:
+            return state
+    raise ValueError(f"Unknown state '{name}'")
+
+
+def allocate_vat(
+    population: np.ndarray,
+    consumption: np.ndarray,
+    weights: np.ndarray,
+    pool: Optional[np.ndarray] = None
+) -> Dict[str, np.ndarray]:
+    """
+    Allocate the states' VAT pool for every scenario in one pass.
+    
+    Each state gets an equal part of the equality component, a part of the
+    population component in proportion to its population, and a part of the
+    consumption (derivation) component in proportion to its consumption.
+    
+    Args:
+        population: scenarios x states population matrix
+        consumption: scenarios x states consumption matrix
+        weights: scenarios x 3 component weights (equality, population,
+            consumption), each row summing to 1
+        pool: Amount to share out per scenario, or None for shares only
+    
+    Returns:
+        Dictionary of scenarios x states arrays: 'equality', 'population' and
+        'consumption' (each component's contribution to the share), 'share'
+        (fraction of the pool) and 'amount' (if pool is given)
+    
+    Raises:
+        ValueError: If inputs are negative or a scenario has no population
+            or consumption
+    """
+    population = np.atleast_2d(np.asarray(population, dtype=np.float64))
+    consumption = np.atleast_2d(np.asarray(consumption, dtype=np.float64))
+    weights = np.atleast_2d(np.asarray(weights, dtype=np.float64))
+    
+    if (population < 0).any() or (consumption < 0).any():
+        raise ValueError("Population and consumption cannot be negative")
+    
+    population_totals = population.sum(axis=1, keepdims=True)
+    consumption_totals = consumption.sum(axis=1, keepdims=True)
+    if (population_totals <= 0).any() or (consumption_totals <= 0).any():
+        raise ValueError("Total population and total consumption must be positive")
+    
+    states = population.shape[1]
+    components = {
+        'equality': np.broadcast_to(weights[:, 0:1] / states, population.shape),
+        'population': weights[:, 1:2] * population / population_totals,
+        'consumption': weights[:, 2:3] * consumption / consumption_totals
+    }
+    share = components['equality'] + components['population'] + components['consumption']
+    
+    results = {**components, 'share': share}
+    if pool is not None:
+        results['amount'] = share * np.asarray(pool, dtype=np.float64).reshape(-1, 1)
+    return results
+
+
+@lru_cache(maxsize=int(os.getenv("VAT_ALLOCATION_CACHE_SIZE", "128")))
+def allocate_vat_scenarios(
+    states: Tuple[str, ...],
+    population: Tuple[Tuple[float, ...], ...],
+    consumption: Tuple[Tuple[float, ...], ...],
+    scenarios: Tuple[Tuple[str, Tuple[float, float, float], Optional[float]], ...]
+) -> List[Dict[str, Any]]:
+    """
+    Allocate VAT for a batch of scenarios, memoized on the exact inputs.
+    
+    Arguments are tuples so identical requests hit the cache; callers must
+    not mutate the result.
+    
+    Args:
+        states: State names, in the column order of the inputs
+        population: Population row per scenario
+        consumption: Consumption row per scenario
+        scenarios: (name, component weights, pool or None) per scenario
+    
+    Returns:
+        One dictionary per scenario with its weights, pool and per-state
+        allocation (component contributions and share in percent, amount)
+    """
+    weights = np.array([scenario[1] for scenario in scenarios])
+    # Scenarios without a pool get NaN amounts, reported as None
+    pools = np.array([np.nan if scenario[2] is None else scenario[2] for scenario in scenarios])
+    
+    results = allocate_vat(np.array(population), np.array(consumption), weights, pools)
+    
+    percent = {key: np.round(results[key] * 100, 4).tolist() for key in VAT_COMPONENTS + ('share',)}
+    amounts = np.round(results['amount'], 2).tolist()
+    
+    output = []
+    for i, (name, scenario_weights, pool) in enumerate(scenarios):
+        allocations = [
+            {
+                'state': state,
+                'equality': percent['equality'][i][j],
+                'population': percent['population'][i][j],
+                'consumption': percent['consumption'][i][j],
+                'share': percent['share'][i][j],
+                'amount': None if pool is None else amounts[i][j]
+            }
+            for j, state in enumerate(states)
+        ]
+        output.append({
+            'name': name,
+            'weights': dict(zip(VAT_COMPONENTS, scenario_weights)),
+            'pool': pool,
+            'allocations': allocations
+        })
+    return output
+
+
+def build_scenario_inputs(
+    states: Sequence[Dict[str, Any]],
+    scenarios: Sequence[Dict[str, Any]]
+) -> Tuple[tuple, tuple, tuple, tuple]:
+    """
+    Turn state rows and scenario specs into the cache key of allocate_vat_scenarios.
+    
+    Args:
+        states: One dict per state with 'state', 'population' and 'consumption'
+        scenarios: Dicts with 'name', either 'formula' or 'weights'
+            (equality, population, consumption), optional 'pool' and optional
+            'population' / 'consumption' overrides keyed by state name
+    
+    Returns:
+        (states, population, consumption, scenarios) tuples
+    
+    Raises:
+        ValueError: If states are missing or repeated, or a scenario is invalid
+    """
+    by_state = {}
+    for row in states:
+        state = normalize_state(row['state'])
+        if state in by_state:
+            raise ValueError(f"State '{state}' is listed more than once")
+        by_state[state] = (float(row['population']), float(row['consumption']))
+    
+    missing = [state for state in NIGERIAN_STATES if state not in by_state]
+    if missing:
+        raise ValueError(f"Missing states: {', '.join(missing)}")
+    if not 1 <= len(scenarios) <= MAX_VAT_SCENARIOS:
+        raise ValueError(f"Between 1 and {MAX_VAT_SCENARIOS} scenarios are allowed")
+    
+    base_population = [by_state[state][0] for state in NIGERIAN_STATES]
+    base_consumption = [by_state[state][1] for state in NIGERIAN_STATES]
+    
+    population_rows, consumption_rows, specs = [], [], []
+    for i, scenario in enumerate(scenarios):
+        if scenario.get('weights') is not None:
+            name = scenario.get('name') or f"scenario_{i + 1}"
+            weights = tuple(float(w) for w in scenario['weights'])
+        else:
+            formula = scenario.get('formula') or 'current'
+            if formula not in VAT_FORMULAS:
+                raise ValueError(f"Unknown VAT formula '{formula}' (available: {', '.join(VAT_FORMULAS)})")
+            name = scenario.get('name') or formula
+            weights = VAT_FORMULAS[formula]
+        
+        if len(weights) != 3 or min(weights) < 0 or abs(sum(weights) - 1) > 1e-6:
+            raise ValueError(f"{name}: weights must be three non-negative numbers summing to 1")
+        
+        population_rows.append(_apply_overrides(base_population, scenario.get('population')))
+        consumption_rows.append(_apply_overrides(base_consumption, scenario.get('consumption')))
+        pool = scenario.get('pool')
+        specs.append((name, weights, float(pool) if pool is not None else None))
+    
+    return tuple(NIGERIAN_STATES), tuple(population_rows), tuple(consumption_rows), tuple(specs)
+
+
+def _apply_overrides(base: List[float], overrides: Optional[Dict[str, float]]) -> Tuple[float, ...]:
+    """Copy a state row, replacing the values of overridden states."""
+    row = list(base)
+    for name, value in (overrides or {}).items():
+        row[NIGERIAN_STATES.index(normalize_state(name))] = float(value)
+    return tuple(row)
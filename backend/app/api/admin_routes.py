@@ -0,0 +1,108 @@
+"""
+Admin routes for corpus management (document upload and indexing jobs)
+"""
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
+from starlette.concurrency import run_in_threadpool
+from pydantic import BaseModel
+from typing import List, Optional
+
+from app.models.database import User
+from app.api.dependencies import get_current_admin_user
+from app.rag.indexing_jobs import IndexingJobManager
+
+router = APIRouter(prefix="/admin", tags=["admin"])
+
+# Global job manager instance (initialized in main.py)
+job_manager: Optional[IndexingJobManager] = None
+
+# Largest PDF accepted for indexing
+MAX_UPLOAD_BYTES = 50 * 1024 * 1024
+
+
+def set_job_manager(manager: IndexingJobManager):
+    """Set the global indexing job manager instance."""
+    global job_manager
+    job_manager = manager
+
+
+class IndexingJob(BaseModel):
+    """Indexing job status model."""
+    job_id: str
+    filename: str
+    sha256: str
+    status: str
+    submitted_by: Optional[str] = None
+    chunk_count: int
+    error: Optional[str] = None
+    corpus_version: Optional[str] = None
+    created_at: str
+    updated_at: str
+
+
+def _require_job_manager() -> IndexingJobManager:
+    if job_manager is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Indexing service not initialized"
+        )
+    return job_manager
+
+
+@router.post("/documents", response_model=IndexingJob, status_code=status.HTTP_202_ACCEPTED)
+async def upload_document(
+    file: UploadFile = File(...),
+    current_user: User = Depends(get_current_admin_user)
+):
+    """
+    Upload a tax bill PDF and index it in the background.
+    Returns immediately with a job that can be polled for status.
+    """
+    manager = _require_job_manager()
+    
+    content = await file.read(MAX_UPLOAD_BYTES + 1)
+    if len(content) > MAX_UPLOAD_BYTES:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"File exceeds {MAX_UPLOAD_BYTES // (1024 * 1024)} MB limit"
+        )
+    
+    try:
+        job = await run_in_threadpool(
+            manager.submit, file.filename, content, submitted_by=current_user.id
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    return IndexingJob(**job)
+
+
+@router.get("/jobs", response_model=List[IndexingJob])
+async def list_jobs(current_user: User = Depends(get_current_admin_user)):
+    """
+    List all indexing jobs, newest first.
+    """
+    manager = _require_job_manager()
+    return [IndexingJob(**job) for job in manager.list_jobs()]
+
+
+@router.get("/jobs/{job_id}", response_model=IndexingJob)
+async def get_job(
+    job_id: str,
+    current_user: User = Depends(get_current_admin_user)
+):
+    """
+    Get status of a specific indexing job.
+    """
+    manager = _require_job_manager()
+    
+    job = manager.get_job(job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
+        )
+    
+    return IndexingJob(**job)
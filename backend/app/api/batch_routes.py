@@ -0,0 +1,190 @@
+"""
+Batch question-answering routes (many questions per job, results as NDJSON)
+"""
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from typing import List, Optional
+
+from app.models.database import User
+from app.api.dependencies import get_current_user
+from app.agents.batch_qa import BatchJobManager, parse_questions
+
+router = APIRouter(prefix="/batch", tags=["batch"])
+
+# Global batch job manager instance (initialized in main.py)
+batch_manager: Optional[BatchJobManager] = None
+
+# Largest question file accepted
+MAX_UPLOAD_BYTES = 5 * 1024 * 1024
+
+
+def set_batch_manager(manager: BatchJobManager):
+    """Set the global batch job manager instance."""
+    global batch_manager
+    batch_manager = manager
+
+
+class BatchJob(BaseModel):
+    """Batch question-answering job status model."""
+    job_id: str
+    status: str
+    total: int
+    completed: int
+    failed: int
+    error: Optional[str] = None
+    created_at: str
+    updated_at: str
+
+
+def _require_batch_manager() -> BatchJobManager:
+    if batch_manager is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Batch service not initialized"
+        )
+    return batch_manager
+
+
+def _get_own_job(manager: BatchJobManager, job_id: str, user: User) -> dict:
+    job = manager.get_job(job_id, user_id=user.id)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
+        )
+    return job
+
+
+@router.post("/jobs", response_model=BatchJob, status_code=status.HTTP_202_ACCEPTED)
+async def submit_batch(
+    request: Request,
+    column: Optional[str] = None,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Submit a file of questions to be answered in the background.
+    
+    The body is a CSV file (Content-Type: text/csv; questions in `column`,
+    a 'question' column or the first column, optional 'id' column) or a JSON
+    array of questions or {"id", "question"} objects. Returns immediately
+    with a job whose results can be streamed from /batch/jobs/{job_id}/results.
+    A user can have BATCH_MAX_ACTIVE_PER_USER jobs queued or running at once.
+    """
+    manager = _require_batch_manager()
+    
+    content = bytearray()
+    async for block in request.stream():
+        content.extend(block)
+        if len(content) > MAX_UPLOAD_BYTES:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"File exceeds {MAX_UPLOAD_BYTES // (1024 * 1024)} MB limit"
+            )
+    
+    try:
+        questions = parse_questions(
+            bytes(content),
+            request.headers.get("content-type", ""),
+            column,
+            max_questions=manager.max_questions
+        )
+        job = await manager.submit(questions, current_user.id)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    return BatchJob(**job)
+
+
+@router.get("/jobs", response_model=List[BatchJob])
+async def list_batches(current_user: User = Depends(get_current_user)):
+    """
+    List the current user's batch jobs, newest first.
+    """
+    manager = _require_batch_manager()
+    return [BatchJob(**job) for job in manager.list_jobs(current_user.id)]
+
+
+@router.get("/jobs/{job_id}", response_model=BatchJob)
+async def get_batch(
+    job_id: str,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Get progress of a batch job.
+    """
+    manager = _require_batch_manager()
+    return BatchJob(**_get_own_job(manager, job_id, current_user))
+
+
+@router.get("/jobs/{job_id}/results")
+async def stream_batch_results(
+    job_id: str,
+    offset: int = 0,
+    follow: bool = True,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Stream a batch job's results as NDJSON, one answer per line in the order
+    they finish.
+    
+    Each line carries the question's id and index, the answer, sources and
+    an error (null unless that question failed), plus the job's progress
+    (completed and total). A failed question asked again on resume gets a
+    new line; the later line replaces the earlier one. With follow (the default) the response stays
+    open until the job stops. A client that lost its connection passes the
+    number of lines it already received as offset to carry on.
+    """
+    manager = _require_batch_manager()
+    _get_own_job(manager, job_id, current_user)
+    
+    if offset < 0:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="offset must not be negative"
+        )
+    
+    return StreamingResponse(
+        manager.follow(job_id, offset=offset, wait=follow),
+        media_type="application/x-ndjson"
+    )
+
+
+@router.post("/jobs/{job_id}/cancel", response_model=BatchJob)
+async def cancel_batch(
+    job_id: str,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Stop a batch job. Results written so far are kept and the job can be resumed.
+    """
+    manager = _require_batch_manager()
+    _get_own_job(manager, job_id, current_user)
+    return BatchJob(**await manager.cancel(job_id))
+
+
+@router.post("/jobs/{job_id}/resume", response_model=BatchJob)
+async def resume_batch(
+    job_id: str,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Restart a cancelled, failed or interrupted (by a server restart) batch
+    job, or a completed one with failed questions. Questions that already
+    have an answer are not answered again; failed ones are.
+    """
+    manager = _require_batch_manager()
+    _get_own_job(manager, job_id, current_user)
+    
+    try:
+        job = await manager.resume(job_id)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    return BatchJob(**job)
@@ -1,30 +1,57 @@
 """
 API routes for chat (with database persistence)
 """
-from fastapi import APIRouter, HTTPException, status, Depends
+from fastapi import APIRouter, HTTPException, status, Depends, Query
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, TYPE_CHECKING
 from sqlalchemy.orm import Session
 from datetime import datetime
 import json
+import anyio
 
-from app.agents.tax_agent import TaxReformAgent
-from app.config.database import get_db
+from app.config.database import get_db, get_db_context
 from app.models.database import User, Conversation, Message
 from app.api.dependencies import get_current_user
+from app.agents.tax_engine import compare_regimes
+from app.agents.vat_engine import allocate_vat_scenarios
+from app.utils.admission import AdmissionRejected
+
+if TYPE_CHECKING:
+    from app.agents.tax_agent import TaxReformAgent
+    from app.agents.suggestions import SuggestionIndex
 
 router = APIRouter()
 
 # Global agent instance (initialized in main.py)
-agent: Optional[TaxReformAgent] = None
+agent: Optional["TaxReformAgent"] = None
+
+# Set if background startup failed, reported by /health
+startup_error: Optional[str] = None
 
+# Typeahead question index (initialized in main.py)
+suggestion_index: Optional["SuggestionIndex"] = None
 
-def set_agent(tax_agent: TaxReformAgent):
+
+def set_agent(tax_agent: "TaxReformAgent"):
     """Set the global agent instance."""
     global agent
     agent = tax_agent
 
 
+def set_startup_error(message: str):
+    """Record a startup failure for the health check."""
+    global startup_error
+    startup_error = message
+
+
+def set_suggestion_index(index: "SuggestionIndex"):
+    """Set the global suggestion index."""
+    global suggestion_index
+    suggestion_index = index
+
+
 # Request/Response Models
 class ChatRequest(BaseModel):
     """Request model for chat endpoint."""
@@ -56,6 +83,7 @@ class ChatResponse(BaseModel):
     needs_retrieval: bool
     misconception_detected: bool
     related_questions: List[str]
+    fallback: bool = False
 
 
 class ConversationSummary(BaseModel):
@@ -76,6 +104,107 @@ class ConversationDetail(BaseModel):
     messages: List[Dict[str, Any]]
 
 
+def _check_admission(user: User):
+    """
+    Reject a chat request up front when the LLM queue is already full.
+    
+    Raises:
+        HTTPException: 429 with Retry-After if the user's call would be rejected
+    """
+    if agent.admission.is_saturated(user.id):
+        raise _too_many_requests(agent.admission.retry_after())
+
+
+def _too_many_requests(retry_after: int) -> HTTPException:
+    """Build the 429 response for a rejected LLM call."""
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail="The assistant is busy, please try again shortly",
+        headers={"Retry-After": str(retry_after)}
+    )
+
+
+def _start_turn(db: Session, user: User, question: str, conversation_id: Optional[str]) -> tuple:
+    """
+    Get or create the conversation and stage the user's message.
+    
+    Returns:
+        (conversation, message_count) tuple, where message_count is the
+        number of messages stored before this question
+        
+    Raises:
+        HTTPException: If the conversation does not belong to the user
+    """
+    if conversation_id:
+        conversation = db.query(Conversation).filter(
+            Conversation.id == conversation_id,
+            Conversation.user_id == user.id
+        ).first()
+        
+        if not conversation:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Conversation not found"
+            )
+    else:
+        # Create new conversation
+        conversation = Conversation(
+            user_id=user.id,
+            title="New conversation"  # Will update with first message
+        )
+        db.add(conversation)
+        db.commit()
+        db.refresh(conversation)
+    
+    message_count = db.query(Message).filter(
+        Message.conversation_id == conversation.id
+    ).count()
+    
+    # Save user message to database
+    user_message = Message(
+        conversation_id=conversation.id,
+        role="user",
+        content=question
+    )
+    db.add(user_message)
+    
+    return conversation, message_count
+
+
+def _finish_turn(
+    db: Session,
+    conversation: Conversation,
+    question: str,
+    result: Dict[str, Any],
+    is_first_message: bool
+) -> Message:
+    """Save the assistant's message and update the conversation."""
+    assistant_message = Message(
+        conversation_id=conversation.id,
+        role="assistant",
+        content=result['answer'],
+        sources=json.dumps(result['sources']) if result['sources'] else None,
+        misconception_detected=result.get('misconception_detected', False),
+        related_questions=json.dumps(result.get('related_questions', [])),
+        **(result.get('usage') or {})
+    )
+    db.add(assistant_message)
+    
+    # Update conversation title if first message
+    if conversation.title == "New conversation" and is_first_message:
+        # Use first few words of question as title
+        title = question[:50] + "..." if len(question) > 50 else question
+        conversation.title = title
+    
+    # Update conversation timestamp
+    conversation.updated_at = datetime.utcnow()
+    
+    db.commit()
+    db.refresh(assistant_message)
+    
+    return assistant_message
+
+
 @router.post("/chat", response_model=ChatResponse)
 async def chat(
     request: ChatRequest,
@@ -92,78 +221,25 @@ async def chat(
             detail="AI agent not initialized"
         )
     
+    _check_admission(current_user)
+    
     try:
-        # Get or create conversation
-        if request.conversation_id:
-            conversation = db.query(Conversation).filter(
-                Conversation.id == request.conversation_id,
-                Conversation.user_id == current_user.id
-            ).first()
-            
-            if not conversation:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail="Conversation not found"
-                )
-        else:
-            # Create new conversation
-            conversation = Conversation(
-                user_id=current_user.id,
-                title="New conversation"  # Will update with first message
-            )
-            db.add(conversation)
-            db.commit()
-            db.refresh(conversation)
-        
-        # Save user message to database
-        user_message = Message(
-            conversation_id=conversation.id,
-            role="user",
-            content=request.question
+        # Database work is blocking, so it runs in the threadpool
+        conversation, message_count = await run_in_threadpool(
+            _start_turn, db, current_user, request.question, request.conversation_id
         )
-        db.add(user_message)
-        
-        # Get conversation history for context
-        messages = db.query(Message).filter(
-            Message.conversation_id == conversation.id
-        ).order_by(Message.created_at).limit(20).all()  # Last 20 messages
         
-        # Build history for agent
-        history = []
-        for msg in messages:
-            if msg.role == "user":
-                history.append({"role": "user", "content": msg.content})
-            else:
-                history.append({"role": "assistant", "content": msg.content})
-        
-        # Process query with agent
-        result = agent.process_query(
+        # Process query with agent (history comes from the agent's memory store)
+        result = await agent.aprocess_query(
             question=request.question,
-            conversation_id=conversation.id
-        )
-        
-        # Save assistant message to database
-        assistant_message = Message(
             conversation_id=conversation.id,
-            role="assistant",
-            content=result['answer'],
-            sources=json.dumps(result['sources']) if result['sources'] else None,
-            misconception_detected=result.get('misconception_detected', False),
-            related_questions=json.dumps(result.get('related_questions', []))
+            message_count=message_count,
+            user_id=current_user.id
         )
-        db.add(assistant_message)
         
-        # Update conversation title if first message
-        if conversation.title == "New conversation" and len(messages) == 0:
-            # Use first few words of question as title
-            title = request.question[:50] + "..." if len(request.question) > 50 else request.question
-            conversation.title = title
-        
-        # Update conversation timestamp
-        conversation.updated_at = datetime.utcnow()
-        
-        db.commit()
-        db.refresh(assistant_message)
+        await run_in_threadpool(
+            _finish_turn, db, conversation, request.question, result, message_count == 0
+        )
         
         return ChatResponse(
             answer=result['answer'],
@@ -171,11 +247,15 @@ async def chat(
             conversation_id=conversation.id,
             needs_retrieval=result['needs_retrieval'],
             misconception_detected=result.get('misconception_detected', False),
-            related_questions=result.get('related_questions', [])
+            related_questions=result.get('related_questions', []),
+            fallback=result.get('fallback', False)
         )
     
     except HTTPException:
         raise
+    except AdmissionRejected as e:
+        db.rollback()
+        raise _too_many_requests(e.retry_after)
     except Exception as e:
         db.rollback()
         raise HTTPException(
@@ -184,6 +264,135 @@ async def chat(
         )
 
 
+def _sse_event(event: str, data: Dict[str, Any]) -> str:
+    """Format a server-sent event."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def _save_streamed_turn(
+    conversation_id: str,
+    question: str,
+    result: Dict[str, Any],
+    is_first_message: bool
+) -> Optional[str]:
+    """
+    Persist a streamed answer in its own session.
+    The request's session may already be closed once the stream ends.
+    
+    Returns:
+        ID of the saved assistant message, or None if the conversation was
+        deleted while the answer streamed (nothing is saved)
+    """
+    with get_db_context() as db:
+        conversation = db.query(Conversation).filter(
+            Conversation.id == conversation_id
+        ).first()
+        if conversation is None:
+            return None
+        assistant_message = _finish_turn(db, conversation, question, result, is_first_message)
+        return assistant_message.id
+
+
+@router.post("/chat/stream")
+async def chat_stream(
+    request: ChatRequest,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Send message to AI assistant and stream the answer as server-sent events.
+    
+    Events: 'metadata' (sources, misconception flag, related questions) first,
+    then one 'token' per generated chunk, 'truncated' if the answer was cut
+    off (deadline or model error), 'usage' (token counts) if the model
+    answered, then 'done' with the saved message ID and whether the answer
+    was truncated. The answer is saved when the stream ends, or with
+    whatever was generated if the client disconnects.
+    """
+    if agent is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="AI agent not initialized"
+        )
+    
+    _check_admission(current_user)
+    
+    def start_turn():
+        conversation, message_count = _start_turn(
+            db, current_user, request.question, request.conversation_id
+        )
+        # Commit the question now; the answer is saved from the stream
+        db.commit()
+        return conversation.id, message_count
+    
+    conversation_id, message_count = await run_in_threadpool(start_turn)
+    is_first_message = message_count == 0
+    
+    async def event_stream():
+        metadata = None
+        usage = None
+        answer_parts = []
+        truncated = False
+        saved = False
+        
+        try:
+            async for event in agent.astream_query(
+                request.question, conversation_id, message_count, user_id=current_user.id
+            ):
+                if event['event'] == 'metadata':
+                    metadata = event['data']
+                elif event['event'] == 'token':
+                    answer_parts.append(event['data']['content'])
+                elif event['event'] == 'truncated':
+                    truncated = True
+                elif event['event'] == 'usage':
+                    usage = event['data']
+                yield _sse_event(event['event'], event['data'])
+            
+            message_id = await run_in_threadpool(
+                _save_streamed_turn,
+                conversation_id,
+                request.question,
+                {**metadata, 'answer': ''.join(answer_parts), 'usage': usage},
+                is_first_message
+            )
+            saved = True
+            yield _sse_event('done', {
+                'conversation_id': conversation_id,
+                'message_id': message_id,
+                'truncated': truncated
+            })
+        
+        except AdmissionRejected as e:
+            # Queue filled up after the stream started; the client retries later
+            yield _sse_event('error', {'detail': str(e), 'retry_after': e.retry_after})
+        
+        except Exception as e:
+            if not saved:
+                yield _sse_event('error', {'detail': f"Error processing query: {str(e)}"})
+        
+        finally:
+            # Client disconnected mid-answer: keep what was generated
+            if not saved and metadata is not None and answer_parts:
+                with anyio.CancelScope(shield=True):
+                    await run_in_threadpool(
+                        _save_streamed_turn,
+                        conversation_id,
+                        request.question,
+                        {**metadata, 'answer': ''.join(answer_parts)},
+                        is_first_message
+                    )
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"  # Don't let nginx buffer the stream
+        }
+    )
+
+
 @router.get("/conversations", response_model=List[ConversationSummary])
 async def get_conversations(
     current_user: User = Depends(get_current_user),
@@ -289,6 +498,9 @@ async def delete_conversation(
     db.delete(conversation)
     db.commit()
     
+    if agent is not None:
+        agent.clear_conversation(conversation_id)
+    
     return None
 
 
@@ -314,9 +526,33 @@ async def create_conversation(
     }
 
 
+@router.get("/suggest")
+async def suggest(
+    q: str = Query("", max_length=200, description="Text typed so far"),
+    limit: int = Query(5, ge=1, le=10, description="Maximum suggestions")
+):
+    """
+    Typeahead suggestions for a partly typed question (no auth required).
+    
+    Served from an in-memory prefix index of curated questions and popular
+    past questions, so no database or model work happens per keystroke.
+    """
+    if suggestion_index is None:
+        return {"query": q, "suggestions": []}
+    
+    return {"query": q, "suggestions": suggestion_index.suggest(q, limit)}
+
+
 @router.get("/health")
 async def health_check():
     """Health check endpoint (no auth required)."""
+    if startup_error is not None:
+        return {
+            "status": "unhealthy",
+            "message": f"Startup failed: {startup_error}",
+            "vectorstore_initialized": False
+        }
+    
     if agent is None:
         return {
             "status": "initializing",
@@ -337,4 +573,34 @@ async def health_check():
             "status": "unhealthy",
             "message": f"System error: {str(e)}",
             "vectorstore_initialized": False
-        }
\ No newline at end of file
+        }
+
+
+@router.get("/metrics")
+async def metrics():
+    """Cache and memory statistics (no auth required)."""
+    if agent is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="AI agent not initialized"
+        )
+    
+    return {
+        "corpus_version": agent.vectorstore.corpus_version,
+        "answer_cache": agent.answer_cache.get_stats() if agent.answer_cache else None,
+        "faq_store": agent.faq_store.get_stats() if agent.faq_store else None,
+        "small_talk": agent.small_talk.get_stats(),
+        "semantic_matcher": agent.semantic_matcher.get_stats(),
+        "single_flight": agent.single_flight.get_stats(),
+        "llm_admission": agent.admission.get_stats(),
+        "model_tiers": agent.model_router.get_stats(),
+        "llm_breaker": {
+            **agent.llm_breaker.get_stats(),
+            'fallback_answers': agent.fallback_answers,
+            'truncated_answers': agent.truncated_answers
+        },
+        "conversation_memory": agent.memory.get_stats(),
+        "tax_scenarios": compare_regimes.cache_info()._asdict(),
+        "vat_allocations": allocate_vat_scenarios.cache_info()._asdict(),
+        "suggestions": suggestion_index.get_stats() if suggestion_index else None
+    }
@@ -0,0 +1,289 @@
+"""
+Tax calculation routes (bulk PAYE estimates for payroll files)
+"""
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+import json
+
+import numpy as np
+
+from app.models.database import User
+from app.api.dependencies import get_current_user
+from app.agents.tools import TaxCalculatorTool
+from app.agents.tax_engine import (
+    BRACKET_TABLES,
+    CURRENT_TABLE,
+    REFORM_TABLE,
+    BATCH_CHUNK_ROWS,
+    compute_income_tax_batch,
+    get_brackets,
+    summarize_batch,
+    merge_summaries,
+    iter_csv_incomes,
+    iter_json_incomes,
+    format_csv_rows,
+    format_json_rows,
+    csv_header
+)
+from app.agents.vat_engine import NIGERIAN_STATES, VAT_COMPONENTS, VAT_FORMULAS
+from app.utils.concurrency import run_in_pool
+
+router = APIRouter(prefix="/tax", tags=["tax"])
+
+
+class BatchTaxSummary(BaseModel):
+    """Aggregate result of a bulk PAYE calculation."""
+    table: str
+    rows: int
+    total_income: float
+    total_tax: float
+    effective_rate: float
+    band_totals: List[float]
+
+
+class TaxScenario(BaseModel):
+    """Tax under two bracket tables over an income grid."""
+    old_version: str
+    new_version: str
+    income: List[float]
+    old_tax: List[float]
+    new_tax: List[float]
+    old_effective_rate: List[float]
+    new_effective_rate: List[float]
+    delta: List[float]
+
+
+class StateInput(BaseModel):
+    """Population and consumption of one state."""
+    state: str
+    population: float = Field(..., ge=0)
+    consumption: float = Field(..., ge=0, description="Consumption (VAT derivation) measure")
+
+
+class VATScenarioInput(BaseModel):
+    """One VAT sharing scenario."""
+    name: Optional[str] = None
+    formula: Optional[str] = Field(None, description="Named formula, e.g. 'current' or 'ntb-2024'")
+    weights: Optional[List[float]] = Field(None, description="Equality, population and consumption weights")
+    pool: Optional[float] = Field(None, ge=0, description="Naira amount to share out")
+    population: Optional[Dict[str, float]] = Field(None, description="Population overrides by state")
+    consumption: Optional[Dict[str, float]] = Field(None, description="Consumption overrides by state")
+
+
+class VATAllocationRequest(BaseModel):
+    """Request model for the all-states VAT allocation."""
+    states: List[StateInput] = Field(..., description="All 36 states and the FCT")
+    scenarios: List[VATScenarioInput] = Field(
+        default_factory=lambda: [VATScenarioInput(formula="current"), VATScenarioInput(formula="ntb-2024")]
+    )
+
+
+def _open_incomes(request: Request, column: Optional[str]) -> AsyncIterator[np.ndarray]:
+    """Pick the CSV or JSON parser from the request content type."""
+    content_type = request.headers.get("content-type", "")
+    if "json" in content_type:
+        return iter_json_incomes(request.stream(), BATCH_CHUNK_ROWS)
+    return iter_csv_incomes(request.stream(), column, BATCH_CHUNK_ROWS)
+
+
+def _calculate_chunk(incomes: np.ndarray, output: str, brackets: List[Tuple[float, float]]) -> str:
+    """Compute one chunk and format it as response rows."""
+    results = compute_income_tax_batch(incomes, brackets)
+    if output == "csv":
+        return format_csv_rows(incomes, results)
+    return "\n".join(format_json_rows(incomes, results)) + "\n"
+
+
+def _summarize_chunk(incomes: np.ndarray, brackets: List[Tuple[float, float]]) -> Dict:
+    """Compute one chunk and keep only its totals."""
+    return summarize_batch(compute_income_tax_batch(incomes, brackets), incomes)
+
+
+@router.post("/batch")
+async def calculate_tax_batch(
+    request: Request,
+    output: str = "csv",
+    column: Optional[str] = None,
+    summary_only: bool = False,
+    table: str = REFORM_TABLE,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Estimate PAYE for every annual income in a payroll file.
+    
+    The body is either a CSV file (Content-Type: text/csv; the income column
+    is `column`, 'annual_income' or the first column) or a JSON array of
+    annual incomes. It is read and computed in chunks, so memory stays
+    bounded however many rows are sent. Tax is computed with the reform's
+    bands by default, as in chat answers; run the file again with
+    table=pita-2011 to compare against the current law.
+    
+    Args:
+        request: Incoming request with the payroll body
+        output: 'csv' or 'ndjson' rows in the response
+        column: Name of the income column in a CSV header
+        summary_only: Return only totals instead of one row per income
+        table: Bracket table to apply (see /tax/tables)
+        current_user: Authenticated user
+    
+    Returns:
+        Streamed rows with tax, effective rate and per-band tax, or a
+        BatchTaxSummary when summary_only is set
+    """
+    if output not in ("csv", "ndjson"):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="output must be 'csv' or 'ndjson'"
+        )
+    
+    try:
+        brackets = get_brackets(table)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    
+    chunks = _open_incomes(request, column)
+    
+    # Read the first chunk up front so a malformed file gets a 400
+    try:
+        first = await chunks.__anext__()
+    except StopAsyncIteration:
+        first = None
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    
+    if summary_only:
+        total: Optional[Dict] = None
+        try:
+            if first is not None:
+                total = merge_summaries(total, await run_in_pool(_summarize_chunk, first, brackets))
+            async for incomes in chunks:
+                total = merge_summaries(total, await run_in_pool(_summarize_chunk, incomes, brackets))
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+        
+        if total is None:
+            total = {'rows': 0, 'total_income': 0.0, 'total_tax': 0.0, 'band_totals': [0.0] * len(brackets)}
+        return BatchTaxSummary(
+            table=table,
+            rows=total['rows'],
+            total_income=round(total['total_income'], 2),
+            total_tax=round(total['total_tax'], 2),
+            effective_rate=(
+                round(total['total_tax'] / total['total_income'] * 100, 2)
+                if total['total_income'] > 0 else 0.0
+            ),
+            band_totals=[round(value, 2) for value in total['band_totals']]
+        )
+    
+    async def generate():
+        if output == "csv":
+            yield csv_header(brackets)
+        if first is None:
+            return
+        
+        try:
+            rows = await run_in_pool(_calculate_chunk, first, output, brackets)
+            yield rows
+            async for incomes in chunks:
+                rows = await run_in_pool(_calculate_chunk, incomes, output, brackets)
+                yield rows
+        except ValueError as e:
+            # Headers are already sent; report the bad row in-band
+            if output == "csv":
+                yield f"# error: {str(e)}\n"
+            else:
+                yield json.dumps({'error': str(e)}) + "\n"
+    
+    media_type = "text/csv" if output == "csv" else "application/x-ndjson"
+    return StreamingResponse(generate(), media_type=media_type)
+
+
+
+@router.get("/tables")
+async def list_bracket_tables():
+    """List the available income tax bracket tables (no auth required)."""
+    return {
+        "current": CURRENT_TABLE,
+        "reform": REFORM_TABLE,
+        "tables": {
+            version: [
+                {"band_width": None if width == float('inf') else width, "rate": rate}
+                for width, rate in brackets
+            ]
+            for version, brackets in BRACKET_TABLES.items()
+        }
+    }
+
+
+@router.get("/scenario", response_model=TaxScenario)
+async def tax_scenario(
+    start: float = 0,
+    stop: float = 20000000,
+    points: int = 100,
+    old: str = CURRENT_TABLE,
+    new: str = REFORM_TABLE
+):
+    """
+    Compare income tax under the current regime and the reform (no auth required).
+    
+    Tax is evaluated at `points` evenly spaced annual incomes from `start`
+    to `stop`. Results are cached by table versions and grid, so repeated
+    chart loads do not recompute.
+    
+    Args:
+        start: Lowest annual income in Naira
+        stop: Highest annual income in Naira
+        points: Number of grid points
+        old: Bracket table of the current regime
+        new: Bracket table to compare against
+    
+    Returns:
+        Per-point income, tax and effective rate under each table, and the
+        change in tax (new minus old)
+    """
+    try:
+        return TaxCalculatorTool.compare_income_tax_regimes(start, stop, points, old, new)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+@router.get("/vat/formulas")
+async def list_vat_formulas():
+    """List the VAT sharing formulas and the states they cover (no auth required)."""
+    return {
+        "formulas": {
+            name: dict(zip(VAT_COMPONENTS, weights))
+            for name, weights in VAT_FORMULAS.items()
+        },
+        "states": NIGERIAN_STATES
+    }
+
+
+@router.post("/vat/allocation")
+async def vat_allocation(request: VATAllocationRequest):
+    """
+    Allocate the states' VAT pool across all states for several scenarios (no auth required).
+    
+    Every scenario is computed in one vectorized pass, and identical
+    requests are served from a cache.
+    
+    Args:
+        request: State inputs and scenarios (defaults to the current formula
+            and the reform)
+    
+    Returns:
+        Per-scenario weights and, for every state, each component's
+        contribution, the total share in percent and the amount
+    """
+    try:
+        scenarios = await run_in_pool(
+            TaxCalculatorTool.allocate_vat_all_states,
+            [state.model_dump() for state in request.states],
+            [scenario.model_dump() for scenario in request.scenarios]
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    
+    return {"scenarios": scenarios}
@@ -0,0 +1,200 @@
+"""
+Token usage routes (LLM tokens spent per user, from chat messages and batch jobs)
+"""
+from fastapi import APIRouter, Depends, Query
+from starlette.concurrency import run_in_threadpool
+from pydantic import BaseModel
+from typing import Dict, List, Optional
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from datetime import datetime, timedelta
+
+from app.config.database import get_db
+from app.models.database import User, Conversation, Message, BatchUsage
+from app.api.dependencies import get_current_user, get_current_admin_user
+from app.utils.tokens import PROMPT_COMPONENTS
+
+router = APIRouter(prefix="/usage", tags=["usage"])
+
+
+class ModelUsage(BaseModel):
+    """Tokens spent on one model."""
+    model: str
+    answers: int
+    prompt_tokens: int
+    completion_tokens: int
+
+
+class TokenUsage(BaseModel):
+    """Tokens spent by a user over a period."""
+    user_id: str
+    email: Optional[str] = None
+    since: str
+    answers: int
+    prompt_tokens: int
+    completion_tokens: int
+    total_tokens: int
+    components: Dict[str, int]
+    models: List[ModelUsage]
+
+
+def _usage_columns(model=Message) -> list:
+    """Aggregate columns of Message or BatchUsage: answers, prompt, completion, then one per prompt component."""
+    return [
+        func.count(model.id),
+        func.coalesce(func.sum(model.prompt_tokens), 0),
+        func.coalesce(func.sum(model.completion_tokens), 0)
+    ] + [
+        func.coalesce(func.sum(getattr(model, f"{name}_tokens")), 0) for name in PROMPT_COMPONENTS
+    ]
+
+
+def _usage_query(db: Session, since: datetime, *columns):
+    """Assistant messages answered by the LLM since a date, joined to their conversation."""
+    return (
+        db.query(*columns)
+        .join(Conversation, Message.conversation_id == Conversation.id)
+        .filter(
+            Message.role == 'assistant',
+            Message.prompt_tokens.isnot(None),
+            Message.created_at >= since
+        )
+    )
+
+
+def _batch_usage_query(db: Session, since: datetime, *columns):
+    """Batch questions answered by the LLM since a date."""
+    return db.query(*columns).filter(
+        BatchUsage.prompt_tokens.isnot(None),
+        BatchUsage.created_at >= since
+    )
+
+
+def _add_totals(*totals: tuple) -> tuple:
+    """Add aggregate rows column by column."""
+    return tuple(sum(values) for values in zip(*totals))
+
+
+def _merge_models(rows: list) -> list:
+    """Add (model, answers, prompt, completion) rows of the same model."""
+    merged: Dict[Optional[str], tuple] = {}
+    for model, *totals in rows:
+        merged[model] = _add_totals(merged[model], tuple(totals)) if model in merged else tuple(totals)
+    return [(model, *totals) for model, totals in merged.items()]
+
+
+def _build_usage(user_id: str, email: Optional[str], since: datetime, totals: tuple, models: list) -> TokenUsage:
+    answers, prompt_tokens, completion_tokens = totals[:3]
+    return TokenUsage(
+        user_id=user_id,
+        email=email,
+        since=since.isoformat(),
+        answers=answers,
+        prompt_tokens=prompt_tokens,
+        completion_tokens=completion_tokens,
+        total_tokens=prompt_tokens + completion_tokens,
+        components=dict(zip(PROMPT_COMPONENTS, totals[3:])),
+        models=[
+            ModelUsage(model=model, answers=count, prompt_tokens=prompt, completion_tokens=completion)
+            for model, count, prompt, completion in models
+        ]
+    )
+
+
+def _user_usage(db: Session, user: User, since: datetime) -> TokenUsage:
+    chat_totals = _usage_query(db, since, *_usage_columns()).filter(Conversation.user_id == user.id).one()
+    batch_totals = (
+        _batch_usage_query(db, since, *_usage_columns(BatchUsage))
+        .filter(BatchUsage.user_id == user.id)
+        .one()
+    )
+    models = (
+        _usage_query(db, since, Message.model, *_usage_columns()[:3])
+        .filter(Conversation.user_id == user.id)
+        .group_by(Message.model)
+        .all()
+    ) + (
+        _batch_usage_query(db, since, BatchUsage.model, *_usage_columns(BatchUsage)[:3])
+        .filter(BatchUsage.user_id == user.id)
+        .group_by(BatchUsage.model)
+        .all()
+    )
+    return _build_usage(
+        user.id, user.email, since, _add_totals(tuple(chat_totals), tuple(batch_totals)), _merge_models(models)
+    )
+
+
+def _all_users_usage(db: Session, since: datetime, limit: int) -> List[TokenUsage]:
+    rows = (
+        _usage_query(db, since, Conversation.user_id, User.email, *_usage_columns())
+        .join(User, Conversation.user_id == User.id)
+        .group_by(Conversation.user_id, User.email)
+        .all()
+    ) + (
+        _batch_usage_query(db, since, BatchUsage.user_id, User.email, *_usage_columns(BatchUsage))
+        .join(User, BatchUsage.user_id == User.id)
+        .group_by(BatchUsage.user_id, User.email)
+        .all()
+    )
+    
+    # Chat and batch totals of the same user add up; heaviest users first
+    totals_by_user: Dict[str, tuple] = {}
+    emails: Dict[str, str] = {}
+    for user_id, email, *totals in rows:
+        emails[user_id] = email
+        totals = tuple(totals)
+        totals_by_user[user_id] = (
+            _add_totals(totals_by_user[user_id], totals) if user_id in totals_by_user else totals
+        )
+    user_ids = sorted(totals_by_user, key=lambda user_id: -(totals_by_user[user_id][1] + totals_by_user[user_id][2]))
+    user_ids = user_ids[:limit]
+    
+    models_by_user: Dict[str, list] = {user_id: [] for user_id in user_ids}
+    if user_ids:
+        model_rows = (
+            _usage_query(db, since, Conversation.user_id, Message.model, *_usage_columns()[:3])
+            .filter(Conversation.user_id.in_(user_ids))
+            .group_by(Conversation.user_id, Message.model)
+            .all()
+        ) + (
+            _batch_usage_query(db, since, BatchUsage.user_id, BatchUsage.model, *_usage_columns(BatchUsage)[:3])
+            .filter(BatchUsage.user_id.in_(user_ids))
+            .group_by(BatchUsage.user_id, BatchUsage.model)
+            .all()
+        )
+        for user_id, *model_row in model_rows:
+            models_by_user[user_id].append(model_row)
+    
+    return [
+        _build_usage(user_id, emails[user_id], since, totals_by_user[user_id], _merge_models(models_by_user[user_id]))
+        for user_id in user_ids
+    ]
+
+
+@router.get("", response_model=TokenUsage)
+async def my_usage(
+    days: int = Query(30, ge=1, le=366, description="Period to total, in days"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    LLM tokens spent answering the current user, in chat and batch jobs, by
+    prompt component and model. Answers served from caches or templates cost
+    nothing and are not counted.
+    """
+    since = datetime.utcnow() - timedelta(days=days)
+    return await run_in_threadpool(_user_usage, db, current_user, since)
+
+
+@router.get("/users", response_model=List[TokenUsage])
+async def usage_by_user(
+    days: int = Query(30, ge=1, le=366, description="Period to total, in days"),
+    limit: int = Query(50, ge=1, le=1000, description="Users to return"),
+    current_user: User = Depends(get_current_admin_user),
+    db: Session = Depends(get_db)
+):
+    """
+    LLM tokens spent per user, heaviest users first (admin only).
+    """
+    since = datetime.utcnow() - timedelta(days=days)
+    return await run_in_threadpool(_all_users_usage, db, since, limit)
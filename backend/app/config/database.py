@@ -56,11 +56,62 @@ def get_db_context():
 def init_db():
     """
     Initialize database - create all tables.
-    Run this once on first setup.
+    Safe to run on every start: existing tables get any columns added since
+    they were created (see upgrade_db).
     """
     from app.models.database import Base
     Base.metadata.create_all(bind=engine)
     print("✓ Database tables created successfully")
+    upgrade_db()
+
+
+def upgrade_db():
+    """
+    Add model columns missing from existing tables.
+    
+    create_all only creates missing tables and never alters existing ones,
+    so a database created by an earlier release would fail with "no such
+    column" on the newer columns (users.is_admin, conversations.summary,
+    messages token counts, ...). Each missing column is added with ALTER
+    TABLE, with its constant default for NOT NULL columns. Running it again
+    changes nothing.
+    """
+    from sqlalchemy import inspect, text
+    from app.models.database import Base
+    
+    inspector = inspect(engine)
+    tables = set(inspector.get_table_names())
+    quote = engine.dialect.identifier_preparer.quote
+    added = []
+    
+    with engine.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            if table.name not in tables:
+                continue
+            
+            existing = {column['name'] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                
+                ddl = (
+                    f"ALTER TABLE {quote(table.name)} ADD COLUMN {quote(column.name)} "
+                    f"{column.type.compile(dialect=engine.dialect)}"
+                )
+                default = column.default.arg if column.default is not None and column.default.is_scalar else None
+                if default is not None:
+                    ddl += f" DEFAULT {int(default) if isinstance(default, (bool, int)) else repr(default)}"
+                if not column.nullable:
+                    if default is None:
+                        print(f"✗ Cannot add {table.name}.{column.name}: NOT NULL without a default")
+                        continue
+                    ddl += " NOT NULL"
+                
+                connection.execute(text(ddl))
+                added.append(f"{table.name}.{column.name}")
+    
+    if added:
+        print(f"✓ Added columns to existing tables: {', '.join(added)}")
 
 
 def drop_db():
@@ -20,6 +20,7 @@ class User(Base):
     hashed_password = Column(String(255), nullable=False)
     is_active = Column(Boolean, default=True, nullable=False)
     is_verified = Column(Boolean, default=False, nullable=False)
+    is_admin = Column(Boolean, default=False, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     last_login = Column(DateTime, nullable=True)
@@ -38,6 +39,8 @@ class Conversation(Base):
     id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     user_id = Column(String(36), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     title = Column(String(255), nullable=True)  # Auto-generated from first message
+    summary = Column(Text, nullable=True)  # Running summary of turns older than the prompt window
+    summarized_count = Column(Integer, default=0, nullable=False)  # Messages folded into summary
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -60,6 +63,15 @@ class Message(Base):
     sources = Column(Text, nullable=True)  # JSON string of sources
     misconception_detected = Column(Boolean, default=False)
     related_questions = Column(Text, nullable=True)  # JSON string
+    # Token accounting, set on assistant messages the LLM answered
+    model = Column(String(100), nullable=True)
+    prompt_tokens = Column(Integer, nullable=True)
+    completion_tokens = Column(Integer, nullable=True)
+    system_tokens = Column(Integer, nullable=True)
+    history_tokens = Column(Integer, nullable=True)
+    context_tokens = Column(Integer, nullable=True)
+    misconception_tokens = Column(Integer, nullable=True)
+    question_tokens = Column(Integer, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     
     # Relationships
@@ -81,4 +93,26 @@ class RefreshToken(Base):
     is_revoked = Column(Boolean, default=False, nullable=False)
     
     def __repr__(self):
-        return f"<RefreshToken {self.id}>"
\ No newline at end of file
+        return f"<RefreshToken {self.id}>"
+
+
+class BatchUsage(Base):
+    """Tokens spent on one LLM-answered batch question"""
+    __tablename__ = "batch_usage"
+    
+    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    job_id = Column(String(36), nullable=False, index=True)
+    user_id = Column(String(36), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    # Same token accounting as assistant messages
+    model = Column(String(100), nullable=True)
+    prompt_tokens = Column(Integer, nullable=True)
+    completion_tokens = Column(Integer, nullable=True)
+    system_tokens = Column(Integer, nullable=True)
+    history_tokens = Column(Integer, nullable=True)
+    context_tokens = Column(Integer, nullable=True)
+    misconception_tokens = Column(Integer, nullable=True)
+    question_tokens = Column(Integer, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    
+    def __repr__(self):
+        return f"<BatchUsage {self.id} - job {self.job_id}>"
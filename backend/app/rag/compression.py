@@ -0,0 +1,132 @@
+"""
+Sentence-level extractive compression of retrieved context.
+"""
+import os
+import re
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+from langchain_core.documents import Document
+
+# Split after sentence punctuation or before numbered subsections like "(2)"
+SENTENCE_BOUNDARY = re.compile(r'(?<=[.;:!?])\s+(?=[A-Z0-9(])|\s+(?=\(\d+\)\s)')
+
+# Fragments shorter than this carry no meaning on their own
+MIN_SENTENCE_CHARS = 25
+
+
+def split_sentences(text: str) -> List[str]:
+    """
+    Split chunk text into sentences.
+    
+    Args:
+        text: Chunk text
+    
+    Returns:
+        List of sentences, short fragments merged into their neighbour
+    """
+    sentences = []
+    for part in SENTENCE_BOUNDARY.split(text.strip()):
+        part = part.strip()
+        if not part:
+            continue
+        if sentences and len(part) < MIN_SENTENCE_CHARS:
+            sentences[-1] = f"{sentences[-1]} {part}"
+        else:
+            sentences.append(part)
+    return sentences
+
+
+class SentenceCompressor:
+    """
+    Keep only the sentences of retrieved chunks that best match the query.
+    
+    All sentences are embedded in one batched call and scored against the
+    query embedding computed for retrieval, so compression adds no LLM or
+    extra search round-trips. Kept sentences stay in their original order
+    inside their chunk, and every chunk keeps its citation metadata.
+    """
+    
+    def __init__(self, embed_texts, max_sentences: int = None, min_similarity: float = None):
+        """
+        Initialize compressor.
+        
+        Args:
+            embed_texts: Function mapping a list of texts to embedding vectors
+            max_sentences: Sentences kept across all chunks (COMPRESSION_MAX_SENTENCES)
+            min_similarity: Cosine similarity below which sentences are
+                dropped (COMPRESSION_MIN_SIMILARITY)
+        """
+        self.embed_texts = embed_texts
+        self.max_sentences = max_sentences or int(os.getenv("COMPRESSION_MAX_SENTENCES", "12"))
+        self.min_similarity = (
+            min_similarity if min_similarity is not None
+            else float(os.getenv("COMPRESSION_MIN_SIMILARITY", "0.2"))
+        )
+    
+    def compress(self, documents: List[Document], query_embedding: List[float]) -> List[Document]:
+        """
+        Reduce documents to their most relevant sentences.
+        
+        Args:
+            documents: Retrieved documents, most relevant first
+            query_embedding: Embedding of the user query
+        
+        Returns:
+            Compressed documents in the same order; documents with no
+            relevant sentence are dropped, except the best one
+        """
+        sentences: List[Dict[str, Any]] = []
+        for doc_idx, doc in enumerate(documents):
+            for sent_idx, sentence in enumerate(split_sentences(doc.page_content)):
+                sentences.append({'doc': doc_idx, 'position': sent_idx, 'text': sentence})
+        
+        if len(sentences) <= self.max_sentences:
+            return documents
+        
+        vectors = np.asarray(self.embed_texts([s['text'] for s in sentences]), dtype=np.float32)
+        query = np.asarray(query_embedding, dtype=np.float32)
+        
+        norms = np.linalg.norm(vectors, axis=1) * np.linalg.norm(query)
+        scores = vectors @ query / np.maximum(norms, 1e-12)
+        
+        ranked = np.argsort(-scores)[:self.max_sentences]
+        kept = [int(i) for i in ranked if scores[i] >= self.min_similarity]
+        if not kept:
+            kept = [int(ranked[0])]
+        
+        by_document: Dict[int, List[Dict[str, Any]]] = {}
+        for i in kept:
+            by_document.setdefault(sentences[i]['doc'], []).append(sentences[i])
+        
+        compressed = []
+        for doc_idx, doc in enumerate(documents):
+            selected = by_document.get(doc_idx)
+            if not selected:
+                continue
+            selected.sort(key=lambda s: s['position'])
+            
+            # Mark gaps so the model doesn't read skipped sentences as continuous
+            parts = [selected[0]['text']]
+            for previous, sentence in zip(selected, selected[1:]):
+                parts.append(" " if sentence['position'] == previous['position'] + 1 else " ... ")
+                parts.append(sentence['text'])
+            
+            compressed.append(Document(page_content="".join(parts), metadata=doc.metadata))
+        
+        return compressed
+
+
+def create_compressor(vectorstore) -> Optional[SentenceCompressor]:
+    """
+    Create the compressor if CONTEXT_COMPRESSION is enabled.
+    
+    Args:
+        vectorstore: Vector store whose embedding model embeds sentences
+    
+    Returns:
+        SentenceCompressor, or None when compression is disabled
+    """
+    if os.getenv("CONTEXT_COMPRESSION", "false").lower() not in ("1", "true", "yes"):
+        return None
+    return SentenceCompressor(vectorstore.embed_texts)
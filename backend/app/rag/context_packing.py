@@ -0,0 +1,194 @@
+"""
+Token-budgeted packing of retrieved chunks into an LLM context string.
+"""
+import os
+from typing import List, Dict, Any, Optional, Tuple
+
+from langchain_core.documents import Document
+
+from app.utils.tokens import count_tokens
+
+# Shortest suffix/prefix match treated as chunk overlap rather than coincidence
+MIN_OVERLAP_CHARS = 20
+
+BLOCK_SEPARATOR = "\n---\n"
+
+
+def find_overlap(left: str, right: str, max_overlap: Optional[int] = None) -> int:
+    """
+    Find the longest suffix of left that is also a prefix of right.
+    
+    Args:
+        left: Earlier text
+        right: Following text
+        max_overlap: Longest overlap to look for
+    
+    Returns:
+        Number of overlapping characters (0 if shorter than MIN_OVERLAP_CHARS)
+    """
+    limit = min(len(left), len(right))
+    if max_overlap is not None:
+        limit = min(limit, max_overlap)
+    
+    for size in range(limit, MIN_OVERLAP_CHARS - 1, -1):
+        if left.endswith(right[:size]):
+            return size
+    
+    return 0
+
+
+class ContextPacker:
+    """
+    Merge neighbouring chunks and fill a token budget in score order.
+    
+    Chunks split from the same section share CHUNK_OVERLAP characters with
+    their neighbours, so sending them as-is repeats text. The packer joins
+    adjacent pieces of the same chunk into one span with the overlap removed,
+    drops chunks fully contained in another, and then adds spans best-first
+    until the token budget is spent.
+    """
+    
+    def __init__(self, max_tokens: int = None, model: str = None):
+        """
+        Initialize packer.
+        
+        Args:
+            max_tokens: Token budget for the packed context (CONTEXT_TOKEN_BUDGET)
+            model: Model whose tokenizer measures the budget
+        """
+        self.max_tokens = max_tokens or int(os.getenv("CONTEXT_TOKEN_BUDGET", "1500"))
+        self.model = model
+        self.max_overlap = int(os.getenv("CHUNK_OVERLAP", "200")) * 2
+    
+    def pack(self, documents: List[Document]) -> Dict[str, Any]:
+        """
+        Pack documents into a context string.
+        
+        Args:
+            documents: Retrieved documents, most relevant first
+        
+        Returns:
+            Dictionary with context string, documents that made it into the
+            context (most relevant first) and token count
+        """
+        spans = self._merge_spans(documents)
+        spans.sort(key=lambda span: span['rank'])
+        
+        blocks = []
+        used_documents = []
+        tokens = 0
+        
+        for span in spans:
+            block = self._format_block(len(blocks) + 1, span)
+            block_tokens = count_tokens(block, self.model)
+            if blocks:
+                block_tokens += count_tokens(BLOCK_SEPARATOR, self.model)
+            
+            if tokens + block_tokens > self.max_tokens:
+                if blocks:
+                    # A smaller, lower ranked span may still fit
+                    continue
+                block, block_tokens = self._truncate_block(span)
+            
+            blocks.append(block)
+            used_documents.extend(span['documents'])
+            tokens += block_tokens
+        
+        positions = {id(doc): rank for rank, doc in enumerate(documents)}
+        used_documents.sort(key=lambda doc: positions[id(doc)])
+        
+        return {
+            'context': BLOCK_SEPARATOR.join(blocks),
+            'documents': used_documents,
+            'tokens': tokens
+        }
+    
+    def _merge_spans(self, documents: List[Document]) -> List[Dict[str, Any]]:
+        """
+        Group chunks by bill, page, section and parent chunk and join adjacent
+        pieces.
+        
+        Chunks indexed before pieces carried a parent_id are grouped by their
+        piece count instead, and only joined where their texts overlap, since
+        pieces of different chunks with the same section can otherwise look
+        adjacent.
+        """
+        groups: Dict[Tuple, List[Tuple[int, Document]]] = {}
+        for rank, doc in enumerate(documents):
+            metadata = doc.metadata
+            key = (
+                metadata.get('bill_name', 'Unknown'),
+                metadata.get('page', 'N/A'),
+                metadata.get('section', 'N/A'),
+                metadata.get('parent_id'),
+                metadata.get('total_sub_chunks')
+            )
+            groups.setdefault(key, []).append((rank, doc))
+        
+        spans = []
+        for key, members in groups.items():
+            has_parent = key[3] is not None
+            members.sort(key=lambda member: member[1].metadata.get('sub_chunk_index', 0))
+            
+            current = None
+            for rank, doc in members:
+                text = doc.page_content
+                index = doc.metadata.get('sub_chunk_index')
+                
+                if current is not None:
+                    if text in current['text']:
+                        current['rank'] = min(current['rank'], rank)
+                        current['documents'].append(doc)
+                        continue
+                    
+                    if index is not None and index == current['last_index'] + 1:
+                        overlap = find_overlap(current['text'], text, self.max_overlap)
+                        if overlap or has_parent:
+                            joiner = "" if overlap else " "
+                            current['text'] = current['text'] + joiner + text[overlap:]
+                            current['rank'] = min(current['rank'], rank)
+                            current['last_index'] = index
+                            current['documents'].append(doc)
+                            continue
+                    
+                    spans.append(current)
+                
+                current = {
+                    'text': text,
+                    'metadata': doc.metadata,
+                    'rank': rank,
+                    'last_index': index if index is not None else -2,
+                    'documents': [doc]
+                }
+            
+            if current is not None:
+                spans.append(current)
+        
+        return spans
+    
+    def _format_block(self, idx: int, span: Dict[str, Any], text: str = None) -> str:
+        metadata = span['metadata']
+        return (
+            f"[Source {idx}]\n"
+            f"Bill: {metadata.get('bill_name', 'Unknown')}\n"
+            f"Section: {metadata.get('section', 'N/A')}\n"
+            f"Page: {metadata.get('page', 'N/A')}\n"
+            f"Content: {span['text'] if text is None else text}\n"
+        )
+    
+    def _truncate_block(self, span: Dict[str, Any]) -> Tuple[str, int]:
+        """Cut the best span down to the budget so the context is never empty."""
+        text = span['text']
+        
+        while text:
+            block = self._format_block(1, span, text)
+            block_tokens = count_tokens(block, self.model)
+            if block_tokens <= self.max_tokens:
+                return block, block_tokens
+            
+            # Shrink proportionally to the overshoot, then back up to a word boundary
+            keep = int(len(text) * self.max_tokens / block_tokens) - 1
+            text = text[:max(0, keep)].rsplit(" ", 1)[0]
+        
+        block = self._format_block(1, span, "")
+        return block, count_tokens(block, self.model)
@@ -0,0 +1,262 @@
+"""
+Prebuilt, versioned index artifact for the tax bill corpus.
+
+An artifact is a single file holding everything needed to serve retrieval
+without re-parsing or re-embedding the PDFs:
+
+    MAGIC | header length (8 bytes, little endian) | header JSON | payload
+
+The header records the format version, embedding model, parser version,
+corpus hash and a SHA-256 of the payload. The payload is the float32 vector
+matrix followed by the chunk texts and metadata as JSON.
+"""
+import os
+import json
+import struct
+import hashlib
+from datetime import datetime
+from pathlib import Path
+from typing import List, Dict, Any
+
+import numpy as np
+
+MAGIC = b"TAXIDX\x00\x01"
+FORMAT_VERSION = 1
+
+# Bump whenever document_parser or chunking changes in a way that alters chunks
+PARSER_VERSION = "1"
+
+DEFAULT_ARTIFACT_PATH = "./index/tax_bills.idx"
+
+
+class ArtifactError(ValueError):
+    """Raised when an index artifact is corrupt or incompatible."""
+
+
+def compute_corpus_hash(sources: Dict[str, str]) -> str:
+    """
+    Compute a stable hash of the source documents in a corpus.
+    
+    Args:
+        sources: Mapping of source file name to SHA-256 digest
+    
+    Returns:
+        Hex digest string
+    """
+    payload = json.dumps(sorted(sources.items())).encode("utf-8")
+    return hashlib.sha256(payload).hexdigest()
+
+
+class IndexArtifact:
+    """In-memory representation of an index artifact."""
+    
+    def __init__(self, header: Dict[str, Any], vectors: np.ndarray, chunks: List[Dict[str, Any]]):
+        self.header = header
+        self.vectors = vectors
+        self.chunks = chunks
+    
+    @property
+    def corpus_hash(self) -> str:
+        return self.header['corpus_hash']
+    
+    @property
+    def sources(self) -> Dict[str, str]:
+        return self.header['sources']
+
+
+def write_artifact(
+    path: str,
+    vectors: np.ndarray,
+    chunks: List[Dict[str, Any]],
+    embedding_model: str,
+    sources: Dict[str, str],
+    chunk_size: int,
+    chunk_overlap: int
+) -> Dict[str, Any]:
+    """
+    Write an index artifact to disk.
+    
+    Args:
+        path: Output file path
+        vectors: Embedding matrix, one row per chunk
+        chunks: Document chunks with text and metadata
+        embedding_model: Embedding model ID used for the vectors
+        sources: Mapping of source file name to SHA-256 digest
+        chunk_size: Chunk size used when splitting
+        chunk_overlap: Chunk overlap used when splitting
+    
+    Returns:
+        Artifact header
+    """
+    vectors = np.ascontiguousarray(vectors, dtype="<f4")
+    if vectors.ndim != 2 or vectors.shape[0] != len(chunks):
+        raise ArtifactError("Vectors must be a 2D matrix with one row per chunk")
+    
+    vector_bytes = vectors.tobytes()
+    chunk_bytes = json.dumps(chunks, ensure_ascii=False).encode("utf-8")
+    payload_hash = hashlib.sha256(vector_bytes + chunk_bytes).hexdigest()
+    
+    header = {
+        'format_version': FORMAT_VERSION,
+        'embedding_model': embedding_model,
+        'dimension': int(vectors.shape[1]),
+        'count': int(vectors.shape[0]),
+        'parser_version': PARSER_VERSION,
+        'chunk_size': chunk_size,
+        'chunk_overlap': chunk_overlap,
+        'corpus_hash': compute_corpus_hash(sources),
+        'sources': sources,
+        'vector_bytes': len(vector_bytes),
+        'chunk_bytes': len(chunk_bytes),
+        'payload_sha256': payload_hash,
+        'created_at': datetime.utcnow().isoformat()
+    }
+    header_bytes = json.dumps(header).encode("utf-8")
+    
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<Q", len(header_bytes)))
+        f.write(header_bytes)
+        f.write(vector_bytes)
+        f.write(chunk_bytes)
+    os.replace(tmp_path, path)
+    
+    return header
+
+
+def read_header(path: str) -> Dict[str, Any]:
+    """
+    Read only the header of an index artifact.
+    
+    Args:
+        path: Artifact file path
+    
+    Returns:
+        Artifact header
+    """
+    with open(path, "rb") as f:
+        return _read_header(f)
+
+
+def _read_header(f) -> Dict[str, Any]:
+    if f.read(len(MAGIC)) != MAGIC:
+        raise ArtifactError("Not an index artifact")
+    
+    (header_length,) = struct.unpack("<Q", f.read(8))
+    header = json.loads(f.read(header_length).decode("utf-8"))
+    
+    if header.get('format_version') != FORMAT_VERSION:
+        raise ArtifactError(
+            f"Unsupported artifact format {header.get('format_version')} (expected {FORMAT_VERSION})"
+        )
+    
+    return header
+
+
+def read_artifact(path: str, embedding_model: str = None) -> IndexArtifact:
+    """
+    Read and verify an index artifact.
+    
+    Args:
+        path: Artifact file path
+        embedding_model: Expected embedding model ID (skip check if None)
+    
+    Returns:
+        Verified IndexArtifact
+    
+    Raises:
+        ArtifactError: If the artifact is corrupt or built for another
+            embedding model or parser version
+    """
+    with open(path, "rb") as f:
+        header = _read_header(f)
+        
+        if embedding_model and header['embedding_model'] != embedding_model:
+            raise ArtifactError(
+                f"Artifact built with {header['embedding_model']}, but {embedding_model} is configured"
+            )
+        
+        if header['parser_version'] != PARSER_VERSION:
+            raise ArtifactError(
+                f"Artifact built with parser version {header['parser_version']} (expected {PARSER_VERSION})"
+            )
+        
+        vector_bytes = f.read(header['vector_bytes'])
+        chunk_bytes = f.read(header['chunk_bytes'])
+    
+    if hashlib.sha256(vector_bytes + chunk_bytes).hexdigest() != header['payload_sha256']:
+        raise ArtifactError("Artifact payload checksum mismatch")
+    
+    vectors = np.frombuffer(vector_bytes, dtype="<f4").reshape(header['count'], header['dimension'])
+    chunks = json.loads(chunk_bytes.decode("utf-8"))
+    
+    return IndexArtifact(header, vectors, chunks)
+
+
+def build_artifact(data_dir: str, output_path: str) -> Dict[str, Any]:
+    """
+    Parse, chunk and embed all tax bill PDFs into an index artifact.
+    
+    Args:
+        data_dir: Directory containing tax bill PDFs
+        output_path: Artifact file path
+    
+    Returns:
+        Artifact header
+    """
+    from app.rag.ingestion import TaxBillIngestionPipeline
+    from app.rag.vectorstore import create_embedding_model, get_embedding_model_name, compute_file_hash
+    
+    pipeline = TaxBillIngestionPipeline(data_dir=data_dir)
+    chunks = pipeline.process_documents()
+    
+    print(f"\nEmbedding {len(chunks)} chunks...")
+    embedding_model = create_embedding_model()
+    vectors = np.asarray(
+        embedding_model.embed_documents([chunk['text'] for chunk in chunks]),
+        dtype=np.float32
+    )
+    
+    sources = {
+        pdf_file.name: compute_file_hash(str(pdf_file))
+        for pdf_file in Path(data_dir).glob("*.pdf")
+    }
+    
+    return write_artifact(
+        output_path,
+        vectors,
+        chunks,
+        embedding_model=get_embedding_model_name(),
+        sources=sources,
+        chunk_size=pipeline.chunk_size,
+        chunk_overlap=pipeline.chunk_overlap
+    )
+
+
+if __name__ == "__main__":
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Build or inspect the prebuilt index artifact")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    
+    build_parser = subparsers.add_parser("build", help="Build an artifact from tax bill PDFs")
+    build_parser.add_argument("--data-dir", default="./data/tax_bills")
+    build_parser.add_argument("--output", default=DEFAULT_ARTIFACT_PATH)
+    
+    verify_parser = subparsers.add_parser("verify", help="Verify an artifact and print its header")
+    verify_parser.add_argument("path", nargs="?", default=DEFAULT_ARTIFACT_PATH)
+    
+    args = parser.parse_args()
+    
+    if args.command == "build":
+        header = build_artifact(args.data_dir, args.output)
+        print(f"\n✓ Wrote {header['count']} vectors to {args.output}")
+    else:
+        artifact = read_artifact(args.path)
+        header = artifact.header
+        print(f"✓ Artifact OK: {args.path}")
+    
+    for key in ('embedding_model', 'dimension', 'count', 'parser_version', 'corpus_hash', 'created_at'):
+        print(f"  {key}: {header[key]}")
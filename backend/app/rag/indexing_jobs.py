@@ -0,0 +1,154 @@
+"""
+Background indexing jobs for adding new documents to the live vector store.
+"""
+import uuid
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+from app.rag.vectorstore import TaxBillVectorStore
+
+
+class IndexingJobManager:
+    """
+    Run document ingestion off the request thread and track job status.
+    
+    Parsing and embedding happen in a worker thread while queries keep being
+    served; the vector store only locks out searches for the final insert.
+    """
+    
+    def __init__(
+        self,
+        vectorstore: TaxBillVectorStore,
+        data_dir: str = "./data/tax_bills",
+        max_workers: int = 1
+    ):
+        """
+        Initialize job manager.
+        
+        Args:
+            vectorstore: Live vector store to add documents to
+            data_dir: Directory where uploaded PDFs are stored
+            max_workers: Number of concurrent indexing jobs
+        """
+        self.vectorstore = vectorstore
+        self.data_dir = Path(data_dir)
+        self.data_dir.mkdir(parents=True, exist_ok=True)
+        
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="indexing")
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+    
+    def submit(self, filename: str, content: bytes, submitted_by: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Store an uploaded PDF and queue it for indexing.
+        
+        Args:
+            filename: Original file name of the upload
+            content: Raw PDF bytes
+            submitted_by: ID of the user who uploaded the document
+        
+        Returns:
+            Job status dictionary
+        
+        Raises:
+            ValueError: If the file is not a PDF or is already indexed
+        """
+        safe_name = Path(filename or "").name
+        if not safe_name.lower().endswith(".pdf") or not content.startswith(b"%PDF"):
+            raise ValueError("Only PDF documents can be indexed")
+        
+        pdf_path = self.data_dir / safe_name
+        digest = hashlib.sha256(content).hexdigest()
+        
+        job_id = str(uuid.uuid4())
+        job = {
+            'job_id': job_id,
+            'filename': safe_name,
+            'sha256': digest,
+            'status': 'queued',
+            'submitted_by': submitted_by,
+            'chunk_count': 0,
+            'error': None,
+            'corpus_version': None,
+            'created_at': datetime.utcnow().isoformat(),
+            'updated_at': datetime.utcnow().isoformat()
+        }
+        
+        # Checks, write and insert happen together so two concurrent uploads
+        # of the same document cannot both get through
+        with self._lock:
+            if digest in self.vectorstore.get_indexed_sources().values() or self._is_pending(digest):
+                raise ValueError(f"{safe_name} is already indexed or being indexed")
+            
+            try:
+                with open(pdf_path, "xb") as f:
+                    f.write(content)
+            except FileExistsError:
+                raise ValueError(f"A document named {safe_name} already exists")
+            
+            self._jobs[job_id] = job
+        
+        self._executor.submit(self._run, job_id, str(pdf_path))
+        
+        return dict(job)
+    
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Get status of a single job."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+    
+    def list_jobs(self) -> List[Dict[str, Any]]:
+        """Get status of all jobs, newest first."""
+        with self._lock:
+            jobs = [dict(job) for job in self._jobs.values()]
+        return sorted(jobs, key=lambda job: job['created_at'], reverse=True)
+    
+    def shutdown(self):
+        """Stop accepting jobs and wait for running ones to finish."""
+        self._executor.shutdown(wait=True)
+    
+    def _is_pending(self, digest: str) -> bool:
+        """Whether a job for this digest is queued or running (call with self._lock held)."""
+        return any(
+            job['sha256'] == digest and job['status'] not in ('completed', 'failed')
+            for job in self._jobs.values()
+        )
+    
+    def _update(self, job_id: str, **fields):
+        with self._lock:
+            self._jobs[job_id].update(fields, updated_at=datetime.utcnow().isoformat())
+    
+    def _run(self, job_id: str, pdf_path: str):
+        """Parse, embed and index a single PDF (runs in a worker thread)."""
+        # Ingestion pulls in pdfplumber and the text splitters; keep them off the serving path
+        from app.rag.ingestion import TaxBillIngestionPipeline
+        
+        try:
+            self._update(job_id, status='parsing')
+            pipeline = TaxBillIngestionPipeline(data_dir=str(self.data_dir))
+            chunks = pipeline.process_file(pdf_path)
+            
+            self._update(job_id, status='embedding', chunk_count=len(chunks))
+            embeddings = self.vectorstore.embed_chunks(chunks)
+            
+            self._update(job_id, status='indexing')
+            job = self.get_job(job_id)
+            self.vectorstore.add_embedded_chunks(
+                chunks,
+                embeddings,
+                sources={job['filename']: job['sha256']}
+            )
+            
+            self._update(job_id, status='completed', corpus_version=self.vectorstore.corpus_version)
+            print(f"✓ Indexed {job['filename']} ({len(chunks)} chunks)")
+        
+        except Exception as e:
+            print(f"✗ Indexing job {job_id} failed: {str(e)}")
+            self._update(job_id, status='failed', error=str(e))
+            # Remove the upload so the document can be fixed and re-submitted
+            Path(pdf_path).unlink(missing_ok=True)
@@ -2,9 +2,11 @@
 Document ingestion pipeline for tax bills.
 """
 from typing import List, Dict, Any
+from pathlib import Path
+import hashlib
 from langchain_text_splitters import RecursiveCharacterTextSplitter
-from app.utils.document_parser import process_all_tax_bills
-from app.rag.vectorstore import TaxBillVectorStore
+from app.utils.document_parser import TaxBillParser, process_all_tax_bills
+from app.rag.vectorstore import TaxBillVectorStore, compute_file_hash
 import os
 
 
@@ -55,6 +57,23 @@ class TaxBillIngestionPipeline:
         
         return processed_chunks
     
+    def process_file(self, pdf_path: str) -> List[Dict[str, Any]]:
+        """
+        Process a single tax bill PDF into final chunks.
+        
+        Args:
+            pdf_path: Path to the PDF file
+            
+        Returns:
+            List of processed document chunks
+        """
+        raw_chunks = TaxBillParser().extract_with_hierarchy(pdf_path)
+        
+        if not raw_chunks:
+            raise ValueError(f"No text could be extracted from {Path(pdf_path).name}")
+        
+        return self._split_chunks(raw_chunks)
+    
     def _split_chunks(self, raw_chunks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """
         Split large chunks into smaller, overlapping pieces.
@@ -63,7 +82,8 @@ class TaxBillIngestionPipeline:
             raw_chunks: Initial chunks from PDF parsing
             
         Returns:
-            List of smaller chunks with preserved metadata
+            List of smaller chunks with preserved metadata; pieces of the
+            same chunk share a parent_id
         """
         processed_chunks = []
         
@@ -78,12 +98,14 @@ class TaxBillIngestionPipeline:
             
             # Split large chunks
             sub_texts = self.text_splitter.split_text(text)
+            parent_id = hashlib.sha256(f"{metadata.get('source', '')}\n{text}".encode("utf-8")).hexdigest()[:16]
             
             for idx, sub_text in enumerate(sub_texts):
                 new_chunk = {
                     'text': sub_text,
                     'metadata': {
                         **metadata,
+                        'parent_id': parent_id,
                         'sub_chunk_index': idx,
                         'total_sub_chunks': len(sub_texts)
                     }
@@ -114,6 +136,10 @@ class TaxBillIngestionPipeline:
         
         # Add documents to vectorstore
         vectorstore.initialize_vectorstore(chunks)
+        vectorstore.record_sources({
+            pdf_file.name: compute_file_hash(str(pdf_file))
+            for pdf_file in Path(self.data_dir).glob("*.pdf")
+        })
         
         print("\n" + "=" * 60)
         print("INGESTION COMPLETE!")
@@ -0,0 +1,212 @@
+"""
+Single-pass query classifier: retrieval decision, misconceptions and topic.
+"""
+import re
+from typing import Any, Dict, Iterable, List, Sequence, Tuple
+
+# Messages that DON'T need retrieval (matched from the start of the message)
+NO_RETRIEVAL_PATTERNS: List[str] = [
+    r'^(hi|hello|hey|good morning|good afternoon|good evening)',
+    r'^(how are you|what\'?s up|sup)',
+    r'^(thanks|thank you|appreciate)',
+    r'^(bye|goodbye|see you)',
+    r'^(ok|okay|alright|cool)',
+    r'^(yes|no|maybe)',
+    # Pidgin greetings, only when that is the whole message
+    r'^(how far|how you dey|how una dey|wetin dey happen|how body|tank you)\W*$',
+]
+
+# Keywords that ALWAYS need retrieval
+RETRIEVAL_KEYWORDS: List[str] = [
+    'tax', 'vat', 'bill', 'law', 'reform', 'rate', 'payment',
+    'income', 'business', 'company', 'revenue', 'derivation',
+    'section', 'act', 'when', 'how much', 'percentage', 'state',
+    'federal', 'collection', 'administration', 'compliance'
+]
+
+# Topic of a question, for follow-up suggestions; earlier topics win
+TOPIC_KEYWORDS: List[Tuple[str, List[str]]] = [
+    ('vat', ['vat']),
+    ('income', ['income', 'paye', 'salary', 'earn']),
+    ('business', ['business']),
+]
+
+# Priority used for "nothing matched"; any real priority is lower
+NO_MATCH = float('inf')
+
+
+class AhoCorasick:
+    """
+    Aho-Corasick automaton for finding many substrings in one scan.
+    
+    Each pattern carries a value; stepping the automaton over a text reports
+    the values of every pattern ending at each position. Failure links are
+    folded into a full transition table, so each character costs one dict
+    lookup.
+    """
+    
+    def __init__(self, patterns: Iterable[Tuple[str, Any]]):
+        """
+        Build the automaton.
+        
+        Args:
+            patterns: (pattern, value) pairs
+        """
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[Tuple[Any, ...]] = [()]
+        
+        for pattern, value in patterns:
+            state = 0
+            for char in pattern:
+                if char not in self._goto[state]:
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append(())
+                    self._goto[state][char] = len(self._goto) - 1
+                state = self._goto[state][char]
+            self._output[state] += (value,)
+        
+        # Breadth-first failure links (depth-1 states fall back to the root);
+        # outputs inherit those of their fallback
+        queue = list(self._goto[0].values())
+        for state in queue:
+            for char, child in self._goto[state].items():
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(char, 0)
+                self._output[child] += self._output[self._fail[child]]
+                queue.append(child)
+        
+        # A state's transitions are its fallback's, overridden by its own edges;
+        # characters outside every pattern return to the root
+        self.transitions: List[Dict[str, int]] = [dict(self._goto[0])] + [{} for _ in queue]
+        for state in queue:
+            self.transitions[state] = {**self.transitions[self._fail[state]], **self._goto[state]}
+    
+    @property
+    def state_count(self) -> int:
+        """Number of automaton states."""
+        return len(self.transitions)
+    
+    def step(self, state: int, char: str) -> int:
+        """Advance from `state` on one character."""
+        return self.transitions[state].get(char, 0)
+    
+    def output(self, state: int) -> Tuple[Any, ...]:
+        """Values of the patterns ending at `state`."""
+        return self._output[state]
+    
+    def find_all(self, text: str) -> List[Any]:
+        """Values of every pattern occurrence in `text`, in order of their end."""
+        found = []
+        state = 0
+        transitions = self.transitions
+        for char in text:
+            state = transitions[state].get(char, 0)
+            found.extend(self._output[state])
+        return found
+
+
+class QueryClassifier:
+    """
+    Classify a query in one pass over its text.
+    
+    Greetings and other conversational openers are matched by a single
+    anchored regex alternation. Retrieval and topic keywords are found by an
+    Aho-Corasick automaton, and misconception phrases by a second automaton
+    stepped over the same characters with spaces skipped ("50 % tax" still
+    matches "50% tax").
+    """
+    
+    def __init__(
+        self,
+        no_retrieval_patterns: Sequence[str] = NO_RETRIEVAL_PATTERNS,
+        retrieval_keywords: Sequence[str] = RETRIEVAL_KEYWORDS,
+        misconception_keys: Sequence[str] = (),
+        topic_keywords: Sequence[Tuple[str, Sequence[str]]] = TOPIC_KEYWORDS
+    ):
+        """
+        Compile the classifier.
+        
+        Args:
+            no_retrieval_patterns: Regexes for messages that need no retrieval
+            retrieval_keywords: Keywords that always need retrieval
+            misconception_keys: Misconception phrases, in priority order
+            topic_keywords: (topic, keywords) pairs, in priority order
+        """
+        self.misconception_keys = list(misconception_keys)
+        self.topics = [topic for topic, _ in topic_keywords]
+        
+        self._no_retrieval = re.compile("|".join(f"(?:{pattern})" for pattern in no_retrieval_patterns))
+        
+        keywords = [(keyword, ('retrieval', 0)) for keyword in retrieval_keywords]
+        for priority, (_, words) in enumerate(topic_keywords):
+            keywords.extend((word, ('topic', priority)) for word in words)
+        keyword_automaton = AhoCorasick(keywords)
+        
+        misconception_automaton = AhoCorasick(
+            (key.replace(' ', ''), priority) for priority, key in enumerate(self.misconception_keys)
+        )
+        
+        # Per state: does a retrieval keyword end here, and the best topic /
+        # misconception ending here (NO_MATCH if none)
+        self._keyword_transitions = keyword_automaton.transitions
+        self._keyword_at = [
+            any(kind == 'retrieval' for kind, _ in keyword_automaton.output(state))
+            for state in range(keyword_automaton.state_count)
+        ]
+        self._topic_at = [
+            min((priority for kind, priority in keyword_automaton.output(state) if kind == 'topic'), default=NO_MATCH)
+            for state in range(keyword_automaton.state_count)
+        ]
+        self._misconception_transitions = misconception_automaton.transitions
+        self._misconception_at = [
+            min(misconception_automaton.output(state), default=NO_MATCH)
+            for state in range(misconception_automaton.state_count)
+        ]
+    
+    def classify(self, query: str) -> Dict[str, Any]:
+        """
+        Classify a query.
+        
+        Args:
+            query: User query
+        
+        Returns:
+            Dictionary with 'needs_retrieval', 'misconception' (the matched
+            misconception key or None) and 'topic' (or None)
+        """
+        text = query.lower().strip()
+        
+        keyword_transitions, keyword_at, topic_at = self._keyword_transitions, self._keyword_at, self._topic_at
+        misconception_transitions, misconception_at = self._misconception_transitions, self._misconception_at
+        keyword_state = misconception_state = 0
+        has_keyword = False
+        topic = misconception = NO_MATCH
+        
+        for char in text:
+            keyword_state = keyword_transitions[keyword_state].get(char, 0)
+            if keyword_at[keyword_state]:
+                has_keyword = True
+            if topic_at[keyword_state] < topic:
+                topic = topic_at[keyword_state]
+            
+            if char != ' ':
+                misconception_state = misconception_transitions[misconception_state].get(char, 0)
+                if misconception_at[misconception_state] < misconception:
+                    misconception = misconception_at[misconception_state]
+        
+        # Greetings and basic conversation, and very short queries without
+        # a tax keyword (likely greetings); everything else is retrieved
+        needs_retrieval = not (
+            self._no_retrieval.match(text)
+            or (len(text.split()) <= 2 and not has_keyword)
+        )
+        
+        return {
+            'needs_retrieval': needs_retrieval,
+            'misconception': self.misconception_keys[misconception] if misconception != NO_MATCH else None,
+            'topic': self.topics[topic] if topic != NO_MATCH else None
+        }
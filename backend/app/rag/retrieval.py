@@ -4,7 +4,10 @@ Advanced retrieval system with conditional retrieval logic.
 from typing import List, Dict, Any, Optional
 from langchain_core.documents import Document
 from app.rag.vectorstore import TaxBillVectorStore
-import re
+from app.rag.context_packing import ContextPacker
+from app.rag.compression import SentenceCompressor, create_compressor
+from app.rag.query_classifier import QueryClassifier
+from app.utils.concurrency import run_in_pool
 
 
 class ConditionalRetriever:
@@ -13,32 +16,17 @@ class ConditionalRetriever:
     Key for meeting rubric requirement: "Conditional retrieval works"
     """
     
-    def __init__(self, vectorstore: TaxBillVectorStore):
+    def __init__(self, vectorstore: TaxBillVectorStore, classifier: Optional[QueryClassifier] = None):
         """
         Initialize retriever.
         
         Args:
             vectorstore: Initialized vector store
+            classifier: Query classifier making the retrieval decision
+                (defaults to one with the standard patterns and keywords)
         """
         self.vectorstore = vectorstore
-        
-        # Patterns that DON'T need retrieval
-        self.no_retrieval_patterns = [
-            r'^(hi|hello|hey|good morning|good afternoon|good evening)',
-            r'^(how are you|what\'?s up|sup)',
-            r'^(thanks|thank you|appreciate)',
-            r'^(bye|goodbye|see you)',
-            r'^(ok|okay|alright|cool)',
-            r'^(yes|no|maybe)',
-        ]
-        
-        # Keywords that ALWAYS need retrieval
-        self.retrieval_keywords = [
-            'tax', 'vat', 'bill', 'law', 'reform', 'rate', 'payment',
-            'income', 'business', 'company', 'revenue', 'derivation',
-            'section', 'act', 'when', 'how much', 'percentage', 'state',
-            'federal', 'collection', 'administration', 'compliance'
-        ]
+        self.classifier = classifier or QueryClassifier()
     
     def should_retrieve(self, query: str) -> bool:
         """
@@ -50,27 +38,7 @@ class ConditionalRetriever:
         Returns:
             Boolean indicating if retrieval should occur
         """
-        query_lower = query.lower().strip()
-        
-        # Check for greetings and basic conversation
-        for pattern in self.no_retrieval_patterns:
-            if re.match(pattern, query_lower):
-                return False
-        
-        # Very short queries are likely greetings
-        if len(query_lower.split()) <= 2 and not any(kw in query_lower for kw in self.retrieval_keywords):
-            return False
-        
-        # Check for retrieval keywords
-        if any(keyword in query_lower for keyword in self.retrieval_keywords):
-            return True
-        
-        # Questions about the bills themselves need retrieval
-        if any(word in query_lower for word in ['what', 'when', 'how', 'why', 'which', 'who', 'where']):
-            return True
-        
-        # Default to retrieval for ambiguous cases
-        return True
+        return self.classifier.classify(query)['needs_retrieval']
     
     def retrieve(self, query: str, k: int = 5) -> List[Document]:
         """
@@ -111,47 +79,171 @@ class AdvancedRetriever:
     Enhanced retriever with re-ranking and filtering.
     """
     
-    def __init__(self, vectorstore: TaxBillVectorStore, min_score: float = 0.5):
+    def __init__(
+        self,
+        vectorstore: TaxBillVectorStore,
+        min_score: float = 0.5,
+        context_packer: Optional[ContextPacker] = None,
+        compressor: Optional[SentenceCompressor] = None,
+        classifier: Optional[QueryClassifier] = None
+    ):
         """
         Initialize advanced retriever.
         
         Args:
             vectorstore: Initialized vector store
             min_score: Minimum relevance score threshold
+            context_packer: Packer that fits documents into the prompt token
+                budget (defaults to CONTEXT_TOKEN_BUDGET)
+            compressor: Optional sentence-level compressor applied before
+                packing (defaults to one if CONTEXT_COMPRESSION is enabled)
+            classifier: Query classifier shared with the caller
         """
-        self.conditional_retriever = ConditionalRetriever(vectorstore)
+        self.conditional_retriever = ConditionalRetriever(vectorstore, classifier)
         self.min_score = min_score
+        self.context_packer = context_packer or ContextPacker()
+        self.compressor = compressor or create_compressor(vectorstore)
     
-    def retrieve_and_rank(self, query: str, k: int = 5) -> Dict[str, Any]:
+    def retrieve_and_rank(
+        self,
+        query: str,
+        k: int = 5,
+        classification: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
         """
         Retrieve documents with scoring and metadata.
         
         Args:
             query: User query
             k: Number of documents to retrieve
+            classification: Result of QueryClassifier.classify for the query,
+                if the caller already has it
             
         Returns:
             Dictionary with documents, scores, and metadata
         """
         # Check if retrieval is needed
-        needs_retrieval = self.conditional_retriever.should_retrieve(query)
+        classification = classification or self.conditional_retriever.classifier.classify(query)
         
-        if not needs_retrieval:
-            return {
-                'needs_retrieval': False,
-                'documents': [],
-                'sources': [],
-                'reasoning': 'Query is a greeting or does not require document retrieval'
-            }
+        if not classification['needs_retrieval']:
+            return self._no_retrieval_result(classification)
+        
+        # Embed once; the embedding is reused for sentence compression
+        query_embedding, results = self._search(query, k)
+        
+        return self._rank_results(results, query_embedding, classification['topic'])
+    
+    async def aretrieve_and_rank(
+        self,
+        query: str,
+        k: int = 5,
+        query_embedding: Optional[List[float]] = None,
+        classification: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Async version of retrieve_and_rank.
+        Query embedding and vector search run in the shared worker pool so
+        the event loop stays free while they execute.
+        
+        Args:
+            query: User query
+            k: Number of documents to retrieve
+            query_embedding: Precomputed query embedding, if the caller
+                already has one
+            classification: Result of QueryClassifier.classify for the query,
+                if the caller already has it
+            
+        Returns:
+            Dictionary with documents, scores, and metadata
+        """
+        classification = classification or self.conditional_retriever.classifier.classify(query)
+        
+        if not classification['needs_retrieval']:
+            return self._no_retrieval_result(classification)
+        
+        query_embedding, results = await run_in_pool(self._search, query, k, query_embedding)
+        
+        return self._rank_results(results, query_embedding, classification['topic'])
+    
+    async def aretrieve_and_rank_many(
+        self,
+        query_embeddings: List[Optional[List[float]]],
+        classifications: List[Dict[str, Any]],
+        k: int = 5
+    ) -> List[Dict[str, Any]]:
+        """
+        Retrieve and rank for many queries with a single vector search.
         
-        # Retrieve with scores
-        results = self.conditional_retriever.retrieve_with_score(query, k=k)
+        Args:
+            query_embeddings: One precomputed embedding per query (None for
+                queries that need no retrieval)
+            classifications: One QueryClassifier.classify result per query
+            k: Number of documents to retrieve per query
+        
+        Returns:
+            One retrieve_and_rank result per query, in the same order
+        """
+        searched = [i for i, classification in enumerate(classifications) if classification['needs_retrieval']]
         
+        vectorstore = self.conditional_retriever.vectorstore
+        results = await run_in_pool(
+            vectorstore.similarity_search_by_vectors_with_score,
+            [query_embeddings[i] for i in searched],
+            k
+        )
+        ranked = {
+            i: self._rank_results(result, query_embeddings[i], classifications[i]['topic'])
+            for i, result in zip(searched, results)
+        }
+        
+        return [
+            ranked[i] if i in ranked else self._no_retrieval_result(classification)
+            for i, classification in enumerate(classifications)
+        ]
+    
+    @staticmethod
+    def _no_retrieval_result(classification: Dict[str, Any]) -> Dict[str, Any]:
+        """Result for a query that needs no retrieval."""
+        return {
+            'needs_retrieval': False,
+            'documents': [],
+            'sources': [],
+            'query_embedding': None,
+            'topic': classification['topic'],
+            'reasoning': 'Query is a greeting or does not require document retrieval'
+        }
+    
+    def _search(self, query: str, k: int, query_embedding: Optional[List[float]] = None) -> tuple:
+        """Embed the query (unless given) and search by vector, returning (embedding, results)."""
+        vectorstore = self.conditional_retriever.vectorstore
+        if query_embedding is None:
+            query_embedding = vectorstore.embed_query(query)
+        return query_embedding, vectorstore.similarity_search_by_vector_with_score(query_embedding, k=k)
+    
+    def _rank_results(
+        self,
+        results: List[tuple],
+        query_embedding: Optional[List[float]] = None,
+        topic: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Filter (document, distance) results by score and attach source metadata.
+        
+        Args:
+            results: List of (document, score) tuples from the vector store
+            query_embedding: Embedding the search was run with
+            topic: Topic of the query (see QueryClassifier)
+            
+        Returns:
+            Dictionary with documents, scores, and metadata
+        """
         if not results:
             return {
                 'needs_retrieval': True,
                 'documents': [],
                 'sources': [],
+                'query_embedding': query_embedding,
+                'topic': topic,
                 'reasoning': 'No relevant documents found'
             }
         
@@ -176,34 +268,47 @@ class AdvancedRetriever:
             'needs_retrieval': True,
             'documents': filtered_docs,
             'sources': sources,
+            'query_embedding': query_embedding,
+            'topic': topic,
             'reasoning': f'Retrieved {len(filtered_docs)} relevant documents'
         }
     
+    def pack_context(
+        self,
+        documents: List[Document],
+        query_embedding: Optional[List[float]] = None
+    ) -> Dict[str, Any]:
+        """
+        Compress retrieved chunks to their relevant sentences (if enabled),
+        merge overlapping chunks and fit them into the context token budget.
+        
+        Args:
+            documents: List of retrieved documents, most relevant first
+            query_embedding: Query embedding from retrieval, needed for
+                compression
+            
+        Returns:
+            Dictionary with context string, documents used and token count
+        """
+        if not documents:
+            return {'context': "", 'documents': [], 'tokens': 0}
+        
+        if self.compressor is not None and query_embedding is not None:
+            documents = self.compressor.compress(documents, query_embedding)
+        
+        return self.context_packer.pack(documents)
+    
     def get_context_string(self, documents: List[Document]) -> str:
         """
         Convert documents to a formatted context string for LLM.
         
         Args:
-            documents: List of retrieved documents
+            documents: List of retrieved documents, most relevant first
             
         Returns:
-            Formatted context string
+            Formatted context string within the context token budget
         """
-        if not documents:
-            return ""
-        
-        context_parts = []
-        for idx, doc in enumerate(documents, 1):
-            metadata = doc.metadata
-            context_parts.append(
-                f"[Source {idx}]\n"
-                f"Bill: {metadata.get('bill_name', 'Unknown')}\n"
-                f"Section: {metadata.get('section', 'N/A')}\n"
-                f"Page: {metadata.get('page', 'N/A')}\n"
-                f"Content: {doc.page_content}\n"
-            )
-        
-        return "\n---\n".join(context_parts)
+        return self.pack_context(documents)['context']
     
     def format_sources_for_response(self, sources: List[Dict[str, Any]]) -> List[Dict[str, str]]:
         """
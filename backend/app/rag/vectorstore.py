@@ -2,14 +2,107 @@
 Vector store setup and management using ChromaDB.
 """
 import os
+import json
+import uuid
+import hashlib
+import threading
+from contextlib import contextmanager
 from typing import List, Dict, Any
 from pathlib import Path
 
-from langchain_chroma import Chroma                 
-from langchain_huggingface import HuggingFaceEmbeddings 
 from langchain_core.documents import Document       
 
 
+CORPUS_MANIFEST_FILE = "corpus_manifest.json"
+COLLECTION_NAME = "nigerian_tax_bills"
+
+# Chroma rejects very large single inserts
+ADD_BATCH_SIZE = 5000
+
+
+def get_embedding_model_name() -> str:
+    """Get the configured embedding model ID."""
+    return os.getenv("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+
+
+def create_embedding_model():
+    """
+    Create the sentence embedding model used for documents and queries.
+    
+    Returns:
+        HuggingFaceEmbeddings instance
+    """
+    # Imported here so importing this module stays cheap; the model itself
+    # is loaded by the background startup task
+    from langchain_huggingface import HuggingFaceEmbeddings
+    
+    return HuggingFaceEmbeddings(
+        model_name=get_embedding_model_name(),
+        model_kwargs={'device': 'cpu'}
+    )
+
+
+def compute_file_hash(path: str) -> str:
+    """
+    Compute the SHA-256 digest of a file.
+    
+    Args:
+        path: Path to the file
+        
+    Returns:
+        Hex digest string
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ReadWriteLock:
+    """
+    Lock allowing many concurrent readers or a single writer.
+    Waiting writers block new readers so index updates are never starved.
+    """
+    
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._readers = 0
+        self._writer = False
+        self._writers_waiting = 0
+    
+    @contextmanager
+    def read(self):
+        """Hold the lock in shared (read) mode."""
+        with self._condition:
+            while self._writer or self._writers_waiting:
+                self._condition.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._readers -= 1
+                if self._readers == 0:
+                    self._condition.notify_all()
+    
+    @contextmanager
+    def write(self):
+        """Hold the lock in exclusive (write) mode."""
+        with self._condition:
+            self._writers_waiting += 1
+            while self._writer or self._readers:
+                self._condition.wait()
+            self._writers_waiting -= 1
+            self._writer = True
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._writer = False
+                self._condition.notify_all()
+
+
 class TaxBillVectorStore:
     """Manage vector store for tax bill documents."""
     
@@ -21,12 +114,14 @@ class TaxBillVectorStore:
             persist_directory: Directory to persist ChromaDB
         """
         self.persist_directory = persist_directory
-        self.embedding_model = HuggingFaceEmbeddings(
-            model_name=os.getenv("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2"),
-            model_kwargs={'device': 'cpu'}
-        )
+        self.embedding_model = create_embedding_model()
         self.vectorstore = None
         
+        # Searches share the lock; index updates take it exclusively so every
+        # query sees either the corpus before or after an update, never half of it
+        self._lock = ReadWriteLock()
+        self.corpus_version = "empty"
+        
         # Create persist directory if it doesn't exist
         Path(persist_directory).mkdir(parents=True, exist_ok=True)
     
@@ -37,12 +132,14 @@ class TaxBillVectorStore:
         Args:
             chunks: List of document chunks to index (if creating new)
         """
+        from langchain_chroma import Chroma
+        
         try:
             # Try to load existing vectorstore
             self.vectorstore = Chroma(
                 persist_directory=self.persist_directory,
                 embedding_function=self.embedding_model,
-                collection_name="nigerian_tax_bills"
+                collection_name=COLLECTION_NAME
             )
             
             # Check if vectorstore is empty
@@ -58,6 +155,8 @@ class TaxBillVectorStore:
                 self.add_documents(chunks)
             else:
                 raise ValueError("No existing vectorstore and no chunks provided to create one")
+        
+        self._refresh_corpus_version()
     
     def add_documents(self, chunks: List[Dict[str, Any]]):
         """
@@ -66,6 +165,8 @@ class TaxBillVectorStore:
         Args:
             chunks: List of document chunks with text and metadata
         """
+        from langchain_chroma import Chroma
+        
         if not chunks:
             raise ValueError("No chunks provided to add to vectorstore")
         
@@ -86,15 +187,246 @@ class TaxBillVectorStore:
                 documents=documents,
                 embedding=self.embedding_model,
                 persist_directory=self.persist_directory,
-                collection_name="nigerian_tax_bills"
+                collection_name=COLLECTION_NAME
             )
         else:
             self.vectorstore.add_documents(documents)
         
         # Persist to disk
         self.vectorstore.persist()
+        self._refresh_corpus_version()
         print(f"✓ Vector store created/updated with {len(documents)} documents")
     
+    def load_artifact(self, path: str) -> bool:
+        """
+        Serve from a prebuilt index artifact instead of ingesting PDFs.
+        
+        If the persisted collection was already loaded from an artifact with
+        the same corpus hash this only reads and checks the header. Otherwise
+        the artifact is verified and its precomputed vectors are bulk-inserted
+        into a fresh collection; nothing is parsed or embedded. Documents
+        uploaded since (sources in the manifest but not in the artifact) are
+        carried over with their stored embeddings.
+        
+        Args:
+            path: Path to the index artifact
+            
+        Returns:
+            True if the collection was (re)built from the artifact, False if
+            it was already up to date
+            
+        Raises:
+            ArtifactError: If the artifact is corrupt or incompatible
+        """
+        from langchain_chroma import Chroma
+        from app.rag.index_artifact import read_header, read_artifact, ArtifactError
+        
+        header = read_header(path)
+        if header['embedding_model'] != get_embedding_model_name():
+            raise ArtifactError(
+                f"Artifact built with {header['embedding_model']}, "
+                f"but {get_embedding_model_name()} is configured"
+            )
+        
+        if self.vectorstore is None:
+            self.vectorstore = Chroma(
+                persist_directory=self.persist_directory,
+                embedding_function=self.embedding_model,
+                collection_name=COLLECTION_NAME
+            )
+        
+        # Documents uploaded since the artifact was loaded only add to the count
+        manifest = self._read_manifest()
+        if (manifest.get('artifact_corpus_hash') == header['corpus_hash']
+                and self.vectorstore._collection.count() >= header['count']):
+            self._refresh_corpus_version()
+            print(f"Index artifact already loaded ({header['count']} documents)")
+            return False
+        
+        artifact = read_artifact(path, embedding_model=get_embedding_model_name())
+        
+        uploaded = {
+            name: digest for name, digest in manifest.get('sources', {}).items()
+            if name not in artifact.sources
+        }
+        
+        with self._lock.write():
+            kept = self._get_source_chunks(set(uploaded)) if uploaded else None
+            
+            # Replace whatever the collection held with the artifact contents
+            self.vectorstore.delete_collection()
+            self.vectorstore = Chroma(
+                persist_directory=self.persist_directory,
+                embedding_function=self.embedding_model,
+                collection_name=COLLECTION_NAME
+            )
+            
+            for start in range(0, len(artifact.chunks), ADD_BATCH_SIZE):
+                batch = artifact.chunks[start:start + ADD_BATCH_SIZE]
+                self.vectorstore._collection.add(
+                    ids=[f"{artifact.corpus_hash[:12]}-{start + idx}" for idx in range(len(batch))],
+                    embeddings=artifact.vectors[start:start + ADD_BATCH_SIZE],
+                    metadatas=[chunk['metadata'] for chunk in batch],
+                    documents=[chunk['text'] for chunk in batch]
+                )
+            
+            kept_sources = {}
+            if kept is not None:
+                for start in range(0, len(kept['ids']), ADD_BATCH_SIZE):
+                    self.vectorstore._collection.add(
+                        ids=kept['ids'][start:start + ADD_BATCH_SIZE],
+                        embeddings=kept['embeddings'][start:start + ADD_BATCH_SIZE],
+                        metadatas=kept['metadatas'][start:start + ADD_BATCH_SIZE],
+                        documents=kept['documents'][start:start + ADD_BATCH_SIZE]
+                    )
+                kept_names = {Path(str(metadata.get('source', ''))).name for metadata in kept['metadatas']}
+                kept_sources = {name: digest for name, digest in uploaded.items() if name in kept_names}
+            
+            for name in set(uploaded) - set(kept_sources):
+                print(f"⚠ Uploaded document {name} has no chunks in the index; delete its PDF and upload it again to re-index it")
+            
+            self._write_manifest({
+                'sources': {**artifact.sources, **kept_sources},
+                'artifact_corpus_hash': artifact.corpus_hash
+            })
+            self._refresh_corpus_version()
+        
+        kept_count = len(kept['ids']) if kept is not None else 0
+        print(f"✓ Loaded {len(artifact.chunks)} documents from index artifact {path}"
+              + (f", kept {kept_count} from {len(kept_sources)} uploaded documents" if kept_sources else ""))
+        return True
+    
+    def _get_source_chunks(self, filenames: set) -> Dict[str, list]:
+        """
+        Get the stored chunks of some source files, with their embeddings.
+        
+        Args:
+            filenames: Source file names (as recorded in the manifest)
+        
+        Returns:
+            Dictionary of aligned ids, embeddings, metadatas and documents lists
+        """
+        collection = self.vectorstore._collection
+        stored = collection.get(include=['metadatas'])
+        ids = [
+            chunk_id for chunk_id, metadata in zip(stored['ids'], stored['metadatas'])
+            if Path(str((metadata or {}).get('source', ''))).name in filenames
+        ]
+        if not ids:
+            return {'ids': [], 'embeddings': [], 'metadatas': [], 'documents': []}
+        
+        chunks = collection.get(ids=ids, include=['embeddings', 'metadatas', 'documents'])
+        return {
+            'ids': list(chunks['ids']),
+            'embeddings': chunks['embeddings'],
+            'metadatas': list(chunks['metadatas']),
+            'documents': list(chunks['documents'])
+        }
+    
+    def warm_up(self):
+        """Run a dummy encode so the first real query doesn't pay model start-up costs."""
+        self.embedding_model.embed_query("warm up")
+    
+    def embed_chunks(self, chunks: List[Dict[str, Any]]) -> List[List[float]]:
+        """
+        Compute embeddings for document chunks without touching the index.
+        
+        Args:
+            chunks: List of document chunks with text and metadata
+            
+        Returns:
+            One embedding vector per chunk
+        """
+        return self.embedding_model.embed_documents([chunk['text'] for chunk in chunks])
+    
+    def add_embedded_chunks(
+        self,
+        chunks: List[Dict[str, Any]],
+        embeddings: List[List[float]],
+        sources: Dict[str, str] = None
+    ):
+        """
+        Atomically add pre-embedded chunks to the live vector store.
+        
+        The expensive embedding work happens beforehand (see embed_chunks), so
+        the exclusive lock is held only for the single collection insert.
+        
+        Args:
+            chunks: List of document chunks with text and metadata
+            embeddings: Embedding vectors, aligned with chunks
+            sources: Source files to record in the corpus manifest
+        """
+        if self.vectorstore is None:
+            raise ValueError("Vector store not initialized")
+        
+        if len(chunks) != len(embeddings):
+            raise ValueError("Chunks and embeddings must have the same length")
+        
+        if not chunks:
+            return
+        
+        with self._lock.write():
+            self.vectorstore._collection.add(
+                ids=[str(uuid.uuid4()) for _ in chunks],
+                embeddings=embeddings,
+                metadatas=[chunk['metadata'] for chunk in chunks],
+                documents=[chunk['text'] for chunk in chunks]
+            )
+            if sources:
+                self.record_sources(sources)
+            else:
+                self._refresh_corpus_version()
+        
+        print(f"✓ Added {len(chunks)} documents to live vector store (corpus {self.corpus_version})")
+    
+    def _manifest_path(self) -> Path:
+        return Path(self.persist_directory) / CORPUS_MANIFEST_FILE
+    
+    def _read_manifest(self) -> Dict[str, Any]:
+        path = self._manifest_path()
+        if not path.exists():
+            return {}
+        
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    
+    def _write_manifest(self, manifest: Dict[str, Any]):
+        tmp_path = self._manifest_path().with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self._manifest_path())
+    
+    def get_indexed_sources(self) -> Dict[str, str]:
+        """
+        Get the source files recorded in the corpus manifest.
+        
+        Returns:
+            Mapping of source file name to SHA-256 digest
+        """
+        return self._read_manifest().get("sources", {})
+    
+    def record_sources(self, sources: Dict[str, str]):
+        """
+        Record indexed source files in the corpus manifest.
+        
+        Args:
+            sources: Mapping of source file name to SHA-256 digest
+        """
+        manifest = self._read_manifest()
+        manifest["sources"] = {**manifest.get("sources", {}), **sources}
+        self._write_manifest(manifest)
+        
+        self._refresh_corpus_version()
+    
+    def _refresh_corpus_version(self):
+        """Derive a short corpus version from the manifest and document count."""
+        count = self.vectorstore._collection.count() if self.vectorstore is not None else 0
+        payload = json.dumps(
+            {"sources": self.get_indexed_sources(), "count": count},
+            sort_keys=True
+        )
+        self.corpus_version = hashlib.sha256(payload.encode("utf-8")).hexdigest()[:12]
+    
     def similarity_search(self, query: str, k: int = 5, filter_dict: Dict = None) -> List[Document]:
         """
         Perform similarity search.
@@ -110,14 +442,15 @@ class TaxBillVectorStore:
         if self.vectorstore is None:
             raise ValueError("Vector store not initialized")
         
-        if filter_dict:
-            results = self.vectorstore.similarity_search(
-                query, 
-                k=k,
-                filter=filter_dict
-            )
-        else:
-            results = self.vectorstore.similarity_search(query, k=k)
+        with self._lock.read():
+            if filter_dict:
+                results = self.vectorstore.similarity_search(
+                    query, 
+                    k=k,
+                    filter=filter_dict
+                )
+            else:
+                results = self.vectorstore.similarity_search(query, k=k)
         
         return results
     
@@ -135,9 +468,93 @@ class TaxBillVectorStore:
         if self.vectorstore is None:
             raise ValueError("Vector store not initialized")
         
-        results = self.vectorstore.similarity_search_with_score(query, k=k)
+        with self._lock.read():
+            results = self.vectorstore.similarity_search_with_score(query, k=k)
+        return results
+    
+    def embed_query(self, query: str) -> List[float]:
+        """
+        Embed a search query.
+        
+        Args:
+            query: Search query
+            
+        Returns:
+            Query embedding vector
+        """
+        return self.embedding_model.embed_query(query)
+    
+    def embed_texts(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embed several texts in one batched call.
+        
+        Args:
+            texts: Texts to embed
+            
+        Returns:
+            One embedding vector per text
+        """
+        if not texts:
+            return []
+        return self.embedding_model.embed_documents(texts)
+    
+    def similarity_search_by_vector_with_score(self, embedding: List[float], k: int = 5) -> List[tuple]:
+        """
+        Perform similarity search with a precomputed query embedding.
+        
+        Args:
+            embedding: Query embedding vector (see embed_query)
+            k: Number of results to return
+            
+        Returns:
+            List of (document, score) tuples
+        """
+        if self.vectorstore is None:
+            raise ValueError("Vector store not initialized")
+        
+        with self._lock.read():
+            results = self.vectorstore.similarity_search_by_vector_with_relevance_scores(embedding, k=k)
         return results
     
+    def similarity_search_by_vectors_with_score(
+        self,
+        embeddings: List[List[float]],
+        k: int = 5
+    ) -> List[List[tuple]]:
+        """
+        Search for several precomputed query embeddings in one collection query.
+        
+        Args:
+            embeddings: Query embedding vectors (see embed_texts)
+            k: Number of results to return per query
+        
+        Returns:
+            One list of (document, score) tuples per embedding, as returned
+            by similarity_search_by_vector_with_score
+        """
+        if self.vectorstore is None:
+            raise ValueError("Vector store not initialized")
+        if not embeddings:
+            return []
+        
+        with self._lock.read():
+            results = self.vectorstore._collection.query(
+                query_embeddings=embeddings,
+                n_results=k,
+                include=["documents", "metadatas", "distances"]
+            )
+        
+        return [
+            [
+                (Document(page_content=text, metadata=metadata or {}, id=doc_id), distance)
+                for text, metadata, doc_id, distance in zip(texts, metadatas, ids, distances)
+                if text is not None
+            ]
+            for texts, metadatas, ids, distances in zip(
+                results["documents"], results["metadatas"], results["ids"], results["distances"]
+            )
+        ]
+    
     def get_retriever(self, search_kwargs: Dict = None):
         """
         Get a retriever object for use in chains.
@@ -171,5 +588,6 @@ class TaxBillVectorStore:
         return {
             "status": "initialized",
             "document_count": count,
+            "corpus_version": self.corpus_version,
             "persist_directory": self.persist_directory
         }
\ No newline at end of file
@@ -0,0 +1,198 @@
+"""
+Admission control for LLM calls: concurrency cap, bounded queue and
+round-robin fairness between users.
+"""
+import os
+import math
+import time
+import asyncio
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Deque, Dict, Optional
+
+# Queue key for calls made without a user (FAQ pregeneration, scripts)
+ANONYMOUS_USER = "anonymous"
+
+
+class AdmissionRejected(Exception):
+    """Raised when the LLM wait queue is full."""
+    
+    def __init__(self, retry_after: int, reason: str = "LLM queue is full"):
+        """
+        Args:
+            retry_after: Seconds the client should wait before retrying
+            reason: Human-readable reason
+        """
+        super().__init__(reason)
+        self.retry_after = retry_after
+
+
+class LLMAdmissionController:
+    """
+    Scheduler in front of the chat model.
+    
+    At most max_concurrency calls run at once. Further calls wait in a
+    bounded queue; when a slot frees up, users with waiting calls are served
+    in turn, so one user sending many questions cannot starve the others.
+    When the queue (or the user's share of it) is full, calls are rejected
+    at once with a retry estimate instead of piling up behind the provider's
+    rate limits.
+    """
+    
+    def __init__(
+        self,
+        max_concurrency: int = None,
+        max_queue: int = None,
+        max_queue_per_user: int = None
+    ):
+        """
+        Initialize controller.
+        
+        Args:
+            max_concurrency: Concurrent LLM calls (LLM_MAX_CONCURRENCY, default 8)
+            max_queue: Calls allowed to wait for a slot (LLM_MAX_QUEUE, default 64)
+            max_queue_per_user: Waiting calls allowed per user
+                (LLM_MAX_QUEUE_PER_USER, default 4)
+        """
+        self.max_concurrency = max_concurrency or int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+        self.max_queue = max_queue if max_queue is not None else int(os.getenv("LLM_MAX_QUEUE", "64"))
+        self.max_queue_per_user = max_queue_per_user or int(os.getenv("LLM_MAX_QUEUE_PER_USER", "4"))
+        
+        self.active = 0
+        self.queued = 0
+        # Waiting calls by user, in the order users are served
+        self._waiters: "OrderedDict[str, Deque[asyncio.Future]]" = OrderedDict()
+        
+        self.admitted = 0
+        self.rejected = 0
+        self.extra_admitted = 0
+        self._wait_times: Deque[float] = deque(maxlen=1000)
+        # Moving average of how long a call holds its slot, for Retry-After
+        self._hold_seconds = 5.0
+    
+    def is_saturated(self, user_id: Optional[str] = None) -> bool:
+        """Whether a new call (for user_id, if given) would be rejected now."""
+        if self.active < self.max_concurrency and not self.queued:
+            return False
+        if self.queued >= self.max_queue:
+            return True
+        return user_id is not None and len(self._waiters.get(user_id, ())) >= self.max_queue_per_user
+    
+    def retry_after(self) -> int:
+        """Seconds until a slot is likely to free up for a new caller."""
+        rounds = (self.queued + 1) / self.max_concurrency
+        return max(1, math.ceil(rounds * self._hold_seconds))
+    
+    @asynccontextmanager
+    async def slot(self, user_id: Optional[str] = None, timeout: Optional[float] = None) -> AsyncIterator[None]:
+        """
+        Hold an LLM slot for the duration of the block.
+        
+        Args:
+            user_id: User the call is made for
+            timeout: Longest wait for a slot, or None to wait as long as needed
+        
+        Raises:
+            AdmissionRejected: If the wait queue is full
+            asyncio.TimeoutError: If no slot freed up within timeout
+        """
+        if timeout is None:
+            await self._acquire(user_id or ANONYMOUS_USER)
+        else:
+            await asyncio.wait_for(self._acquire(user_id or ANONYMOUS_USER), timeout)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self._hold_seconds = 0.9 * self._hold_seconds + 0.1 * (time.monotonic() - started)
+            self._release()
+    
+    async def _acquire(self, user_id: str):
+        if self.active < self.max_concurrency and not self.queued:
+            self.active += 1
+            self.admitted += 1
+            self._wait_times.append(0.0)
+            return
+        
+        if self.is_saturated(user_id):
+            self.rejected += 1
+            raise AdmissionRejected(self.retry_after())
+        
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(user_id, deque()).append(waiter)
+        self.queued += 1
+        enqueued = time.monotonic()
+        
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # Granted a slot just as the caller went away; pass it on
+                self._release()
+            else:
+                self._remove_waiter(user_id, waiter)
+            raise
+        
+        self.admitted += 1
+        self._wait_times.append(time.monotonic() - enqueued)
+    
+    def try_acquire(self) -> bool:
+        """
+        Take a slot only if one is free and nobody is waiting, for best-effort
+        extra calls such as hedges. Free it with release().
+        
+        Returns:
+            Whether a slot was taken
+        """
+        if self.active >= self.max_concurrency or self.queued:
+            return False
+        self.active += 1
+        self.extra_admitted += 1
+        return True
+    
+    def release(self):
+        """Free a slot taken with try_acquire."""
+        self._release()
+    
+    def _release(self):
+        """Free a slot, handing it straight to the next user in turn."""
+        while self._waiters:
+            user_id, waiters = next(iter(self._waiters.items()))
+            waiter = waiters.popleft()
+            self.queued -= 1
+            
+            # The user goes to the back of the rotation if they still have calls waiting
+            del self._waiters[user_id]
+            if waiters:
+                self._waiters[user_id] = waiters
+            
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        
+        self.active -= 1
+    
+    def _remove_waiter(self, user_id: str, waiter: asyncio.Future):
+        waiters = self._waiters.get(user_id)
+        if waiters is not None and waiter in waiters:
+            waiters.remove(waiter)
+            self.queued -= 1
+            if not waiters:
+                del self._waiters[user_id]
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get queue depth, wait-time and admission statistics."""
+        waits = sorted(self._wait_times)
+        return {
+            'max_concurrency': self.max_concurrency,
+            'max_queue': self.max_queue,
+            'active': self.active,
+            'queued': self.queued,
+            'users_waiting': len(self._waiters),
+            'admitted': self.admitted,
+            'rejected': self.rejected,
+            'extra_admitted': self.extra_admitted,
+            'wait_ms_avg': round(sum(waits) / len(waits) * 1000, 1) if waits else 0.0,
+            'wait_ms_p95': round(waits[int(len(waits) * 0.95)] * 1000, 1) if waits else 0.0,
+            'hold_seconds_avg': round(self._hold_seconds, 2)
+        }
@@ -0,0 +1,111 @@
+"""
+Bounded thread pool for blocking CPU and I/O work called from async code,
+and coalescing of identical in-flight async calls.
+"""
+import os
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """
+    Get the shared worker pool, sized by WORKER_POOL_SIZE.
+    
+    Embedding and vector search are CPU bound, so the pool is kept small to
+    stop a burst of requests from oversubscribing the CPU.
+    """
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=int(os.getenv("WORKER_POOL_SIZE", str(min(4, os.cpu_count() or 1)))),
+            thread_name_prefix="worker"
+        )
+    return _executor
+
+
+async def run_in_pool(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    Run a blocking function in the shared worker pool.
+    
+    Args:
+        func: Function to call
+        *args: Positional arguments
+        **kwargs: Keyword arguments
+        
+    Returns:
+        The function's return value
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), functools.partial(func, *args, **kwargs))
+
+
+def shutdown_executor():
+    """Shut down the shared worker pool."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False)
+        _executor = None
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent async calls that share a key into one call.
+    
+    The first caller for a key starts the call as a task; callers arriving
+    while it runs wait on the same task and get the same result (or
+    exception). The key is forgotten once the call finishes, so results are
+    never reused after the fact. A caller being cancelled does not cancel
+    the shared call, since others may still be waiting on it.
+    """
+    
+    def __init__(self):
+        """Initialize with no calls in flight."""
+        self._flights: Dict[Hashable, asyncio.Task] = {}
+        self.calls = 0
+        self.coalesced = 0
+    
+    async def do(self, key: Hashable, func: Callable[..., Awaitable[Any]], *args, **kwargs) -> Tuple[Any, bool]:
+        """
+        Run func(*args, **kwargs), or join the call already running for key.
+        
+        Args:
+            key: Calls with equal keys are coalesced
+            func: Coroutine function to call
+            *args: Positional arguments
+            **kwargs: Keyword arguments
+        
+        Returns:
+            (result, shared) where shared is True if the caller joined a
+            call started by someone else
+        """
+        flight = self._flights.get(key)
+        shared = flight is not None
+        
+        if shared:
+            self.coalesced += 1
+        else:
+            self.calls += 1
+            flight = asyncio.ensure_future(func(*args, **kwargs))
+            self._flights[key] = flight
+            flight.add_done_callback(functools.partial(self._land, key))
+        
+        return await asyncio.shield(flight), shared
+    
+    def _land(self, key: Hashable, flight: asyncio.Task):
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+        # Mark a failure as retrieved in case every caller was cancelled
+        if not flight.cancelled():
+            flight.exception()
+    
+    def get_stats(self) -> Dict[str, int]:
+        """Get coalescing statistics."""
+        return {
+            'in_flight': len(self._flights),
+            'calls': self.calls,
+            'coalesced': self.coalesced
+        }
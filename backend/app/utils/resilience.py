@@ -0,0 +1,169 @@
+"""
+Deadlines, hedged retries and a circuit breaker for calls to the LLM provider.
+"""
+import os
+import time
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+
+class CircuitBreaker:
+    """
+    Stop calling a failing dependency for a while.
+    
+    After failure_threshold consecutive failures the breaker opens and
+    refuses calls for reset_timeout seconds. It then lets a single trial call
+    through (half-open): success closes it again, failure re-opens it. A
+    trial call that never reports back is given up on after another
+    reset_timeout.
+    """
+    
+    def __init__(self, failure_threshold: int = None, reset_timeout: float = None):
+        """
+        Initialize breaker.
+        
+        Args:
+            failure_threshold: Consecutive failures that open the breaker
+                (LLM_BREAKER_FAILURES, default 5)
+            reset_timeout: Seconds to stay open before a trial call
+                (LLM_BREAKER_RESET_SECONDS, default 30)
+        """
+        self.failure_threshold = failure_threshold or int(os.getenv("LLM_BREAKER_FAILURES", "5"))
+        self.reset_timeout = reset_timeout or float(os.getenv("LLM_BREAKER_RESET_SECONDS", "30"))
+        
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_started: Optional[float] = None
+        self._lock = threading.Lock()
+        
+        self.times_opened = 0
+        self.refused = 0
+    
+    @property
+    def state(self) -> str:
+        """'closed', 'open' or 'half-open'."""
+        if self._opened_at is None:
+            return 'closed'
+        if time.monotonic() - self._opened_at < self.reset_timeout:
+            return 'open'
+        return 'half-open'
+    
+    def allow(self) -> bool:
+        """Whether a call may go ahead now (claims the trial call when half-open)."""
+        with self._lock:
+            state = self.state
+            if state == 'closed':
+                return True
+            now = time.monotonic()
+            if state == 'half-open' and (
+                self._trial_started is None or now - self._trial_started >= self.reset_timeout
+            ):
+                self._trial_started = now
+                return True
+            self.refused += 1
+            return False
+    
+    def record_success(self):
+        """Record a successful call."""
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_started = None
+    
+    def record_failure(self):
+        """Record a failed or timed-out call."""
+        with self._lock:
+            self._failures += 1
+            if self._opened_at is None and self._failures >= self.failure_threshold:
+                self.times_opened += 1
+                self._opened_at = time.monotonic()
+            elif self._opened_at is not None:
+                # A failed trial call re-opens the breaker
+                self._opened_at = time.monotonic()
+            self._trial_started = None
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get breaker statistics."""
+        return {
+            'state': self.state,
+            'consecutive_failures': self._failures,
+            'times_opened': self.times_opened,
+            'refused': self.refused
+        }
+
+
+def is_rate_limited(error: BaseException) -> bool:
+    """Whether an error is the provider refusing for rate limits (HTTP 429)."""
+    return getattr(error, 'status_code', None) == 429 or 'RateLimit' in type(error).__name__
+
+
+async def hedged_call(
+    call: Callable[[], Awaitable[Any]],
+    timeout: float,
+    hedge_after: float,
+    max_attempts: int = 2,
+    hedge_call: Optional[Callable[[], Optional[Awaitable[Any]]]] = None,
+    retryable: Optional[Callable[[BaseException], bool]] = None
+) -> Any:
+    """
+    Await call() within a deadline, starting a backup attempt if it is slow.
+    
+    A new attempt starts when the latest one has not answered within
+    hedge_after seconds, or as soon as an attempt fails, up to max_attempts
+    in total. The first attempt to succeed wins and the others are
+    cancelled.
+    
+    Args:
+        call: Function returning a fresh awaitable per attempt
+        timeout: Seconds before giving up
+        hedge_after: Seconds to wait on an attempt before hedging
+        max_attempts: Most attempts to start
+        hedge_call: Function starting a backup attempt, returning None if
+            none may start now (tried again after another hedge_after);
+            defaults to call
+        retryable: Whether an attempt's error is worth another attempt;
+            by default every error is
+    
+    Returns:
+        Result of the first successful attempt
+    
+    Raises:
+        asyncio.TimeoutError: If no attempt succeeded within timeout
+        Exception: The last attempt's error, if every attempt failed
+    """
+    deadline = time.monotonic() + timeout
+    hedge_call = hedge_call or call
+    attempts = {asyncio.ensure_future(call())}
+    started = 1
+    may_retry = True
+    last_error: Optional[BaseException] = None
+    
+    try:
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise asyncio.TimeoutError()
+            
+            wait = min(remaining, hedge_after) if started < max_attempts and may_retry else remaining
+            done, attempts = await asyncio.wait(attempts, timeout=wait, return_when=asyncio.FIRST_COMPLETED)
+            
+            for attempt in done:
+                if attempt.exception() is None:
+                    return attempt.result()
+                last_error = attempt.exception()
+                if retryable is not None and not retryable(last_error):
+                    may_retry = False
+            
+            # Reached on a slow attempt or a failed one
+            if started < max_attempts and may_retry:
+                backup = hedge_call()
+                if backup is not None:
+                    attempts.add(asyncio.ensure_future(backup))
+                    started += 1
+            
+            if not attempts:
+                raise last_error
+    finally:
+        for attempt in attempts:
+            attempt.cancel()
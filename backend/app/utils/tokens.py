@@ -0,0 +1,85 @@
+"""
+Token counting with the LLM's tokenizer.
+"""
+import os
+from functools import lru_cache
+from typing import Any, List, Optional
+
+
+def get_chat_model_name() -> str:
+    """Get the chat model ID used for answers."""
+    return os.getenv("OPENAI_MODEL", "gpt-4-turbo-preview")
+
+
+@lru_cache(maxsize=8)
+def _get_encoding(model: str) -> Optional[Any]:
+    """Load the tiktoken encoding for a model (None if tiktoken is unavailable)."""
+    try:
+        import tiktoken
+    except ImportError:
+        print("⚠ tiktoken not installed, estimating token counts from text length")
+        return None
+    
+    try:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        # The BPE file is downloaded on first use; set TIKTOKEN_CACHE_DIR to bake it in
+        print(f"⚠ Could not load tokenizer for {model}, estimating token counts: {str(e)}")
+        return None
+
+
+def count_tokens(text: str, model: str = None) -> int:
+    """
+    Count tokens in text as the chat model would.
+    
+    Args:
+        text: Text to measure
+        model: Model ID (defaults to the configured chat model)
+    
+    Returns:
+        Number of tokens
+    """
+    if not text:
+        return 0
+    
+    encoding = _get_encoding(model or get_chat_model_name())
+    if encoding is None:
+        # Roughly four characters per token for English text
+        return len(text) // 4 + 1
+    
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+# Prompt parts measured for token accounting, in prompt order: the static
+# system prompt and append-only history form a prefix the provider can cache
+PROMPT_COMPONENTS = ('system', 'history', 'context', 'misconception', 'question')
+
+# Chat format overhead: role and separators per message
+TOKENS_PER_MESSAGE = 3
+
+
+def count_message_tokens(messages: List[Any], model: str = None) -> int:
+    """
+    Count prompt tokens for chat messages, including per-message overhead.
+    
+    Args:
+        messages: LangChain messages
+        model: Model ID (defaults to the configured chat model)
+    
+    Returns:
+        Number of tokens
+    """
+    return sum(count_tokens(message.content, model) + TOKENS_PER_MESSAGE for message in messages)
+
+
+# Tokens the API adds to prime the assistant's reply
+REPLY_PRIMING_TOKENS = 3
+
+
+@lru_cache(maxsize=32)
+def count_static_tokens(text: str, model: str = None) -> int:
+    """count_tokens for fixed texts such as system prompts, memoized."""
+    return count_tokens(text, model)
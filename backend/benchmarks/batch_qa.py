@@ -0,0 +1,102 @@
+"""
+Batch question answering against the real embedding model and vector store.
+
+Compares answering a file of questions one aprocess_query call at a time
+(each embedding and searching on its own) with answer_batch, which embeds
+and searches them in batched passes. The LLM is a stub with a fixed
+latency, so the difference is the retrieval work.
+
+Usage (from the backend directory, with an initialized vector store):
+    python benchmarks/batch_qa.py [--questions 200] [--concurrency 4]
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+from pathlib import Path
+from typing import List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from langchain_core.messages import AIMessage
+
+from app.rag.vectorstore import TaxBillVectorStore
+from app.agents.tax_agent import TaxReformAgent
+from app.agents.faq_store import get_canned_questions
+from app.agents.batch_qa import answer_batch
+from app.utils.admission import LLMAdmissionController
+
+
+class StubLLM:
+    """Chat model stand-in that sleeps instead of calling OpenAI."""
+    
+    def __init__(self, latency: float):
+        self.latency = latency
+    
+    async def ainvoke(self, messages: List) -> AIMessage:
+        await asyncio.sleep(self.latency)
+        return AIMessage(content="Stub answer.")
+
+
+def make_questions(count: int) -> List[dict]:
+    """Distinct retrieval questions built from the curated ones."""
+    canned = get_canned_questions()
+    return [
+        {'id': str(idx), 'question': f"{canned[idx % len(canned)]} (client {idx})"}
+        for idx in range(count)
+    ]
+
+
+async def one_by_one(agent: TaxReformAgent, questions: List[dict], concurrency: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+    
+    async def answer(item: dict):
+        async with semaphore:
+            await agent.aprocess_query(item['question'])
+    
+    started = time.perf_counter()
+    await asyncio.gather(*(answer(item) for item in questions))
+    return time.perf_counter() - started
+
+
+async def batched(agent: TaxReformAgent, questions: List[dict], concurrency: int) -> float:
+    started = time.perf_counter()
+    async for _ in answer_batch(agent, questions, asyncio.Semaphore(concurrency)):
+        pass
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch question answering throughput")
+    parser.add_argument("--questions", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=4, help="Questions answered at once")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="Seconds per LLM call")
+    args = parser.parse_args()
+    
+    vectorstore = TaxBillVectorStore(
+        persist_directory=os.getenv("CHROMA_PERSIST_DIRECTORY", "./chroma_db")
+    )
+    vectorstore.initialize_vectorstore()
+    vectorstore.warm_up()
+    
+    admission = LLMAdmissionController(max_concurrency=args.concurrency)
+    agent = TaxReformAgent(vectorstore, llm=StubLLM(args.llm_latency), admission=admission)
+    # Every question should go through retrieval, not the answer and FAQ caches
+    agent.answer_cache = None
+    agent.faq_store = None
+    
+    questions = make_questions(args.questions)
+    
+    print("=" * 70)
+    print(f"BATCH QA: {args.questions} questions, concurrency {args.concurrency}, "
+          f"LLM {args.llm_latency * 1000:.0f} ms")
+    print("=" * 70)
+    
+    for label, run in (("one by one (aprocess_query)", one_by_one), ("batched (answer_batch)", batched)):
+        elapsed = asyncio.run(run(agent, questions, args.concurrency))
+        print(f"{label:30s} {elapsed:8.2f} s   {args.questions / elapsed:8.1f} questions/s")
+
+
+if __name__ == "__main__":
+    main()
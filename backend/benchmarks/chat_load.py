@@ -0,0 +1,115 @@
+"""
+Concurrent chat throughput with a stub LLM.
+
+Compares the old handler shape (an async endpoint calling the synchronous
+process_query, which blocks the event loop for the whole LLM call) with the
+async aprocess_query path, and a burst of one identical question (coalesced
+into a single LLM call). The LLM and vector store are stubs with fixed
+latencies, so the numbers isolate how well one worker overlaps requests.
+
+Usage (from the backend directory):
+    python benchmarks/chat_load.py [--requests 50] [--llm-latency 0.5]
+"""
+import sys
+import time
+import asyncio
+import argparse
+from pathlib import Path
+from typing import List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from langchain_core.documents import Document
+from langchain_core.messages import AIMessage
+
+from app.agents.tax_agent import TaxReformAgent
+from app.utils.admission import LLMAdmissionController
+
+
+class StubLLM:
+    """Chat model stand-in that sleeps instead of calling OpenAI."""
+    
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.calls = 0
+    
+    def invoke(self, messages: List) -> AIMessage:
+        self.calls += 1
+        time.sleep(self.latency)
+        return AIMessage(content="Stub answer.")
+    
+    async def ainvoke(self, messages: List) -> AIMessage:
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        return AIMessage(content="Stub answer.")
+
+
+class StubVectorStore:
+    """Vector store stand-in with a fixed search latency (embedding + search)."""
+    
+    corpus_version = "stub"
+    
+    def __init__(self, latency: float):
+        self.latency = latency
+    
+    def embed_query(self, query: str) -> List[float]:
+        return [1.0, 0.0, 0.0]
+    
+    def embed_texts(self, texts: List[str]) -> List[List[float]]:
+        return [[0.0, 1.0, 0.0] for _ in texts]
+    
+    def similarity_search_by_vector_with_score(self, embedding: List[float], k: int = 5) -> List[tuple]:
+        time.sleep(self.latency)
+        doc = Document(
+            page_content="VAT is charged at 7.5% on taxable supplies.",
+            metadata={'bill_name': 'Nigeria Tax Bill', 'section': 'PART III', 'page': 12}
+        )
+        return [(doc, 0.2)] * k
+
+
+async def run_load(agent: TaxReformAgent, requests: int, use_async: bool, identical: bool = False) -> float:
+    """Fire concurrent requests and return elapsed seconds."""
+    async def handler(idx: int):
+        question = "What is the VAT rate?" if identical else f"What is the VAT rate? ({idx})"
+        if use_async:
+            return await agent.aprocess_query(question)
+        return agent.process_query(question)
+    
+    started = time.perf_counter()
+    await asyncio.gather(*(handler(idx) for idx in range(requests)))
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Chat throughput with a stub LLM")
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="Seconds per LLM call")
+    parser.add_argument("--search-latency", type=float, default=0.01, help="Seconds per vector search")
+    args = parser.parse_args()
+    
+    llm = StubLLM(args.llm_latency)
+    # Measure how requests overlap, not the LLM concurrency cap
+    admission = LLMAdmissionController(max_concurrency=args.requests)
+    agent = TaxReformAgent(StubVectorStore(args.search_latency), llm=llm, admission=admission)
+    # Measure the LLM path, not the answer and FAQ caches
+    agent.answer_cache = None
+    agent.faq_store = None
+    
+    print("=" * 70)
+    print(f"CHAT LOAD TEST: {args.requests} concurrent requests, "
+          f"LLM {args.llm_latency * 1000:.0f} ms, search {args.search_latency * 1000:.0f} ms")
+    print("=" * 70)
+    
+    scenarios = (
+        ("before (sync process_query)", False, False),
+        ("after (aprocess_query)", True, False),
+        ("identical questions", True, True)
+    )
+    for label, use_async, identical in scenarios:
+        llm.calls = 0
+        elapsed = asyncio.run(run_load(agent, args.requests, use_async, identical))
+        print(f"{label:30s} {elapsed:8.2f} s   {args.requests / elapsed:8.1f} req/s   {llm.calls:4d} LLM calls")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Import-time profile for the API process.
+
+Runs `python -X importtime -c "import main"` in a fresh interpreter and
+reports the total cost of loading the app module, the slowest imports, and
+whether any ingestion-only or ML modules leaked into the serving path.
+
+Usage (from the backend directory):
+    python benchmarks/import_time.py [--top 15]
+"""
+import argparse
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+# Modules that must not be imported just by loading main.py
+DEFERRED_MODULES = [
+    'pdfplumber',
+    'langchain_text_splitters',
+    'langchain_openai',
+    'langchain_chroma',
+    'langchain_huggingface',
+    'chromadb',
+    'sentence_transformers',
+    'torch',
+]
+
+
+def profile_imports(module: str = "main") -> List[Tuple[str, int, int]]:
+    """
+    Profile imports of a module in a fresh interpreter.
+    
+    Args:
+        module: Module to import
+        
+    Returns:
+        List of (module name, self microseconds, cumulative microseconds)
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True
+    )
+    
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+    
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        
+        _, timings = line.split(":", 1)
+        self_us, cumulative_us, name = [part.strip() for part in timings.split("|")]
+        entries.append((name, int(self_us), int(cumulative_us)))
+    
+    return entries
+
+
+def summarize(entries: List[Tuple[str, int, int]], top: int) -> Dict[str, object]:
+    """Summarize an import profile."""
+    top_level = {name: cumulative for name, _, cumulative in entries}
+    loaded = {name for name, _, _ in entries}
+    
+    return {
+        'total_ms': top_level.get('main', 0) / 1000,
+        'module_count': len(entries),
+        'slowest': sorted(entries, key=lambda entry: entry[2], reverse=True)[:top],
+        'leaked': [
+            module for module in DEFERRED_MODULES
+            if any(name == module or name.startswith(module + ".") for name in loaded)
+        ]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile API import time")
+    parser.add_argument("--top", type=int, default=15, help="Number of slowest imports to show")
+    args = parser.parse_args()
+    
+    summary = summarize(profile_imports(), args.top)
+    
+    print("=" * 70)
+    print("IMPORT TIME: main")
+    print("=" * 70)
+    print(f"Total:   {summary['total_ms']:.1f} ms")
+    print(f"Modules: {summary['module_count']}")
+    print(f"\nSlowest imports (cumulative):")
+    for name, self_us, cumulative_us in summary['slowest']:
+        print(f"  {cumulative_us / 1000:9.1f} ms  (self {self_us / 1000:7.1f} ms)  {name.strip()}")
+    
+    if summary['leaked']:
+        print(f"\n✗ Deferred modules loaded at import time: {', '.join(summary['leaked'])}")
+        sys.exit(1)
+    
+    print("\n✓ No ingestion or ML modules loaded at import time")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Precision and recall of embedding-based misconception detection.
+
+Labelled questions (a misconception key, or None for an ordinary question)
+are embedded with the configured embedding model and run through
+SemanticMatcher.detect_misconception. The questions are phrasings that do
+not appear among the examples or neutral questions, plus the plain
+questions that used to be flagged ("When do the new tax laws take
+effect?"). The configured threshold and margin are reported first, then
+threshold-only matching (the old rule) and a sweep over both settings.
+
+Usage (from the backend directory; downloads the embedding model on first run):
+    python benchmarks/misconception_match.py
+"""
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.agents.tools import MisconceptionDetector
+from app.agents.faq_store import get_canned_questions
+from app.agents.semantic_match import SemanticMatcher
+from app.rag.vectorstore import create_embedding_model, get_embedding_model_name
+
+LABELLED_QUESTIONS: List[Tuple[str, Optional[str]]] = [
+    # Misconceptions, worded differently from the examples
+    ("Is it true the reform takes 50 percent of everyone's income?", '50% tax'),
+    ("Will half my pay go to the government under the new tax law?", '50% tax'),
+    ("I heard income tax is going up to fifty percent, is that right?", '50% tax'),
+    ("Are they now taxing salaries at 50%?", '50% tax'),
+    ("Is the VAT bill a plan to make the north poor?", 'north destruction'),
+    ("Will the new VAT formula ruin northern Nigeria?", 'north destruction'),
+    ("Is Lagos going to take all the VAT money from the north?", 'north destruction'),
+    ("Does the VAT reform mean the end of northern states?", 'north destruction'),
+    ("Will these taxes shut down all small businesses?", 'small business collapse'),
+    ("Is the reform going to destroy small traders?", 'small business collapse'),
+    ("Will SMEs collapse when the new tax laws come in?", 'small business collapse'),
+    ("Are the new taxes going to force my business to close down?", 'small business collapse'),
+    ("Do I have to pay the new taxes starting today?", 'immediate effect'),
+    ("Are the new tax rules already in force right now?", 'immediate effect'),
+    ("Will the reforms apply immediately once they are signed?", 'immediate effect'),
+    ("Does the new tax law take effect this week?", 'immediate effect'),
+    # Ordinary questions on the same topics
+    ("When do the new tax laws take effect?", None),
+    ("What is the top income tax rate?", None),
+    ("What is the highest tax band under the reform?", None),
+    ("How much tax will I pay on a salary of 5 million?", None),
+    ("What rate applies to income above 50 million?", None),
+    ("How is VAT shared among the 36 states?", None),
+    ("What is the VAT derivation formula?", None),
+    ("How much VAT does Kano get?", None),
+    ("Which states benefit from the VAT reform?", None),
+    ("Are small businesses exempt from company income tax?", None),
+    ("What is the turnover limit for small companies?", None),
+    ("How do small businesses register with the revenue service?", None),
+    ("When does implementation of the reform begin?", None),
+    ("What is the start date of the Nigeria Tax Bill?", None),
+    ("Is there a grace period before the new rules apply?", None),
+    ("What are the Nigerian Tax Reform Bills about?", None),
+    ("What does the Joint Revenue Board do?", None),
+    ("Will the reforms abolish any existing taxes?", None),
+    ("Do I need to pay tax if I earn minimum wage?", None),
+    ("What is the current VAT rate?", None),
+]
+
+
+def evaluate(matcher: SemanticMatcher, embeddings: List[List[float]]) -> Dict[str, object]:
+    """Score the matcher's current settings against the labels."""
+    flagged = correct = 0
+    false_positives = []
+    positives = sum(1 for _, label in LABELLED_QUESTIONS if label is not None)
+    
+    for (question, label), embedding in zip(LABELLED_QUESTIONS, embeddings):
+        detected = matcher.detect_misconception(embedding)
+        if detected is None:
+            continue
+        flagged += 1
+        if detected == label:
+            correct += 1
+        else:
+            false_positives.append((question, detected))
+    
+    return {
+        'precision': correct / flagged if flagged else 1.0,
+        'recall': correct / positives if positives else 1.0,
+        'flagged': flagged,
+        'false_positives': false_positives
+    }
+
+
+def main():
+    embedding_model = create_embedding_model()
+    matcher = SemanticMatcher(
+        embedding_model.embed_documents,
+        MisconceptionDetector.MISCONCEPTIONS,
+        get_canned_questions()
+    )
+    embeddings = embedding_model.embed_documents([question for question, _ in LABELLED_QUESTIONS])
+    threshold, margin = matcher.misconception_threshold, matcher.misconception_margin
+    
+    print("=" * 70)
+    print(f"MISCONCEPTION MATCHING: {len(LABELLED_QUESTIONS)} labelled questions, {get_embedding_model_name()}")
+    print("=" * 70)
+    
+    # A margin of -2 never rejects (cosine similarities lie in [-1, 1])
+    for label, margin_used in (("configured", margin), ("threshold only (old rule)", -2.0)):
+        matcher.misconception_threshold, matcher.misconception_margin = threshold, margin_used
+        result = evaluate(matcher, embeddings)
+        print(f"{label:28s} threshold {threshold:.2f} margin {max(margin_used, 0):.2f}   "
+              f"precision {result['precision']:.2f}   recall {result['recall']:.2f}   flagged {result['flagged']}")
+        for question, detected in result['false_positives']:
+            print(f"    ✗ {question!r} flagged as {detected!r}")
+    
+    print("\nthreshold  margin  precision  recall")
+    for sweep_threshold in (0.6, 0.65, 0.7, 0.75, 0.8):
+        for sweep_margin in (0.0, 0.03, 0.05, 0.1):
+            matcher.misconception_threshold, matcher.misconception_margin = sweep_threshold, sweep_margin
+            result = evaluate(matcher, embeddings)
+            print(f"{sweep_threshold:9.2f} {sweep_margin:7.2f} {result['precision']:10.2f} {result['recall']:7.2f}")
+
+
+if __name__ == "__main__":
+    main()
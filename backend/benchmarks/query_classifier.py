@@ -0,0 +1,123 @@
+"""
+Per-query classification cost: separate scans versus the single-pass classifier.
+
+The "before" path reproduces the old per-turn work: should_retrieve (run
+twice, for the answer cache and again in retrieval) looping over the
+greeting regexes and scanning the keyword list, MisconceptionDetector
+stripping spaces and scanning every key, and the related-question keyword
+chain. The "after" path is one
+QueryClassifier.classify call. Both must agree on every sample query.
+
+Usage (from the backend directory):
+    python benchmarks/query_classifier.py [--iterations 20000]
+"""
+import re
+import sys
+import time
+import argparse
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.agents.tools import MisconceptionDetector
+from app.rag.query_classifier import NO_RETRIEVAL_PATTERNS, RETRIEVAL_KEYWORDS
+
+SAMPLE_QUERIES: List[str] = [
+    "hi",
+    "Good morning!",
+    "thanks a lot",
+    "How far",
+    "ok",
+    "What is the new VAT rate?",
+    "Is it true there is a 50% tax on my salary?",
+    "How much income tax will I pay on N2.4 million a year?",
+    "What exemptions exist for small businesses?",
+    "When do the new tax laws take effect?",
+    "Explain the derivation formula for states and the federal government",
+    "Will the reform lead to north destruction?",
+    "Tell me about the Nigeria Revenue Service and how it handles compliance",
+    "who signs it",
+]
+
+
+def legacy_should_retrieve(query: str) -> bool:
+    """The old ConditionalRetriever.should_retrieve."""
+    query_lower = query.lower().strip()
+    
+    for pattern in NO_RETRIEVAL_PATTERNS:
+        if re.match(pattern, query_lower):
+            return False
+    
+    if len(query_lower.split()) <= 2 and not any(kw in query_lower for kw in RETRIEVAL_KEYWORDS):
+        return False
+    
+    if any(keyword in query_lower for keyword in RETRIEVAL_KEYWORDS):
+        return True
+    
+    return True
+
+
+def legacy_misconception(query: str):
+    """The old MisconceptionDetector.detect_misconception scan."""
+    query_lower = query.lower()
+    for key in MisconceptionDetector.MISCONCEPTIONS:
+        if key.replace(' ', '') in query_lower.replace(' ', ''):
+            return key
+    return None
+
+
+def legacy_topic(query: str):
+    """The old related-question keyword chain."""
+    question_lower = query.lower()
+    if 'vat' in question_lower:
+        return 'vat'
+    elif any(word in question_lower for word in ('income', 'paye', 'salary', 'earn')):
+        return 'income'
+    elif 'business' in question_lower or 'small business' in question_lower:
+        return 'business'
+    return None
+
+
+def legacy_classify(query: str) -> Dict[str, Any]:
+    """The old per-turn work: should_retrieve ran for the answer cache and again in retrieval."""
+    legacy_should_retrieve(query)
+    return {
+        'needs_retrieval': legacy_should_retrieve(query),
+        'misconception': legacy_misconception(query),
+        'topic': legacy_topic(query)
+    }
+
+
+def time_per_query(classify: Callable[[str], Dict[str, Any]], iterations: int) -> float:
+    """Return microseconds per classified query."""
+    started = time.perf_counter()
+    for _ in range(iterations):
+        for query in SAMPLE_QUERIES:
+            classify(query)
+    return (time.perf_counter() - started) / (iterations * len(SAMPLE_QUERIES)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query classification microbenchmark")
+    parser.add_argument("--iterations", type=int, default=20000, help="Passes over the sample queries")
+    args = parser.parse_args()
+    
+    classifier = MisconceptionDetector.create_classifier()
+    
+    for query in SAMPLE_QUERIES:
+        expected, actual = legacy_classify(query), classifier.classify(query)
+        if expected != actual:
+            raise SystemExit(f"✗ Mismatch for {query!r}: {expected} != {actual}")
+    print(f"✓ Both paths agree on {len(SAMPLE_QUERIES)} sample queries")
+    
+    print("=" * 70)
+    print(f"QUERY CLASSIFICATION: {args.iterations} x {len(SAMPLE_QUERIES)} queries")
+    print("=" * 70)
+    
+    for label, classify in (("before (separate scans)", legacy_classify), ("after (single pass)", classifier.classify)):
+        print(f"{label:30s} {time_per_query(classify, args.iterations):8.2f} µs/query")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,34 +6,46 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from contextlib import asynccontextmanager
 import os
+import time
+import asyncio
 from pathlib import Path
+from typing import TYPE_CHECKING
 from dotenv import load_dotenv
 
-from app.api import routes, auth_routes
-from app.rag.vectorstore import TaxBillVectorStore
-from app.rag.ingestion import run_ingestion_pipeline
-from app.agents.tax_agent import TaxReformAgent
+from app.api import routes, auth_routes, admin_routes, tax_routes, usage_routes, batch_routes
 from app.config.database import init_db
+from app.agents.suggestions import SuggestionIndex
+from app.utils.concurrency import shutdown_executor
+
+if TYPE_CHECKING:
+    from app.rag.vectorstore import TaxBillVectorStore
+    from app.rag.indexing_jobs import IndexingJobManager
+    from app.agents.tax_agent import TaxReformAgent
 
 # Load environment variables
 load_dotenv()
 
-# Global instances
-vectorstore: TaxBillVectorStore = None
-agent: TaxReformAgent = None
+# Global instances (created in the background by initialize_services)
+vectorstore: "TaxBillVectorStore" = None
+agent: "TaxReformAgent" = None
+job_manager: "IndexingJobManager" = None
 
 
-@asynccontextmanager
-async def lifespan(app: FastAPI):
+def initialize_services():
     """
-    Lifespan context manager for startup and shutdown events.
+    Load the vector store, embedding model and agent.
+    
+    Runs in a background thread so the API starts answering /api/health
+    immediately; heavy ML imports happen here rather than at module load.
     """
-    # Startup
-    print("=" * 70)
-    print("STARTING TAXEASE NIGERIA Q&A SYSTEM")
-    print("=" * 70)
+    global vectorstore, agent, job_manager
+    
+    from app.rag.vectorstore import TaxBillVectorStore
+    from app.rag.indexing_jobs import IndexingJobManager
+    from app.agents.tax_agent import TaxReformAgent
+    from app.agents.batch_qa import BatchJobManager
     
-    global vectorstore, agent
+    started = time.perf_counter()
     
     try:
         # Initialize database
@@ -51,6 +63,15 @@ async def lifespan(app: FastAPI):
             persist_directory=os.getenv("CHROMA_PERSIST_DIRECTORY", "./chroma_db")
         )
         
+        # Prefer the prebuilt index artifact baked into the image
+        artifact_path = os.getenv("INDEX_ARTIFACT_PATH", "./index/tax_bills.idx")
+        if Path(artifact_path).exists():
+            try:
+                vectorstore.load_artifact(artifact_path)
+            except Exception as e:
+                print(f"⚠ Could not load index artifact {artifact_path}: {str(e)}")
+                print("  Falling back to the persisted vector store")
+        
         # Check if vectorstore exists and has data
         try:
             vectorstore.initialize_vectorstore()
@@ -66,7 +87,8 @@ async def lifespan(app: FastAPI):
                     print(f"Please place PDF files in: {data_dir}")
                     print("   Then restart the application.")
                 else:
-                    # Run ingestion pipeline
+                    # Run ingestion pipeline (ingestion-only modules load here)
+                    from app.rag.ingestion import run_ingestion_pipeline
                     vectorstore = run_ingestion_pipeline(data_dir)
             else:
                 print(f"Loaded existing vector store with {stats['document_count']} documents")
@@ -77,18 +99,31 @@ async def lifespan(app: FastAPI):
             
             data_dir = "./data/tax_bills"
             if Path(data_dir).exists() and list(Path(data_dir).glob("*.pdf")):
+                from app.rag.ingestion import run_ingestion_pipeline
                 vectorstore = run_ingestion_pipeline(data_dir)
             else:
                 print(f"⚠ No PDF files found in {data_dir}")
                 print("   Please add PDF files and restart.")
         
+        # Warm up the embedding model so the first query doesn't pay for it
+        print("\n[2/4] Warming up embedding model...")
+        vectorstore.warm_up()
+        print("✓ Embedding model ready")
+        
         # Initialize agent
         print("\n[3/4] Initializing AI agent...")
         agent = TaxReformAgent(vectorstore)
         routes.set_agent(agent)
         print("✓ AI agent initialized")
         
-        print("\n[4/4] System ready!")
+        # Background indexing for admin document uploads
+        job_manager = IndexingJobManager(vectorstore, data_dir="./data/tax_bills")
+        admin_routes.set_job_manager(job_manager)
+        
+        # Background batch question answering (jobs from earlier runs are reloaded)
+        batch_routes.set_batch_manager(BatchJobManager(agent))
+        
+        print(f"\n[4/4] System ready in {time.perf_counter() - started:.1f}s!")
         print("=" * 70)
         print("TaxEase Nigeria Q&A System is ONLINE")
         print("=" * 70)
@@ -98,7 +133,27 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         print(f"\nSTARTUP ERROR: {str(e)}")
         print("Please check your configuration and try again.")
-        raise
+        routes.set_startup_error(str(e))
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Lifespan context manager for startup and shutdown events.
+    """
+    # Startup
+    print("=" * 70)
+    print("STARTING TAXEASE NIGERIA Q&A SYSTEM")
+    print("=" * 70)
+    
+    # Services load in the background; /api/health reports "initializing" until ready
+    startup_task = asyncio.create_task(asyncio.to_thread(initialize_services))
+    
+    # Typeahead starts with the curated questions; past questions are added
+    # by the periodic rebuild
+    suggestion_index = SuggestionIndex()
+    routes.set_suggestion_index(suggestion_index)
+    suggestion_task = asyncio.create_task(suggestion_index.run_periodic_rebuild())
     
     yield
     
@@ -106,6 +161,26 @@ async def lifespan(app: FastAPI):
     print("\n" + "=" * 70)
     print("SHUTTING DOWN")
     print("=" * 70)
+    
+    if not startup_task.done():
+        print("⚠ Shutting down before startup finished")
+    
+    suggestion_task.cancel()
+    
+    if job_manager is not None:
+        job_manager.shutdown()
+    
+    if batch_routes.batch_manager is not None:
+        # Running jobs are marked interrupted and can be resumed after restart
+        await batch_routes.batch_manager.shutdown()
+    
+    if routes.agent is not None:
+        routes.agent.summarizer.shutdown()
+        routes.agent.model_router.flush_log()
+        if routes.agent.answer_cache is not None:
+            routes.agent.answer_cache.save()
+    
+    shutdown_executor()
 
 
 # Create FastAPI app
@@ -128,6 +203,10 @@ app.add_middleware(
 # Include routers
 app.include_router(auth_routes.router, prefix="/api")
 app.include_router(routes.router, prefix="/api", tags=["chat"])
+app.include_router(admin_routes.router, prefix="/api")
+app.include_router(tax_routes.router, prefix="/api")
+app.include_router(usage_routes.router, prefix="/api")
+app.include_router(batch_routes.router, prefix="/api")
 
 
 # Root endpoint
@@ -139,6 +218,8 @@ async def root():
         "version": "2.0.0",
         "documentation": "/docs",
         "health": "/api/health",
+        "metrics": "/api/metrics",
+        "suggest": "/api/suggest",
         "endpoints": {
             "auth": {
                 "signup": "/api/auth/signup",
@@ -149,8 +230,29 @@ async def root():
             },
             "chat": {
                 "chat": "/api/chat",
+                "chat_stream": "/api/chat/stream",
                 "conversations": "/api/conversations",
                 "new_conversation": "/api/conversations/new"
+            },
+            "admin": {
+                "upload_document": "/api/admin/documents",
+                "jobs": "/api/admin/jobs"
+            },
+            "tax": {
+                "batch": "/api/tax/batch",
+                "scenario": "/api/tax/scenario",
+                "tables": "/api/tax/tables",
+                "vat_allocation": "/api/tax/vat/allocation",
+                "vat_formulas": "/api/tax/vat/formulas"
+            },
+            "usage": {
+                "me": "/api/usage",
+                "users": "/api/usage/users"
+            },
+            "batch": {
+                "submit": "/api/batch/jobs",
+                "status": "/api/batch/jobs/{job_id}",
+                "results": "/api/batch/jobs/{job_id}/results"
             }
         }
     }
@@ -0,0 +1,8 @@
+"""
+Shared test setup: make the backend package importable when pytest is run
+from the repository root or the backend directory.
+"""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,210 @@
+"""
+Tests for LLMAdmissionController scheduling in app.utils.admission.
+"""
+import asyncio
+
+import pytest
+
+from app.utils.admission import AdmissionRejected, LLMAdmissionController
+
+
+async def _settle():
+    """Let every runnable task reach its next await."""
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+async def _hold(controller: LLMAdmissionController, user_id: str = "holder"):
+    """Enter a slot and return its context manager, to be exited by the test."""
+    slot = controller.slot(user_id)
+    await slot.__aenter__()
+    return slot
+
+
+def test_free_slot_is_admitted_at_once():
+    async def scenario():
+        controller = LLMAdmissionController(max_concurrency=2, max_queue=4)
+        async with controller.slot("a"):
+            assert controller.active == 1
+            assert controller.queued == 0
+        return controller
+    
+    controller = asyncio.run(scenario())
+    assert controller.active == 0
+    assert controller.admitted == 1
+
+
+def test_waiting_users_are_served_round_robin():
+    async def scenario():
+        controller = LLMAdmissionController(max_concurrency=1, max_queue=10, max_queue_per_user=5)
+        holder = await _hold(controller)
+        order = []
+        
+        async def call(user_id: str, name: str):
+            async with controller.slot(user_id):
+                order.append(name)
+        
+        tasks = []
+        for user_id, name in (("a", "a1"), ("a", "a2"), ("a", "a3"), ("b", "b1"), ("c", "c1")):
+            tasks.append(asyncio.create_task(call(user_id, name)))
+            await _settle()
+        assert controller.queued == 5
+        
+        await holder.__aexit__(None, None, None)
+        await asyncio.gather(*tasks)
+        return controller, order
+    
+    controller, order = asyncio.run(scenario())
+    assert order == ["a1", "b1", "c1", "a2", "a3"]
+    assert controller.active == 0
+    assert controller.queued == 0
+
+
+def test_full_queue_rejects_with_retry_after():
+    async def scenario():
+        controller = LLMAdmissionController(max_concurrency=1, max_queue=1, max_queue_per_user=1)
+        holder = await _hold(controller)
+        waiting = asyncio.create_task(controller.slot("a").__aenter__())
+        await _settle()
+        
+        with pytest.raises(AdmissionRejected) as rejected:
+            async with controller.slot("b"):
+                pass
+        assert rejected.value.retry_after >= 1
+        
+        waiting.cancel()
+        await asyncio.gather(waiting, return_exceptions=True)
+        await holder.__aexit__(None, None, None)
+        return controller
+    
+    controller = asyncio.run(scenario())
+    assert controller.rejected == 1
+    assert controller.active == 0
+
+
+def test_per_user_queue_share_is_enforced():
+    async def scenario():
+        controller = LLMAdmissionController(max_concurrency=1, max_queue=10, max_queue_per_user=1)
+        holder = await _hold(controller)
+        waiting = asyncio.create_task(controller.slot("a").__aenter__())
+        await _settle()
+        
+        assert controller.is_saturated("a")
+        assert not controller.is_saturated("b")
+        with pytest.raises(AdmissionRejected):
+            await controller.slot("a").__aenter__()
+        
+        waiting.cancel()
+        await asyncio.gather(waiting, return_exceptions=True)
+        await holder.__aexit__(None, None, None)
+    
+    asyncio.run(scenario())
+
+
+def test_cancelled_waiter_leaves_the_queue():
+    async def scenario():
+        controller = LLMAdmissionController(max_concurrency=1, max_queue=10)
+        holder = await _hold(controller)
+        waiting = asyncio.create_task(controller.slot("a").__aenter__())
+        await _settle()
+        assert controller.queued == 1
+        
+        waiting.cancel()
+        await asyncio.gather(waiting, return_exceptions=True)
+        assert controller.queued == 0
+        assert controller.get_stats()['users_waiting'] == 0
+        
+        await holder.__aexit__(None, None, None)
+        return controller
+    
+    controller = asyncio.run(scenario())
+    assert controller.active == 0
+
+
+def test_wait_timeout_leaves_the_queue():
+    async def scenario():
+        controller = LLMAdmissionController(max_concurrency=1, max_queue=10)
+        holder = await _hold(controller)
+        with pytest.raises(asyncio.TimeoutError):
+            async with controller.slot("a", timeout=0.01):
+                pass
+        assert controller.queued == 0
+        await holder.__aexit__(None, None, None)
+        return controller
+    
+    controller = asyncio.run(scenario())
+    assert controller.active == 0
+
+
+def test_slot_granted_to_a_cancelled_waiter_is_passed_on():
+    async def scenario():
+        controller = LLMAdmissionController(max_concurrency=1, max_queue=10)
+        holder = await _hold(controller)
+        admitted = []
+        
+        async def call(user_id: str):
+            async with controller.slot(user_id):
+                admitted.append(user_id)
+        
+        first = asyncio.create_task(call("a"))
+        await _settle()
+        second = asyncio.create_task(call("b"))
+        await _settle()
+        
+        # Release grants the slot to "a"; "a" is cancelled before it runs again
+        await holder.__aexit__(None, None, None)
+        assert controller.active == 1
+        first.cancel()
+        
+        await asyncio.gather(first, second, return_exceptions=True)
+        return controller, first, admitted
+    
+    controller, first, admitted = asyncio.run(scenario())
+    assert first.cancelled()
+    assert admitted == ["b"]
+    assert controller.active == 0
+    assert controller.queued == 0
+
+
+def test_try_acquire_takes_only_a_free_slot():
+    async def scenario():
+        controller = LLMAdmissionController(max_concurrency=2, max_queue=10)
+        assert controller.try_acquire()
+        assert controller.try_acquire()
+        assert not controller.try_acquire()
+        assert controller.active == 2
+        assert controller.extra_admitted == 2
+        
+        controller.release()
+        controller.release()
+        return controller
+    
+    controller = asyncio.run(scenario())
+    assert controller.active == 0
+    assert controller.admitted == 0
+
+
+def test_try_acquire_does_not_jump_the_queue():
+    async def scenario():
+        controller = LLMAdmissionController(max_concurrency=1, max_queue=10)
+        assert controller.try_acquire()
+        admitted = []
+        
+        async def call():
+            async with controller.slot("a"):
+                admitted.append("a")
+        
+        waiting = asyncio.create_task(call())
+        await _settle()
+        assert controller.queued == 1
+        assert not controller.try_acquire()
+        
+        # Releasing the extra slot hands it to the waiting call
+        controller.release()
+        await waiting
+        return controller, admitted
+    
+    controller, admitted = asyncio.run(scenario())
+    assert admitted == ["a"]
+    assert controller.active == 0
+    assert controller.queued == 0
@@ -0,0 +1,197 @@
+"""
+Tests for hedged_call and CircuitBreaker in app.utils.resilience.
+"""
+import asyncio
+
+import pytest
+
+from app.utils import resilience
+from app.utils.resilience import CircuitBreaker, hedged_call
+
+
+class FakeClock:
+    """Stand-in for time.monotonic that only moves when told to."""
+    
+    def __init__(self):
+        self.now = 1000.0
+    
+    def __call__(self) -> float:
+        return self.now
+    
+    def advance(self, seconds: float):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(resilience.time, 'monotonic', fake)
+    return fake
+
+
+class Attempts:
+    """Scripted attempts: each entry is a result, an exception, or None to hang."""
+    
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.started = 0
+        self.cancelled = 0
+    
+    def __call__(self):
+        outcome = self.outcomes[self.started]
+        self.started += 1
+        return self._run(outcome)
+    
+    async def _run(self, outcome):
+        if outcome is None:
+            try:
+                await asyncio.Event().wait()
+            except asyncio.CancelledError:
+                self.cancelled += 1
+                raise
+        if isinstance(outcome, BaseException):
+            raise outcome
+        return outcome
+
+
+# hedged_call
+
+def test_fast_attempt_starts_no_backup():
+    attempts = Attempts("first", "second")
+    result = asyncio.run(hedged_call(attempts, timeout=5, hedge_after=5))
+    assert result == "first"
+    assert attempts.started == 1
+
+
+def test_slow_attempt_is_hedged_and_cancelled():
+    attempts = Attempts(None, "backup")
+    result = asyncio.run(hedged_call(attempts, timeout=5, hedge_after=0.01))
+    assert result == "backup"
+    assert attempts.started == 2
+    assert attempts.cancelled == 1
+
+
+def test_failed_attempt_is_retried_at_once():
+    # hedge_after is longer than the timeout, so only an immediate retry can answer in time
+    attempts = Attempts(RuntimeError("boom"), "retry")
+    result = asyncio.run(hedged_call(attempts, timeout=1, hedge_after=10))
+    assert result == "retry"
+    assert attempts.started == 2
+
+
+def test_non_retryable_error_is_raised_without_retry():
+    attempts = Attempts(ValueError("bad request"), "retry")
+    with pytest.raises(ValueError, match="bad request"):
+        asyncio.run(hedged_call(
+            attempts, timeout=1, hedge_after=10,
+            retryable=lambda error: not isinstance(error, ValueError)
+        ))
+    assert attempts.started == 1
+
+
+def test_last_error_is_raised_when_every_attempt_fails():
+    attempts = Attempts(RuntimeError("first"), RuntimeError("second"))
+    with pytest.raises(RuntimeError, match="second"):
+        asyncio.run(hedged_call(attempts, timeout=1, hedge_after=10))
+    assert attempts.started == 2
+
+
+def test_max_attempts_limits_backups():
+    attempts = Attempts(None, None, "third")
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(hedged_call(attempts, timeout=0.1, hedge_after=0.01, max_attempts=2))
+    assert attempts.started == 2
+    assert attempts.cancelled == 2
+
+
+def test_hedge_call_returning_none_adds_no_backup():
+    attempts = Attempts(RuntimeError("boom"), "backup")
+    with pytest.raises(RuntimeError, match="boom"):
+        asyncio.run(hedged_call(attempts, timeout=1, hedge_after=10, hedge_call=lambda: None))
+    assert attempts.started == 1
+
+
+def test_hedge_call_is_tried_again_after_refusing():
+    attempts = Attempts(None, "backup")
+    offers = []
+    
+    def hedge():
+        offers.append(len(offers))
+        return attempts() if len(offers) > 1 else None
+    
+    result = asyncio.run(hedged_call(attempts, timeout=5, hedge_after=0.01, hedge_call=hedge))
+    assert result == "backup"
+    assert len(offers) == 2
+    assert attempts.cancelled == 1
+
+
+def test_timeout_cancels_pending_attempts():
+    attempts = Attempts(None)
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(hedged_call(attempts, timeout=0.02, hedge_after=10, max_attempts=1))
+    assert attempts.cancelled == 1
+
+
+# CircuitBreaker
+
+def test_breaker_opens_after_consecutive_failures(clock):
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30)
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == 'closed'
+    
+    breaker.record_failure()
+    assert breaker.state == 'open'
+    assert breaker.times_opened == 1
+    assert not breaker.allow()
+    assert breaker.refused == 1
+
+
+def _open_breaker(clock: FakeClock) -> CircuitBreaker:
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    breaker.record_failure()
+    clock.advance(30)
+    assert breaker.state == 'half-open'
+    return breaker
+
+
+def test_half_open_allows_a_single_trial(clock):
+    breaker = _open_breaker(clock)
+    assert breaker.allow()
+    assert not breaker.allow()
+    assert not breaker.allow()
+    assert breaker.refused == 2
+
+
+def test_successful_trial_closes(clock):
+    breaker = _open_breaker(clock)
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == 'closed'
+    assert breaker.allow()
+    assert breaker.get_stats()['consecutive_failures'] == 0
+
+
+def test_failed_trial_reopens(clock):
+    breaker = _open_breaker(clock)
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == 'open'
+    assert breaker.times_opened == 1
+    
+    clock.advance(29)
+    assert not breaker.allow()
+    clock.advance(1)
+    assert breaker.allow()
+
+
+def test_lost_trial_is_given_up_after_reset_timeout(clock):
+    breaker = _open_breaker(clock)
+    assert breaker.allow()
+    clock.advance(29)
+    assert not breaker.allow()
+    clock.advance(1)
+    assert breaker.allow()
@@ -0,0 +1,132 @@
+"""
+Tests for the streaming payroll parsers in app.agents.tax_engine.
+"""
+import asyncio
+from typing import AsyncIterator, List
+
+import pytest
+
+from app.agents.tax_engine import iter_csv_incomes, iter_json_incomes
+
+
+async def _chunks(body: bytes, size: int) -> AsyncIterator[bytes]:
+    for start in range(0, len(body), size):
+        yield body[start:start + size]
+
+
+def parse_json(body: bytes, size: int = 1024, chunk_rows: int = 1000) -> List[float]:
+    """Run iter_json_incomes over body split into size-byte chunks."""
+    async def collect():
+        return [arr.tolist() async for arr in iter_json_incomes(_chunks(body, size), chunk_rows)]
+    return [value for arr in asyncio.run(collect()) for value in arr]
+
+
+def parse_csv(body: bytes, size: int = 1024, column: str = None) -> List[float]:
+    """Run iter_csv_incomes over body split into size-byte chunks."""
+    async def collect():
+        return [arr.tolist() async for arr in iter_csv_incomes(_chunks(body, size), column)]
+    return [value for arr in asyncio.run(collect()) for value in arr]
+
+
+# JSON
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 1024])
+def test_json_values_split_across_chunks(size):
+    body = b' [1200000, 350000.5,\n 2e6, -0.5e-1 ] '
+    assert parse_json(body, size) == [1200000.0, 350000.5, 2000000.0, -0.05]
+
+
+@pytest.mark.parametrize("body", [b"[]", b"[ ]", b" [\n] "])
+def test_json_empty_array(body):
+    assert parse_json(body, size=1) == []
+
+
+@pytest.mark.parametrize("body", [
+    b"[1,]",
+    b"[,1]",
+    b"[1,,2]",
+    b"[1 2]",
+    b"[[1, 2]]",
+    b"[1, [2]]",
+    b'["1"]',
+    b"[01]",
+    b"[1, null]",
+])
+def test_json_malformed_elements_rejected(body):
+    for size in (1, 1024):
+        with pytest.raises(ValueError, match="only contain numbers"):
+            parse_json(body, size)
+
+
+@pytest.mark.parametrize("body", [b"[1] 2", b"[1][2]", b"[1]]"])
+def test_json_trailing_data_rejected(body):
+    for size in (1, 1024):
+        with pytest.raises(ValueError, match="after the JSON array"):
+            parse_json(body, size)
+
+
+def test_json_unclosed_array_rejected():
+    with pytest.raises(ValueError, match="not closed"):
+        parse_json(b"[1, 2")
+
+
+@pytest.mark.parametrize("body", [b"", b"   ", b'{"incomes": [1]}', b"1 2"])
+def test_json_body_must_be_array(body):
+    with pytest.raises(ValueError, match="must be an array"):
+        parse_json(body)
+
+
+def test_json_yields_at_most_chunk_rows():
+    async def collect():
+        body = b"[" + b",".join(str(i).encode() for i in range(10)) + b"]"
+        return [len(arr) async for arr in iter_json_incomes(_chunks(body, 3), chunk_rows=4)]
+    assert asyncio.run(collect()) == [4, 4, 2]
+
+
+# CSV
+
+@pytest.mark.parametrize("size", [1, 5, 1024])
+def test_csv_header_and_quoted_thousands(size):
+    body = b'name,annual_income\n"Doe, J","1,200,000"\nA,350000.50\n'
+    assert parse_csv(body, size) == [1200000.0, 350000.5]
+
+
+@pytest.mark.parametrize("size", [1, 4, 1024])
+def test_csv_crlf_line_endings(size):
+    body = b"annual_income\r\n1200000\r\n\r\n2500000\r\n"
+    assert parse_csv(body, size) == [1200000.0, 2500000.0]
+
+
+@pytest.mark.parametrize("size", [1, 1024])
+def test_csv_last_line_without_newline(size):
+    assert parse_csv(b"annual_income\n100\n200", size) == [100.0, 200.0]
+
+
+def test_csv_without_header_reads_first_column():
+    assert parse_csv(b"1000,x\n2000,y\n") == [1000.0, 2000.0]
+
+
+def test_csv_named_column():
+    body = b'name,salary\nx,"1,000"\ny,2500\n'
+    assert parse_csv(body, size=3, column="salary") == [1000.0, 2500.0]
+
+
+def test_csv_header_without_requested_column():
+    with pytest.raises(ValueError, match="Column 'salary' not found"):
+        parse_csv(b"name,annual_income\nx,1\n", column="salary")
+
+
+def test_csv_header_without_income_column_reads_first_column():
+    # No annual_income column: the first column is used and must hold numbers
+    with pytest.raises(ValueError, match="Line 2: no valid income in column 1"):
+        parse_csv(b"name,salary\nx,1\n")
+
+
+def test_csv_unquoted_commas_are_separate_fields():
+    assert parse_csv(b"annual_income\n1,200\n") == [1.0]
+
+
+@pytest.mark.parametrize("body", [b"annual_income\nabc\n", b"annual_income\n1.2.3\n", b"name,annual_income\nx\n"])
+def test_csv_invalid_income_rejected(body):
+    with pytest.raises(ValueError, match="no valid income"):
+        parse_csv(body)